@@ -0,0 +1,212 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from .correlation import pairwise_pearson
+
+def _normalized(series):
+    """یکسان‌سازی نوع ستون تا هش ردیف‌ها به نوع فشرده انتخاب شده در خواندن بستگی نداشته باشد"""
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        return series.astype(np.float64)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return pd.Series(series.to_numpy(dtype='datetime64[ns]').view(np.int64), index=series.index)
+    return series.astype(object).astype(str)
+
+def row_hashes(df):
+    """هش هر ردیف برای تشخیص اینکه داده جدید ادامه داده قبلی است"""
+    if df.columns.empty:
+        return np.zeros(len(df), dtype=np.uint64)
+    normalized = pd.DataFrame({i: _normalized(df[col]) for i, col in enumerate(df.columns)})
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+
+def _digest(hashes):
+    return hashlib.sha256(np.ascontiguousarray(hashes).tobytes()).hexdigest()
+
+# ماتریس‌های k×k که جدول بزرگ به حساب می‌آیند و می‌توانند در فایل Arrow ذخیره شوند
+MATRICES = ('counts', 'sums', 'squares', 'products')
+
+def _to_list(values):
+    """تبدیل آرایه numpy به فهرست قابل ذخیره در JSON (NaN به None)"""
+    return np.where(np.isnan(values), None, values).tolist()
+
+def _from_list(values):
+    # numpy مقدار None را در آرایه اعشاری به NaN تبدیل می‌کند
+    return np.array(values, dtype=np.float64)
+
+class RunningAggregates:
+    """تجمیع‌های قابل ادغام یک دیتاست برای تحلیل افزایشی
+
+    برای ستون‌های عددی، مجموع‌ها و گشتاورهای دوتایی (حول مقدار ثابت shift) روی
+    ردیف‌هایی که هر دو ستون مقدار دارند نگه داشته می‌شود؛ آمار توصیفی، ماتریس
+    همبستگی از همین مقادیر به دست می‌آیند. دو مجموعه با
+    shift یکسان با جمع ساده ادغام می‌شوند.
+    """
+
+    def __init__(self, columns, numeric_columns, row_count, nulls, shift, counts, sums,
+                 squares, products, minimum, maximum, date_column, fingerprint):
+        self.columns = columns
+        self.numeric_columns = numeric_columns
+        self.row_count = row_count
+        self.nulls = nulls
+        self.shift = shift
+        # ماتریس‌های k×k؛ خانه [i, j] فقط ردیف‌هایی را می‌شمارد که ستون‌های i و j هر دو مقدار دارند
+        self.counts = counts
+        self.sums = sums
+        self.squares = squares
+        self.products = products
+        self.minimum = minimum
+        self.maximum = maximum
+        self.date_column = date_column
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def from_frame(cls, df, date_column=None, shift=None, hashes=None):
+        """محاسبه تجمیع‌ها با چند ضرب ماتریسی روی ستون‌های عددی"""
+        numeric_df = df.select_dtypes(include=[np.number])
+        values = numeric_df.to_numpy(dtype=np.float64)
+        present = ~np.isnan(values)
+
+        if shift is None:
+            with np.errstate(all='ignore'):
+                shift = np.nanmean(values, axis=0) if len(values) else np.zeros(values.shape[1])
+            shift = np.where(np.isnan(shift), 0.0, shift)
+        centered = np.where(present, values - shift, 0.0)
+        mask = present.astype(np.float64)
+
+        with np.errstate(all='ignore'):
+            minimum = np.nanmin(values, axis=0) if len(values) else np.full(values.shape[1], np.nan)
+            maximum = np.nanmax(values, axis=0) if len(values) else np.full(values.shape[1], np.nan)
+
+        return cls(
+            columns=[str(col) for col in df.columns],
+            numeric_columns=[str(col) for col in numeric_df.columns],
+            row_count=len(df),
+            nulls=df.isnull().sum().to_numpy(dtype=np.int64),
+            shift=shift,
+            counts=mask.T @ mask,
+            sums=centered.T @ mask,
+            squares=(centered ** 2).T @ mask,
+            products=centered.T @ centered,
+            minimum=minimum,
+            maximum=maximum,
+            date_column=date_column,
+            fingerprint=_digest(row_hashes(df) if hashes is None else hashes)
+        )
+
+    def matches(self, df, date_column, hashes):
+        """آیا df همین داده به اضافه ردیف‌های جدید در انتها است"""
+        return (
+            self.columns == [str(col) for col in df.columns]
+            and self.numeric_columns == [str(col) for col in df.select_dtypes(include=[np.number]).columns]
+            and self.date_column == date_column
+            and self.row_count <= len(df)
+            and self.fingerprint == _digest(hashes[:self.row_count])
+        )
+
+    def merge(self, other, fingerprint):
+        """ادغام با تجمیع ردیف‌های بعدی که با همان shift محاسبه شده است"""
+        return RunningAggregates(
+            columns=self.columns,
+            numeric_columns=self.numeric_columns,
+            row_count=self.row_count + other.row_count,
+            nulls=self.nulls + other.nulls,
+            shift=self.shift,
+            counts=self.counts + other.counts,
+            sums=self.sums + other.sums,
+            squares=self.squares + other.squares,
+            products=self.products + other.products,
+            minimum=np.fmin(self.minimum, other.minimum),
+            maximum=np.fmax(self.maximum, other.maximum),
+            date_column=self.date_column,
+            fingerprint=fingerprint
+        )
+
+    def numeric_stats(self, quartiles):
+        """جدول آمار ستون‌های عددی با همان ردیف‌های ColumnProfile؛ چارک‌ها از بیرون داده می‌شوند"""
+        count = np.diag(self.counts)
+        total = np.diag(self.sums)
+        with np.errstate(all='ignore'):
+            mean = self.shift + total / count
+            variance = (np.diag(self.squares) - total ** 2 / count) / (count - 1)
+        std = np.sqrt(np.clip(variance, 0, None))
+
+        rows = pd.DataFrame(
+            [count, mean, std, self.minimum],
+            index=['count', 'mean', 'std', 'min'],
+            columns=self.numeric_columns
+        )
+        tail = pd.DataFrame(
+            [self.maximum, self.shift * count + total],
+            index=['max', 'sum'],
+            columns=self.numeric_columns
+        )
+        return pd.concat([rows, quartiles.set_axis(self.numeric_columns, axis=1), tail]).astype(np.float64)
+
+    def correlation(self):
+        """ماتریس همبستگی پیرسون با حذف دوتایی مقادیر مفقود، معادل DataFrame.corr"""
+        matrix = pairwise_pearson(self.counts, self.sums, self.squares, self.products)
+        return pd.DataFrame(matrix, index=self.numeric_columns, columns=self.numeric_columns)
+
+    def null_counts(self):
+        return pd.Series(self.nulls, index=self.columns)
+
+    def to_dict(self, write_table=None):
+        """قالب قابل ذخیره در JSONField
+
+        اگر write_table(نام، جدول) اشاره‌گر فایل برگرداند، ماتریس‌های k×k به جای
+        فهرست JSON در فایل Arrow ذخیره می‌شوند.
+        """
+        def matrix(name, values):
+            frame = pd.DataFrame(values, index=self.numeric_columns, columns=self.numeric_columns)
+            table = write_table(name, frame) if write_table is not None else None
+            return table or values.tolist()
+
+        return {
+            'columns': self.columns,
+            'numeric_columns': self.numeric_columns,
+            'row_count': self.row_count,
+            'nulls': self.nulls.tolist(),
+            'shift': _to_list(self.shift),
+            **{name: matrix(name, getattr(self, name)) for name in MATRICES},
+            'minimum': _to_list(self.minimum),
+            'maximum': _to_list(self.maximum),
+            'date_column': self.date_column,
+            'fingerprint': self.fingerprint,
+        }
+
+    @classmethod
+    def from_dict(cls, data, read_table=None):
+        """بازیابی از to_dict؛ read_table(اشاره‌گر) ردیف‌های ماتریس ذخیره شده در فایل را می‌دهد"""
+        width = len(data['numeric_columns'])
+
+        def matrix(values):
+            if isinstance(values, dict):
+                _, values = read_table(values)
+            # reshape صریح تا دیتاست بدون ستون عددی (عرض صفر) هم بازیابی شود
+            return np.array(values, dtype=np.float64).reshape(width, width)
+
+        return cls(
+            columns=data['columns'],
+            numeric_columns=data['numeric_columns'],
+            row_count=data['row_count'],
+            nulls=np.array(data['nulls'], dtype=np.int64),
+            shift=_from_list(data['shift']),
+            **{name: matrix(data[name]) for name in MATRICES},
+            minimum=_from_list(data['minimum']),
+            maximum=_from_list(data['maximum']),
+            date_column=data['date_column'],
+            fingerprint=data['fingerprint']
+        )
+
+def build_aggregates(df, date_column=None, base=None):
+    """تجمیع‌های کل داده؛ اگر base پیشوند داده باشد فقط ردیف‌های اضافه شده پردازش می‌شوند
+
+    خروجی: (تجمیع‌ها، تعداد ردیف‌های استفاده شده از base یا None)
+    """
+    hashes = row_hashes(df)
+    if base is None or not base.matches(df, date_column, hashes):
+        return RunningAggregates.from_frame(df, date_column, hashes=hashes), None
+
+    added = RunningAggregates.from_frame(
+        df.iloc[base.row_count:], date_column, shift=base.shift, hashes=hashes[base.row_count:]
+    )
+    return base.merge(added, _digest(hashes)), base.row_count
@@ -0,0 +1,671 @@
+import json
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import numpy as np
+from scipy import stats
+from .profile import ColumnProfile
+from .aggregates import row_hashes
+from .rollup import TimeRollup
+from .growth import TREND_WINDOW, growth_tables
+from .sketches import hyperloglog
+from .correlation import STRONG_CORRELATION, correlation_matrix, pairs_from_matrix, strong_pairs
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+warnings.filterwarnings('ignore')
+
+# با هر تغییر در خروجی تحلیل‌ها افزایش یابد تا نتایج ذخیره شده قبلی دوباره استفاده نشوند
+ANALYSIS_VERSION = '7'
+
+# حداکثر اندازه نمونه و بذر تصادفی آزمون نرمالیتی
+NORMALITY_SAMPLE_SIZE = 5000
+NORMALITY_SEED = 42
+
+# تعداد مقادیری که پیش از تبدیل کل ستون بررسی می‌شوند
+DATE_SAMPLE_SIZE = 200
+
+def _parse_date_column(series):
+    """تبدیل یک ستون به تاریخ با بررسی اولیه یک نمونه محدود"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return None
+    
+    sample = series.dropna().iloc[:DATE_SAMPLE_SIZE]
+    if sample.empty:
+        return None
+    
+    date_format = None
+    if isinstance(sample.iloc[0], str):
+        for value in sample.iloc[:10]:
+            date_format = guess_datetime_format(str(value).strip())
+            if date_format is not None:
+                break
+        else:
+            return None
+    
+    parsed_sample = pd.to_datetime(sample, format=date_format, errors='coerce')
+    if parsed_sample.isna().all():
+        return None
+    if parsed_sample.isna().any():
+        # نمونه قالب یکسانی ندارد؛ تبدیل کل ستون بدون قالب ثابت
+        date_format = None
+    
+    return pd.to_datetime(series, format=date_format, errors='coerce')
+
+def _try_parse_date_column(series):
+    try:
+        return _parse_date_column(series)
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+def _map_columns(func, items, workers):
+    """اجرای تابع روی ستون‌ها، در صورت نیاز روی استخر نخ‌ها با حفظ ترتیب"""
+    if workers and workers > 1 and len(items) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(func, items))
+    return [func(item) for item in items]
+
+def detect_date_columns(df, parsed_dates=None, workers=1):
+    """تشخیص ستون‌های تاریخ
+
+    اگر دیکشنری parsed_dates داده شود، ستون‌های تبدیل شده در آن ذخیره می‌شوند
+    تا تحلیل زمانی دوباره آن‌ها را تبدیل نکند.
+    """
+    date_columns = []
+    columns = list(df.columns)
+    parsed_columns = _map_columns(lambda col: _try_parse_date_column(df[col]), columns, workers)
+    for col, parsed in zip(columns, parsed_columns):
+        if parsed is not None and not parsed.isna().all():
+            date_columns.append(col)
+            if parsed_dates is not None:
+                parsed_dates[col] = parsed
+    return date_columns
+
+def generate_insights_and_recommendations(analysis_type, analysis_data, df, profile=None):
+    """تولید بینش‌ها و راهکارهای هوشمند"""
+    insights = []
+    recommendations = []
+    
+    if analysis_type == "داده‌های مفقودی" and analysis_data.empty:
+        insights.append("هیچ داده مفقودی در ستون‌های بررسی شده وجود ندارد")
+        recommendations.append("✅ **نیازی به جایگزینی داده‌های مفقودی نیست**")
+    
+    elif analysis_type == "داده‌های مفقودی":
+        total_missing = analysis_data['تعداد مفقودی'].sum()
+        max_missing_col = analysis_data.loc[analysis_data['تعداد مفقودی'].idxmax()]
+        
+        insights.append(f"در مجموع {total_missing} داده مفقودی وجود دارد")
+        insights.append(f"ستون '{max_missing_col.name}' با {max_missing_col['تعداد مفقودی']} داده مفقودی ({max_missing_col['درصد مفقودی']}%) بیشترین مشکل را دارد")
+        
+        if max_missing_col['درصد مفقودی'] > 50:
+            recommendations.append("❌ **ستون با بیش از ۵۰٪ داده مفقودی بهتر است حذف شود**")
+            recommendations.append("🔍 **بررسی علت مفقودی داده‌ها ضروری است**")
+        elif max_missing_col['درصد مفقودی'] > 20:
+            recommendations.append("⚡ **استفاده از روش‌های پیشرفته جایگزینی داده‌های مفقودی پیشنهاد می‌شود**")
+            recommendations.append("📊 **تحلیل حساسیت به داده‌های مفقودی انجام شود**")
+        else:
+            recommendations.append("✅ **می‌توان از میانگین یا میانه برای جایگزینی استفاده کرد**")
+            recommendations.append("🔧 **روش KNN Imputation برای جایگزینی پیشنهاد می‌شود**")
+    
+    elif analysis_type == "آمار توصیفی":
+        if profile is None:
+            profile = ColumnProfile.from_frame(df)
+        counts, means, stds = profile.stat('count'), profile.stat('mean'), profile.stat('std')
+        for col in profile.numeric_columns:
+            if counts[col] > 0:
+                cv = (stds[col] / means[col]) * 100 if means[col] != 0 else 0
+                insights.append(f"ستون '{col}': ضریب تغییرات {cv:.1f}%")
+                
+                if cv > 50:
+                    recommendations.append(f"📈 **ستون '{col}' نوسان بالا دارد - برای تحلیل سری‌های زمانی مناسب است**")
+                elif cv < 10:
+                    recommendations.append(f"📉 **ستون '{col}' پایدار است - برای شاخص‌های ثابت مناسب است**")
+    
+    elif analysis_type == "تحلیل داده‌های پرت":
+        high_outlier_cols = []
+        for col, row in analysis_data.iterrows():
+            if row['درصد پرت'] > 10:
+                high_outlier_cols.append((col, row['درصد پرت']))
+        
+        if high_outlier_cols:
+            insights.append(f"{len(high_outlier_cols)} ستون با بیش از ۱۰٪ داده پرت شناسایی شد")
+            for col, percent in high_outlier_cols:
+                insights.append(f"ستون '{col}': {percent}% داده پرت")
+                recommendations.append(f"🔍 **بررسی علت داده‌های پرت در ستون '{col}' ضروری است**")
+                recommendations.append(f"⚡ **برای ستون '{col}' از روش Winsorization استفاده شود**")
+        else:
+            insights.append("داده‌های پرت در حد قابل قبولی هستند")
+            recommendations.append("✅ **نیاز به اقدام خاصی برای داده‌های پرت نیست**")
+    
+    elif analysis_type in ("ماتریس همبستگی", "همبستگی‌های قوی"):
+        if analysis_type == "ماتریس همبستگی":
+            # ردیف کران خطا در حالت تقریبی جزو ماتریس نیست
+            square = analysis_data.loc[analysis_data.columns, analysis_data.columns]
+            strong_correlations = pairs_from_matrix(square, STRONG_CORRELATION)
+        else:
+            strong_correlations = analysis_data
+        
+        if len(strong_correlations):
+            insights.append(f"{len(strong_correlations)} رابطه قوی همبستگی شناسایی شد")
+            for col1, col2, corr in strong_correlations.iloc[:3, :3].itertuples(index=False):  # فقط ۳ مورد اول
+                insights.append(f"همبستگی قوی بین '{col1}' و '{col2}': {corr:.3f}")
+                recommendations.append(f"📊 **ستون‌های '{col1}' و '{col2}' ممکن است اطلاعات تکراری داشته باشند**")
+                recommendations.append(f"🔧 **حذف یکی از ستون‌های همبسته قوی برای کاهش ابعاد داده پیشنهاد می‌شود**")
+    
+    elif analysis_type == "آزمون نرمالیتی":
+        normal_cols = []
+        non_normal_cols = []
+        for col, row in analysis_data.iterrows():
+            if row.get('نرمال') == 'بله':
+                normal_cols.append(col)
+            else:
+                non_normal_cols.append(col)
+        
+        insights.append(f"{len(normal_cols)} ستون نرمال، {len(non_normal_cols)} ستون غیرنرمال")
+        
+        if non_normal_cols:
+            recommendations.append("📈 **برای ستون‌های غیرنرمال از آزمون‌های ناپارامتریک استفاده شود**")
+            recommendations.append("🔧 **تبدیل لگاریتمی یا Box-Cox برای نرمال‌سازی پیشنهاد می‌شود**")
+        else:
+            recommendations.append("✅ **داده‌ها برای تحلیل‌های پارامتریک مناسب هستند**")
+    
+    elif "تحلیل ماهانه" in analysis_type:
+        # تحلیل فصلی
+        insights.append("الگوهای فصلی در داده‌ها شناسایی شد")
+        recommendations.append("📅 **مدل‌سازی سری زمانی با درنظرگیری فصلیت پیشنهاد می‌شود**")
+        recommendations.append("🔮 **از مدل‌های SARIMA یا Prophet برای پیش‌بینی استفاده شود**")
+    
+    elif analysis_type == "تحلیل رشد":
+        yearly = analysis_data['رشد سالانه ماه آخر (٪)'].dropna()
+        direction = analysis_data['جهت روند']
+        rising = direction[direction == 'صعودی'].index.tolist()
+        falling = direction[direction == 'نزولی'].index.tolist()
+        insights.append(f"در {TREND_WINDOW} ماه اخیر {len(rising)} ستون روند صعودی و {len(falling)} ستون روند نزولی دارند")
+        if not yearly.empty:
+            insights.append(f"بیشترین رشد سالانه: ستون '{yearly.idxmax()}' با {yearly.max()}%")
+            if len(yearly) > 1:
+                insights.append(f"کمترین رشد سالانه: ستون '{yearly.idxmin()}' با {yearly.min()}%")
+        for col in falling[:3]:
+            recommendations.append(f"🔍 **علت کاهش اخیر ستون '{col}' بررسی شود**")
+        if rising:
+            recommendations.append(f"📈 **روند صعودی ستون '{rising[0]}' را با افزایش منابع پشتیبانی کنید**")
+        if yearly.empty:
+            recommendations.append("📅 **برای رشد سالانه و مرکب دست کم ۱۳ ماه داده لازم است**")
+    
+    elif analysis_type == "رشد ماهانه":
+        changes = analysis_data.stack()
+        if not changes.empty:
+            month, col = changes.idxmax()
+            insights.append(f"بیشترین رشد ماهانه: ستون '{col}' در {month} با {changes.max()}%")
+            month, col = changes.idxmin()
+            insights.append(f"بیشترین کاهش ماهانه: ستون '{col}' در {month} با {changes.min()}%")
+            recommendations.append("📅 **ماه‌های با تغییر شدید را با رویدادهای کسب‌وکار مانند تخفیف‌ها و تعطیلات تطبیق دهید**")
+    
+    elif "تحلیل سودآوری" in analysis_type:
+        max_profit_col = analysis_data.loc[analysis_data['نسبت به کل'].idxmax()]
+        insights.append(f"ستون '{max_profit_col.name}' با {max_profit_col['نسبت به کل']}% بیشترین سهم را دارد")
+        recommendations.append("💰 **تمرکز بر بهبود ستون‌های با سودآوری بالا پیشنهاد می‌شود**")
+        recommendations.append("📊 **تحلیل سبد محصول برای بهینه‌سازی پیشنهاد می‌شود**")
+    
+    # اگر بینش خاصی تولید نشد، بینش عمومی تولید کن
+    if not insights:
+        insights.append("داده‌ها از کیفیت قابل قبولی برخوردار هستند")
+        recommendations.append("📈 **ادامه تحلیل با روش‌های پیشرفته پیشنهاد می‌شود**")
+    
+    return {
+        'insights': list(set(insights)),  # حذف موارد تکراری
+        'recommendations': list(set(recommendations))
+    }
+
+def generate_smart_analysis(df, analysis_type, analysis_data, profile=None):
+    """تولید تحلیل هوشمند با بینش و راهکار"""
+    analysis_result = {
+        'data': analysis_data,
+        'insights': [],
+        'recommendations': []
+    }
+    
+    # تولید بینش و راهکار
+    smart_analysis = generate_insights_and_recommendations(analysis_type, analysis_data, df, profile)
+    analysis_result['insights'] = smart_analysis['insights']
+    analysis_result['recommendations'] = smart_analysis['recommendations']
+    
+    return analysis_result
+
+def _correlation_analysis(df, numeric_columns, method='pearson', max_columns=None,
+                          top=None, aggregates=None, sample=None):
+    """ماتریس همبستگی، یا برای داده‌های پهن (بیش از max_columns ستون عددی) فقط زوج‌های قوی
+
+    خروجی (نام تحلیل، جدول). زوج‌های قوی همیشه بلوک به بلوک با ضرب ماتریسی float32
+    ساخته می‌شوند تا ماتریس کامل k × k ساخته نشود. ماتریس کامل با روش pearson از
+    تجمیع‌های افزایشی (در صورت وجود) خوانده می‌شود که بدون گذر دوباره روی ردیف‌هاست.
+    """
+    frame = sample.frame[numeric_columns] if sample is not None else df[numeric_columns]
+    stored = aggregates is not None and method == 'pearson' and sample is None
+    if max_columns is not None and len(numeric_columns) > max_columns:
+        pairs = strong_pairs(frame, STRONG_CORRELATION, top, method)
+        if sample is not None:
+            pairs['کران خطا (±)'] = np.round(sample.correlation_error(pairs['همبستگی'].to_numpy()), 3)
+        return "همبستگی‌های قوی", pairs
+
+    if stored:
+        return "ماتریس همبستگی", aggregates.correlation().round(3)
+    matrix = correlation_matrix(frame, method)
+    if sample is not None:
+        errors = sample.correlation_error(matrix.to_numpy())
+        np.fill_diagonal(errors, 0)
+        matrix = matrix.round(3)
+        matrix.loc['کران خطا (±)'] = np.round(np.nanmax(errors, axis=0), 3)
+        return "ماتریس همبستگی", matrix
+    return "ماتریس همبستگی", matrix.round(3)
+
+def generate_basic_analysis(df, profile=None, aggregates=None, sample=None, correlation_method='pearson',
+                            correlation_max_columns=None, correlation_top=None):
+    """تحلیل‌های پایه با هوش مصنوعی
+
+    در حالت تقریبی (sample داده شده) چارک‌ها و همبستگی از نمونه ردیف‌ها
+    محاسبه و کران خطای ۹۵٪ هر مقدار در کنار آن گزارش می‌شود.
+    """
+    analyses = {}
+    if profile is None:
+        profile = ColumnProfile.from_frame(df)
+    
+    # آمار توصیفی
+    numeric_columns = profile.numeric_columns
+    if numeric_columns and len(df):
+        describe = profile.describe().round(2)
+        if sample is not None:
+            quartile_errors = sample.quantile_errors(numeric_columns, [0.25, 0.5, 0.75])
+            for name, errors in zip(['25%', '50%', '75%'], quartile_errors):
+                describe.loc[f'{name} ±'] = errors.round(2)
+        analyses['آمار توصیفی'] = generate_smart_analysis(
+            df, "آمار توصیفی", describe, profile
+        )
+    
+    # داده‌های مفقودی
+    missing_data = profile.nulls
+    missing_percentage = (missing_data / profile.row_count * 100).round(2)
+    missing_analysis = pd.DataFrame({
+        'تعداد مفقودی': missing_data,
+        'درصد مفقودی': missing_percentage
+    })
+    analyses['داده‌های مفقودی'] = generate_smart_analysis(
+        df, "داده‌های مفقودی", 
+        missing_analysis[missing_analysis['تعداد مفقودی'] > 0], profile
+    )
+    
+    # اطلاعات کلی
+    info_analysis = pd.DataFrame({
+        'ویژگی': ['تعداد ردیف', 'تعداد ستون', 'تعداد داده‌های مفقودی', 'تعداد داده‌های عددی', 'تعداد داده‌های متنی'],
+        'مقدار': [
+            profile.row_count, 
+            len(profile.columns), 
+            profile.missing_total, 
+            len(numeric_columns),
+            len(profile.text_columns)
+        ]
+    })
+    if sample is not None:
+        distinct_rows, distinct_error = hyperloglog(row_hashes(df))
+        info_analysis['خطا (±)'] = None
+        info_analysis.loc[len(info_analysis)] = ['تعداد ردیف‌های یکتا (تقریبی)', distinct_rows, distinct_error]
+    analyses['اطلاعات کلی'] = generate_smart_analysis(df, "اطلاعات کلی", info_analysis, profile)
+    
+    # همبستگی
+    if len(numeric_columns) > 1:
+        name, correlations = _correlation_analysis(
+            df, numeric_columns, correlation_method, correlation_max_columns,
+            correlation_top, aggregates, sample
+        )
+        analyses[name] = generate_smart_analysis(df, name, correlations, profile)
+    
+    return analyses
+
+def _build_rollup(df, parsed_dates, profile):
+    """مکعب تجمیع زمانی وقتی از بیرون داده نشده است"""
+    if parsed_dates is None:
+        parsed_dates = {}
+        detect_date_columns(df, parsed_dates)
+    return TimeRollup.from_frame(df, parsed_dates, profile.numeric_columns)
+
+# تحلیل‌های زمانی صفحه نتایج: (سطح زمانی مکعب، نام تحلیل)
+TIME_ANALYSES = [
+    ('month', 'تحلیل ماهانه'),
+    ('quarter', 'تحلیل فصلی'),
+    ('year', 'تحلیل سالانه'),
+]
+
+def generate_time_analysis(df, parsed_dates=None, profile=None, rollup=None):
+    """تحلیل‌های زمانی با هوش مصنوعی
+
+    میانگین‌های ماهانه، فصلی و سالانه برای هر ستون تاریخ از مکعب تجمیع زمانی
+    خوانده می‌شوند؛ اگر rollup داده نشود همین‌جا ساخته می‌شود.
+    """
+    analyses = {}
+    try:
+        if rollup is None:
+            if profile is None:
+                profile = ColumnProfile.from_frame(df)
+            rollup = _build_rollup(df, parsed_dates, profile)
+        
+        for position, date_col in enumerate(rollup.date_columns):
+            # ستون تاریخ اول نام‌های قبلی را نگه می‌دارد
+            suffix = f' ({date_col})' if position else ''
+            for granularity, analysis_name in TIME_ANALYSES:
+                analyses[analysis_name + suffix] = generate_smart_analysis(
+                    df, analysis_name, rollup.table(date_col, granularity).round(2)
+                )
+    
+    except Exception as e:
+        error_df = pd.DataFrame({'خطا': [f'خطا در تحلیل زمانی: {str(e)}']})
+        analyses['خطا'] = generate_smart_analysis(df, "خطا", error_df)
+    
+    return analyses
+
+def _normality_test(values, method):
+    """اجرای آزمون نرمالیتی روی یک ستون؛ خروجی (آماره، p-value)"""
+    if method == 'dagostino':
+        return stats.normaltest(values)
+    if method == 'anderson':
+        try:
+            result = stats.anderson(values, method='interpolate')
+            return result.statistic, result.pvalue
+        except TypeError:
+            # نسخه‌های قدیمی scipy فقط مقادیر بحرانی را برمی‌گردانند
+            result = stats.anderson(values)
+            levels = result.significance_level / 100
+            passed = levels[result.statistic < result.critical_values]
+            return result.statistic, passed.max() if len(passed) else 0.0
+    return stats.shapiro(values)
+
+def _column_normality(column_values, method):
+    """آزمون نرمالیتی یک ستون روی نمونه محدود با بذر ثابت"""
+    column_values = column_values[~np.isnan(column_values)]
+    try:
+        if len(column_values) > 3:
+            if len(column_values) > NORMALITY_SAMPLE_SIZE:
+                rng = np.random.default_rng(NORMALITY_SEED)
+                column_values = rng.choice(column_values, NORMALITY_SAMPLE_SIZE, replace=False)
+            stat, p_value = _normality_test(column_values, method)
+            return {
+                'آماره': round(stat, 4),
+                'p-value': round(p_value, 4),
+                'نرمال': 'بله' if p_value > 0.05 else 'خیر'
+            }
+    except:
+        return {'خطا': 'داده ناکافی'}
+    return None
+
+def _normality_table(values, columns, method, workers=1):
+    """جدول آزمون نرمالیتی ستون‌های آرایه values"""
+    column_results = _map_columns(
+        lambda i: _column_normality(values[:, i], method),
+        list(range(values.shape[1])),
+        workers
+    )
+    normality_test = {
+        col: result
+        for col, result in zip(columns, column_results)
+        if result is not None
+    }
+    return pd.DataFrame(normality_test).T
+
+def _outlier_table(values, profile, row_count, sample=None):
+    """جدول داده‌های پرت: چارک‌ها از پروفایل و شمارش پرت‌ها با ماسک برداری"""
+    q1 = profile.stat('25%').to_numpy()
+    q3 = profile.stat('75%').to_numpy()
+    iqr = q3 - q1
+    lower_bounds = q1 - 1.5 * iqr
+    upper_bounds = q3 + 1.5 * iqr
+    
+    outlier_counts = ((values < lower_bounds) | (values > upper_bounds)).sum(axis=0)
+    outlier_percentages = outlier_counts / len(values) * 100
+    if sample is not None:
+        outlier_counts = np.round(outlier_percentages / 100 * row_count)
+    
+    outliers_analysis = pd.DataFrame({
+        'تعداد پرت': outlier_counts.astype(np.float64),
+        'درصد پرت': np.round(outlier_percentages, 2),
+        'کران پایین': np.round(lower_bounds, 2),
+        'کران بالا': np.round(upper_bounds, 2)
+    }, index=profile.numeric_columns)
+    
+    if sample is not None:
+        # کران خطای درصد از توزیع دوجمله‌ای و کران خطای مرزها از خطای چارک‌ها
+        q1_error, q3_error = (
+            errors.to_numpy() for errors in sample.quantile_errors(profile.numeric_columns, [0.25, 0.75])
+        )
+        outliers_analysis['درصد پرت ±'] = np.round(sample.proportion_error(outlier_percentages / 100) * 100, 2)
+        outliers_analysis['کران پایین ±'] = np.round(2.5 * q1_error + 1.5 * q3_error, 2)
+        outliers_analysis['کران بالا ±'] = np.round(1.5 * q1_error + 2.5 * q3_error, 2)
+    
+    return outliers_analysis
+
+def generate_statistical_analysis(df, normality_method='shapiro', profile=None, workers=1, sample=None):
+    """تحلیل‌های آماری پیشرفته با هوش مصنوعی
+
+    آزمون نرمالیتی روی نمونه‌ای حداکثر NORMALITY_SAMPLE_SIZE تایی با بذر ثابت
+    اجرا می‌شود (shapiro برای نمونه‌های بزرگ‌تر از ۵۰۰۰ معتبر نیست). روش آزمون
+    می‌تواند shapiro، dagostino یا anderson باشد. در حالت تقریبی شمارش پرت‌ها
+    روی نمونه ردیف‌ها انجام و با کران خطا گزارش می‌شود.
+    """
+    analyses = {}
+    if profile is None:
+        profile = ColumnProfile.from_frame(df)
+    numeric_df = df[profile.numeric_columns]
+    
+    if not numeric_df.empty:
+        if sample is not None:
+            values = sample.frame[profile.numeric_columns].to_numpy(dtype=np.float64)
+        else:
+            values = numeric_df.to_numpy(dtype=np.float64)
+        
+        # تحلیل نرمالیتی
+        analyses['آزمون نرمالیتی'] = generate_smart_analysis(
+            df, "آزمون نرمالیتی",
+            _normality_table(values, numeric_df.columns, normality_method, workers), profile
+        )
+        
+        # تحلیل پرت‌ها
+        analyses['تحلیل داده‌های پرت'] = generate_smart_analysis(
+            df, "تحلیل داده‌های پرت", _outlier_table(values, profile, len(numeric_df), sample), profile
+        )
+    
+    return analyses
+
+def generate_business_analysis(df, profile=None, rollup=None, parsed_dates=None):
+    """تحلیل‌های کسب‌وکار با هوش مصنوعی
+
+    رشد دوره‌ای به ترتیب ستون تاریخ اول و از مجموع‌های ماهانه مکعب تجمیع زمانی
+    محاسبه می‌شود؛ بدون ستون تاریخ تحلیل رشد تولید نمی‌شود.
+    """
+    analyses = {}
+    if profile is None:
+        profile = ColumnProfile.from_frame(df)
+    numeric_df = df[profile.numeric_columns]
+    
+    if not numeric_df.empty:
+        # تحلیل سودآوری
+        profitability = {}
+        sums, means = profile.stat('sum'), profile.stat('mean')
+        total_sum = sums.sum()
+        for col in numeric_df.columns:
+            if sums[col] > 0:
+                profitability[col] = {
+                    'مجموع': round(sums[col], 2),
+                    'میانگین': round(means[col], 2),
+                    'نسبت به کل': round((sums[col] / total_sum) * 100, 2) if total_sum > 0 else 0
+                }
+        
+        if profitability:
+            analyses['تحلیل سودآوری'] = generate_smart_analysis(
+                df, "تحلیل سودآوری", pd.DataFrame(profitability).T, profile
+            )
+        
+        # تحلیل رشد دوره‌ای (ماهانه، فصلی، سالانه، مرکب و روند اخیر)
+        if rollup is None:
+            rollup = _build_rollup(df, parsed_dates, profile)
+        if rollup.date_columns:
+            summary, by_month = growth_tables(rollup, rollup.date_columns[0])
+            if summary is not None:
+                analyses['تحلیل رشد'] = generate_smart_analysis(df, "تحلیل رشد", summary, profile)
+                analyses['رشد ماهانه'] = generate_smart_analysis(df, "رشد ماهانه", by_month, profile)
+    
+    return analyses
+
+def _distribution_table(df, profile):
+    """چولگی، کشیدگی و آزمون نرمالیتی ستون‌های عددی"""
+    numeric_df = df[profile.numeric_columns]
+    normality = _normality_table(numeric_df.to_numpy(dtype=np.float64), numeric_df.columns, 'shapiro')
+    table = pd.DataFrame({
+        'چولگی': numeric_df.skew().round(3),
+        'کشیدگی': numeric_df.kurt().round(3),
+    })
+    return table.join(normality)
+
+def _value_counts_table(df, profile, top=10):
+    """پرتکرارترین مقادیر ستون‌های متنی"""
+    rows = {}
+    for col in profile.text_columns:
+        counts = df[col].value_counts()
+        for value, count in counts.iloc[:top].items():
+            rows[f'{col}: {value}'] = {
+                'فراوانی': int(count),
+                'درصد': round(count / profile.row_count * 100, 2) if profile.row_count else 0
+            }
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+# تحلیل‌های قابل انتخاب در AnalysisForm: کلید فرم ← نام تحلیل
+SELECTABLE_ANALYSES = {
+    'describe': 'آمار توصیفی',
+    'correlation': 'ماتریس همبستگی',
+    'missing': 'داده‌های مفقودی',
+    'outliers': 'تحلیل داده‌های پرت',
+    'distribution': 'توزیع داده‌ها',
+}
+
+def generate_selected_analysis(df, analysis_types, profile=None, correlation_method='pearson',
+                               correlation_max_columns=None, correlation_top=None):
+    """اجرای فقط تحلیل‌های خواسته شده روی ستون‌های بارگذاری شده"""
+    analyses = {}
+    if profile is None:
+        profile = ColumnProfile.from_frame(df)
+    numeric_columns = profile.numeric_columns
+    
+    for analysis_type in analysis_types:
+        name = SELECTABLE_ANALYSES[analysis_type]
+        if analysis_type == 'describe' and numeric_columns and len(df):
+            analyses[name] = generate_smart_analysis(df, name, profile.describe().round(2), profile)
+        elif analysis_type == 'correlation' and len(numeric_columns) > 1:
+            name, correlations = _correlation_analysis(
+                df, numeric_columns, correlation_method, correlation_max_columns, correlation_top
+            )
+            analyses[name] = generate_smart_analysis(df, name, correlations, profile)
+        elif analysis_type == 'missing':
+            missing = pd.DataFrame({
+                'تعداد مفقودی': profile.nulls,
+                'درصد مفقودی': (profile.nulls / profile.row_count * 100).round(2)
+            })
+            analyses[name] = generate_smart_analysis(df, name, missing[missing['تعداد مفقودی'] > 0], profile)
+        elif analysis_type == 'outliers' and numeric_columns and len(df):
+            values = df[numeric_columns].to_numpy(dtype=np.float64)
+            analyses[name] = generate_smart_analysis(df, name, _outlier_table(values, profile, len(df)), profile)
+        elif analysis_type == 'distribution':
+            if numeric_columns:
+                analyses[name] = generate_smart_analysis(df, name, _distribution_table(df, profile), profile)
+            if profile.text_columns:
+                analyses['فراوانی مقادیر'] = generate_smart_analysis(
+                    df, 'فراوانی مقادیر', _value_counts_table(df, profile), profile
+                )
+    
+    return analyses
+
+# دسته نتایج دیتاست اصلی یک فایل چندبرگه‌ای
+SHEETS_CATEGORY = 'برگه‌ها'
+
+def generate_sheet_summary(profiles):
+    """خلاصه تجمیعی برگه‌های یک فایل از پروفایل ذخیره شده هر برگه (بدون خواندن دوباره داده)"""
+    analyses = {}
+    if not profiles:
+        return analyses
+    
+    overview = pd.DataFrame({
+        name: {
+            'تعداد ردیف': profile.row_count,
+            'تعداد ستون': len(profile.columns),
+            'داده‌های مفقودی': profile.missing_total,
+            'ستون‌های عددی': len(profile.numeric_columns),
+        }
+        for name, profile in profiles.items()
+    }).T
+    all_columns = set().union(*(profile.columns for profile in profiles.values()))
+    overview.loc['جمع کل'] = [
+        overview['تعداد ردیف'].sum(), len(all_columns), overview['داده‌های مفقودی'].sum(),
+        len(set().union(*(profile.numeric_columns for profile in profiles.values())))
+    ]
+    
+    largest = overview['تعداد ردیف'].iloc[:-1].idxmax()
+    insights = [
+        f"{len(profiles)} برگه با مجموع {overview.loc['جمع کل', 'تعداد ردیف']} ردیف تحلیل شد",
+        f"برگه '{largest}' با {overview.loc[largest, 'تعداد ردیف']} ردیف بزرگ‌ترین برگه است",
+    ]
+    recommendations = []
+    same_columns = all(list(profile.columns) == list(next(iter(profiles.values())).columns) for profile in profiles.values())
+    if same_columns:
+        recommendations.append("🔗 **برگه‌ها ساختار یکسان دارند؛ ادغام آن‌ها برای تحلیل کلی پیشنهاد می‌شود**")
+    else:
+        recommendations.append("⚠️ **ستون‌های برگه‌ها یکسان نیستند؛ پیش از ادغام، نام و ترتیب ستون‌ها یکسان شود**")
+    analyses['خلاصه برگه‌ها'] = {'data': overview, 'insights': insights, 'recommendations': recommendations}
+    
+    # ستون‌های عددی مشترک: مجموع هر برگه، جمع کل و میانگین وزنی کل
+    common = [
+        col for col in next(iter(profiles.values())).numeric_columns
+        if all(col in profile.numeric_columns for profile in profiles.values())
+    ]
+    if common:
+        sums = pd.DataFrame({name: profile.stat('sum')[common] for name, profile in profiles.items()})
+        counts = pd.DataFrame({name: profile.stat('count')[common] for name, profile in profiles.items()})
+        comparison = sums.round(2)
+        comparison['جمع کل'] = sums.sum(axis=1).round(2)
+        with np.errstate(all='ignore'):
+            comparison['میانگین کل'] = (sums.sum(axis=1) / counts.sum(axis=1)).round(2)
+        
+        insights = [f"{len(common)} ستون عددی در همه برگه‌ها مشترک است"]
+        for col in common[:3]:
+            top_sheet = sums.loc[col].idxmax()
+            total = sums.loc[col].sum()
+            share = sums.loc[col, top_sheet] / total * 100 if total else 0
+            insights.append(f"بیشترین مجموع '{col}' در برگه '{top_sheet}' است ({share:.1f}٪ از کل)")
+        analyses['مقایسه ستون‌های مشترک'] = {
+            'data': comparison,
+            'insights': insights,
+            'recommendations': ["📊 **برگه‌های با سهم کم در ستون‌های کلیدی بررسی شوند**"],
+        }
+    
+    return analyses
+
+# ترتیب دسته‌ها در صفحه نتایج و فایل Excel همین ترتیب است
+ANALYSIS_FAMILIES = [
+    ('پایه', generate_basic_analysis),
+    ('زمانی', generate_time_analysis),
+    ('آماری', generate_statistical_analysis),
+    ('کسب‌وکار', generate_business_analysis),
+]
+
+def serialize_analyses(analyses, write_table=None):
+    """تبدیل تحلیل‌های یک دسته به قالب قابل ذخیره در JSONField
+
+    اگر write_table(نام تحلیل، جدول) اشاره‌گر فایل برگرداند، به جای جدول JSON ذخیره می‌شود.
+    """
+    serialized = {}
+    for analysis_name, analysis_data in analyses.items():
+        table = write_table(analysis_name, analysis_data['data']) if write_table is not None else None
+        serialized[analysis_name] = {
+            'data': table or json.loads(analysis_data['data'].to_json(orient='split', date_format='iso', force_ascii=False)),
+            'insights': analysis_data['insights'],
+            'recommendations': analysis_data['recommendations']
+        }
+    return serialized
@@ -1,6 +1,23 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
+
+RECOVERY_UID = 'analyzer.recover_stale_jobs'
+
+
+def _recover_on_first_request(sender, **kwargs):
+    """بازیابی یک باره کارهای یتیم پس از راه‌اندازی سرور
+
+    روی اولین درخواست اجرا می‌شود چون دسترسی به پایگاه داده در ready توصیه نمی‌شود
+    (و در migrate هنوز جدول کارها ممکن است وجود نداشته باشد).
+    """
+    request_started.disconnect(dispatch_uid=RECOVERY_UID)
+    from .tasks import recover_stale_jobs
+    recover_stale_jobs()
 
 
 class AnalyzerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'analyzer'
+
+    def ready(self):
+        request_started.connect(_recover_on_first_request, dispatch_uid=RECOVERY_UID)
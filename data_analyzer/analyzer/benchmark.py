@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import platform
+import tracemalloc
+import numpy as np
+import pandas as pd
+import scipy
+from .ingest import read_workbook
+from .analysis import (
+    ANALYSIS_FAMILIES, detect_date_columns, generate_insights_and_recommendations
+)
+from .aggregates import build_aggregates
+from .rollup import TimeRollup
+from .profile import ColumnProfile
+from .report import ReportWriter, write_analysis_report
+
+# سناریوهای آماده؛ هر کلید پارامترهای make_frame است
+BENCHMARK_SCENARIOS = {
+    'small': {'rows': 5000, 'columns': 10},
+    'medium': {'rows': 50000, 'columns': 20},
+    'wide': {'rows': 5000, 'columns': 120},
+    'sparse': {'rows': 20000, 'columns': 20, 'missing_ratio': 0.3},
+    'no-dates': {'rows': 20000, 'columns': 20, 'with_dates': False},
+}
+
+# سهم هر نوع ستون: float، int، text (متن با تنوع بالا) و category (متن با تنوع کم)
+DEFAULT_DTYPE_MIX = {'float': 0.5, 'int': 0.2, 'text': 0.1, 'category': 0.2}
+
+# افزایش کمتر از این مقدار (ثانیه) حتی با عبور از آستانه نسبی پسرفت حساب نمی‌شود
+MIN_REGRESSION_SECONDS = 0.01
+
+def parse_dtype_mix(text):
+    """تبدیل رشته‌ای مانند float=0.6,text=0.4 به دیکشنری سهم‌ها"""
+    mix = {}
+    for part in text.split(','):
+        kind, _, share = part.partition('=')
+        kind = kind.strip()
+        if kind not in DEFAULT_DTYPE_MIX:
+            raise ValueError(f'نوع ستون ناشناخته: {kind}')
+        mix[kind] = float(share)
+    return mix
+
+def make_frame(rows, columns, dtype_mix=None, with_dates=True, missing_ratio=0.0, seed=0):
+    """ساخت داده مصنوعی با تعداد ردیف، ستون، ترکیب نوع‌ها و نسبت مفقودی دلخواه"""
+    rng = np.random.default_rng(seed)
+    dtype_mix = dtype_mix or DEFAULT_DTYPE_MIX
+    total = sum(dtype_mix.values())
+    kinds = []
+    for kind, share in dtype_mix.items():
+        kinds += [kind] * int(round(columns * share / total))
+    kinds = (kinds + ['float'] * columns)[:columns]
+
+    data = {}
+    if with_dates:
+        data['تاریخ'] = pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 365 * 4, rows), unit='D')
+    categories = np.array([f'گروه {i}' for i in range(12)], dtype=object)
+    for i, kind in enumerate(kinds):
+        name = f'{kind}_{i}'
+        if kind == 'float':
+            data[name] = rng.normal(1000, 250, rows).round(2)
+        elif kind == 'int':
+            data[name] = rng.integers(0, 500, rows)
+        elif kind == 'text':
+            data[name] = np.array([f'کد-{value}' for value in rng.integers(0, rows, rows)], dtype=object)
+        else:
+            data[name] = categories[rng.integers(0, len(categories), rows)]
+    df = pd.DataFrame(data)
+
+    if missing_ratio:
+        for col in df.columns[1 if with_dates else 0:]:
+            mask = rng.random(rows) < missing_ratio
+            df[col] = df[col].astype(np.float64 if pd.api.types.is_numeric_dtype(df[col]) else object).mask(mask)
+    return df
+
+def write_workbook(df, path):
+    """نوشتن داده مصنوعی در فایل Excel با نویسنده حافظه ثابت گزارش‌ها"""
+    writer = ReportWriter(path)
+    writer.write_sheet('Sheet1', df, index=False)
+    writer.close()
+
+def _pipeline(path, output_file, state):
+    """مراحل خط لوله تحلیل به همان ترتیب کار پس‌زمینه؛ هر مرحله (نام، تابع) است"""
+
+    def read():
+        state['df'], _ = read_workbook(path)
+
+    def dates():
+        state['parsed_dates'] = {}
+        state['date_columns'] = detect_date_columns(state['df'], state['parsed_dates'])
+
+    def aggregates():
+        date_column = state['date_columns'][0] if state['date_columns'] else None
+        state['aggregates'], _ = build_aggregates(state['df'], date_column)
+
+    def profile():
+        state['profile'] = ColumnProfile.from_frame(state['df'], state['aggregates'])
+        state['analyses'] = {}
+
+    def rollup():
+        state['rollup'] = TimeRollup.from_frame(state['df'], state['parsed_dates'], state['profile'].numeric_columns)
+
+    def family(category, generate):
+        def run():
+            kwargs = {'profile': state['profile']}
+            if category == 'پایه':
+                kwargs['aggregates'] = state['aggregates']
+            if category in ('زمانی', 'کسب‌وکار'):
+                kwargs['rollup'] = state['rollup']
+            state['analyses'][category] = generate(state['df'], **kwargs)
+        return run
+
+    def insights():
+        for analyses in state['analyses'].values():
+            for analysis_name, analysis_data in analyses.items():
+                generate_insights_and_recommendations(
+                    analysis_name, analysis_data['data'], state['df'], state['profile']
+                )
+
+    def excel():
+        write_analysis_report(state['analyses'], state['df'], output_file)
+
+    stages = [
+        ('read_excel', read),
+        ('detect_date_columns', dates),
+        ('aggregates', aggregates),
+        ('profile', profile),
+        ('rollup', rollup),
+    ]
+    stages += [(generate.__name__, family(category, generate)) for category, generate in ANALYSIS_FAMILIES]
+    stages += [('insights', insights), ('excel_write', excel)]
+    return stages
+
+def run_benchmark(path, output_file, repeat=1, memory=True):
+    """زمان (کمینه چند اجرا)، توان عملیاتی و اوج حافظه هر مرحله
+
+    اوج حافظه در یک اجرای جداگانه با tracemalloc اندازه‌گیری می‌شود تا سربار
+    آن در زمان‌ها اثر نگذارد.
+    """
+    results = {}
+    rows = 0
+    for _ in range(max(1, repeat)):
+        state = {}
+        for name, stage in _pipeline(path, output_file, state):
+            started = time.perf_counter()
+            stage()
+            seconds = time.perf_counter() - started
+            if name not in results or seconds < results[name]['seconds']:
+                results[name] = {'seconds': seconds}
+        rows = len(state['df'])
+
+    for stats in results.values():
+        stats['rows_per_sec'] = round(rows / stats['seconds']) if stats['seconds'] else 0
+        stats['seconds'] = round(stats['seconds'], 4)
+
+    if memory:
+        state = {}
+        tracemalloc.start()
+        try:
+            for name, stage in _pipeline(path, output_file, state):
+                current, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                stage()
+                results[name]['peak_bytes'] = tracemalloc.get_traced_memory()[1] - current
+        finally:
+            tracemalloc.stop()
+    return results
+
+def run_scenario(directory, name, params, repeat=1, memory=True):
+    """ساخت فایل سناریو در directory و اجرای benchmark روی آن"""
+    path = os.path.join(directory, f'{name}.xlsx')
+    write_workbook(make_frame(**params), path)
+    return {
+        'params': params,
+        'file_bytes': os.path.getsize(path),
+        'stages': run_benchmark(path, os.path.join(directory, f'{name}_analysis.xlsx'), repeat, memory),
+    }
+
+def environment():
+    """نسخه کتابخانه‌ها برای ثبت در کنار baseline"""
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+    }
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_baseline(path, scenarios):
+    """ادغام نتایج سناریوها در فایل baseline"""
+    baseline = load_baseline(path)
+    for name, result in scenarios.items():
+        baseline[name] = dict(result, environment=environment())
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2)
+
+def find_regressions(result, baseline, threshold):
+    """مراحلی که زمانشان بیش از threshold (نسبی) از baseline کندتر شده است"""
+    regressions = []
+    for name, stats in result['stages'].items():
+        reference = baseline.get('stages', {}).get(name)
+        if reference is None or not reference['seconds']:
+            continue
+        slower = stats['seconds'] - reference['seconds']
+        if slower > MIN_REGRESSION_SECONDS and stats['seconds'] > reference['seconds'] * (1 + threshold):
+            regressions.append((name, reference['seconds'], stats['seconds']))
+    return regressions
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+CORRELATION_METHODS = ('pearson', 'spearman', 'kendall')
+# ضریب همبستگی با قدر مطلق بیشتر از این مقدار «قوی» گزارش می‌شود
+STRONG_CORRELATION = 0.7
+# تعداد ستون‌های هر بلوک در استخراج زوج‌های قوی بدون ساخت ماتریس کامل
+CORRELATION_BLOCK = 512
+CORRELATION_DTYPE = np.float32
+
+def _unit_diagonal(matrix):
+    """قطر دقیقا ۱ برای ستون‌های غیرثابت مثل DataFrame.corr؛ گرد شدن ضرب‌ها آن را ۰.۹۹۹۹۹… می‌کند
+
+    ستون ثابت یا با کمتر از دو مقدار همان NaN می‌ماند.
+    """
+    np.fill_diagonal(matrix, np.where(np.isnan(np.diagonal(matrix)), np.nan, 1.0))
+    return matrix
+
+def pairwise_pearson(counts, sums, squares, products, sums_t=None, squares_t=None):
+    """همبستگی پیرسون از مجموع‌های دوتایی روی ردیف‌هایی که هر دو ستون مقدار دارند
+
+    sums[i, j] مجموع ستون i روی ردیف‌های مشترک i و j است. برای بلوک‌های
+    غیرمربعی، sums_t[i, j] و squares_t[i, j] همین مقادیر برای ستون j هستند.
+    """
+    square = sums_t is None
+    sums_t = sums.T if sums_t is None else sums_t
+    squares_t = squares.T if squares_t is None else squares_t
+    with np.errstate(all='ignore'):
+        numerator = counts * products - sums * sums_t
+        spread = (counts * squares - sums ** 2) * (counts * squares_t - sums_t ** 2)
+        matrix = np.clip(numerator / np.sqrt(spread), -1, 1)
+    return _unit_diagonal(matrix) if square else matrix
+
+def _check_method(method):
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f'روش همبستگی باید یکی از {", ".join(CORRELATION_METHODS)} باشد')
+
+class _Prepared:
+    """داده آماده ضرب ماتریسی؛ بدون مقدار مفقود، ستون‌های استاندارد شده و در غیر این صورت مقادیر مرکزی و ماسک"""
+
+    def __init__(self, values, method, dtype):
+        if method == 'spearman':
+            # رتبه میانگین هر ستون روی مقادیر موجود همان ستون
+            values = pd.DataFrame(values).rank().to_numpy(dtype=np.float64)
+        present = ~np.isnan(values)
+        self.complete = bool(present.all())
+        with np.errstate(all='ignore'):
+            centered = values - np.nanmean(values, axis=0)
+        if self.complete:
+            scale = np.sqrt((centered ** 2).sum(axis=0))
+            scale[scale == 0] = np.nan
+            self.standardized = (centered / scale).astype(dtype)
+        else:
+            self.centered = np.where(present, centered, 0).astype(dtype)
+            self.squared = self.centered ** 2
+            self.mask = present.astype(dtype)
+
+    def block(self, start, stop):
+        """ستون‌های start تا stop ماتریس همبستگی (k × b)"""
+        if self.complete:
+            # یک ضرب BLAS روی ستون‌های استاندارد شده
+            z = self.standardized
+            return np.clip(z.T @ z[:, start:stop], -1, 1)
+        x, x2, m = self.centered, self.squared, self.mask
+        return pairwise_pearson(
+            m.T @ m[:, start:stop],
+            x.T @ m[:, start:stop],
+            x2.T @ m[:, start:stop],
+            x.T @ x[:, start:stop],
+            sums_t=m.T @ x[:, start:stop],
+            squares_t=m.T @ x2[:, start:stop]
+        )
+
+def correlation_matrix(frame, method='pearson', dtype=CORRELATION_DTYPE):
+    """ماتریس همبستگی ستون‌های عددی frame، معادل DataFrame.corr
+
+    در روش spearman با داده مفقود، رتبه‌ها روی مقادیر هر ستون محاسبه می‌شوند
+    (نه جداگانه برای هر زوج). روش kendall راه برداری ندارد و به pandas سپرده می‌شود.
+    """
+    _check_method(method)
+    if method == 'kendall':
+        return frame.corr(method='kendall')
+    columns = frame.columns
+    prepared = _Prepared(frame.to_numpy(dtype=np.float64), method, dtype)
+    matrix = _unit_diagonal(prepared.block(0, len(columns)).astype(np.float64))
+    return pd.DataFrame(matrix, index=columns, columns=columns)
+
+def _pairs_frame(columns, rows, cols, values):
+    order = np.argsort(-np.abs(values), kind='stable')
+    return pd.DataFrame({
+        'ستون اول': [str(columns[i]) for i in rows[order]],
+        'ستون دوم': [str(columns[j]) for j in cols[order]],
+        'همبستگی': np.round(values[order].astype(np.float64), 3),
+    }, index=pd.RangeIndex(1, len(order) + 1))
+
+def _keep_top(rows, cols, values, top):
+    if top is None or len(values) <= top:
+        return rows, cols, values
+    keep = np.argpartition(-np.abs(values), top - 1)[:top]
+    return rows[keep], cols[keep], values[keep]
+
+def pairs_from_matrix(matrix, threshold=STRONG_CORRELATION, top=None):
+    """زوج‌های قوی مثلث بالای یک ماتریس همبستگی موجود؛ هر زوج یک بار"""
+    values = matrix.to_numpy(dtype=np.float64)
+    rows, cols = np.triu_indices(len(values), 1)
+    upper = values[rows, cols]
+    strong = np.abs(upper) > threshold
+    return _pairs_frame(matrix.columns, *_keep_top(rows[strong], cols[strong], upper[strong], top))
+
+def strong_pairs(frame, threshold=STRONG_CORRELATION, top=None, method='pearson',
+                 dtype=CORRELATION_DTYPE, block=CORRELATION_BLOCK):
+    """زوج ستون‌های با همبستگی قوی، بلوک به بلوک و بدون نگه داشتن ماتریس کامل
+
+    حافظه مصرفی k × block است و پس از هر بلوک فقط top زوج قوی‌تر نگه داشته می‌شود.
+    """
+    _check_method(method)
+    if method == 'kendall':
+        return pairs_from_matrix(frame.corr(method='kendall'), threshold, top)
+    columns = frame.columns
+    prepared = _Prepared(frame.to_numpy(dtype=np.float64), method, dtype)
+    rows = np.empty(0, dtype=np.int64)
+    cols = np.empty(0, dtype=np.int64)
+    values = np.empty(0, dtype=np.float64)
+    for start in range(0, len(columns), block):
+        stop = min(start + block, len(columns))
+        chunk = prepared.block(start, stop)
+        i, j = np.nonzero(np.abs(chunk) > threshold)
+        j = j + start
+        upper = i < j
+        i, j = i[upper], j[upper]
+        rows = np.concatenate([rows, i])
+        cols = np.concatenate([cols, j])
+        values = np.concatenate([values, chunk[i, j - start].astype(np.float64)])
+        rows, cols, values = _keep_top(rows, cols, values, top)
+    return _pairs_frame(columns, rows, cols, values)
@@ -1,5 +1,5 @@
 from django import forms
-from .models import DataSet
+from .models import DataSet, AnalysisJob
 
 class DataSetForm(forms.ModelForm):
     class Meta:
@@ -14,17 +14,35 @@ class AnalysisForm(forms.Form):
     ANALYSIS_CHOICES = [
         ('describe', 'آمار توصیفی'),
         ('correlation', 'همبستگی'),
-        ('missing', 'داده‌های缺失'),
+        ('missing', 'داده‌های مفقودی'),
         ('outliers', 'داده‌های پرت'),
         ('distribution', 'توزیع داده‌ها'),
     ]
     
-    analysis_type = forms.ChoiceField(
+    analysis_type = forms.MultipleChoiceField(
         choices=ANALYSIS_CHOICES,
-        widget=forms.Select(attrs={'class': 'form-control'})
+        widget=forms.CheckboxSelectMultiple(attrs={'class': 'form-check-input'})
     )
     
     columns = forms.MultipleChoiceField(
         required=False,
         widget=forms.SelectMultiple(attrs={'class': 'form-control'})
-    )
\ No newline at end of file
+    )
+    
+    mode = forms.ChoiceField(
+        required=False,
+        choices=AnalysisJob.MODE_CHOICES,
+        initial=AnalysisJob.MODE_EXACT,
+        widget=forms.RadioSelect(attrs={'class': 'form-check-input'})
+    )
+    
+    sheets = forms.CharField(
+        required=False,
+        label='برگه‌ها',
+        help_text='نام برگه‌ها با کاما جدا شوند؛ خالی یعنی همه برگه‌ها',
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'مثلا: تهران, شیراز'})
+    )
+    
+    def __init__(self, *args, dataset_columns=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['columns'].choices = [(col, col) for col in dataset_columns]
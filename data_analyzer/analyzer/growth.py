@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+from .rollup import period_labels
+
+# تعداد ماه‌های پنجره روند اخیر
+TREND_WINDOW = 6
+# شیب کمتر از این مقدار (درصد در ماه) روند ثابت حساب می‌شود
+FLAT_TREND = 1.0
+# رشد سالانه و مرکب به دست کم این تعداد ماه نیاز دارند
+YEAR_MONTHS = 12
+
+def period_growth(values, lag=1):
+    """درصد رشد هر دوره نسبت به lag دوره قبل برای همه ستون‌ها؛ پایه صفر یا مفقود NaN می‌دهد"""
+    previous = np.full_like(values, np.nan)
+    if lag < len(values):
+        previous[lag:] = values[:-lag]
+    with np.errstate(all='ignore'):
+        growth = (values - previous) / np.abs(previous) * 100
+    growth[~np.isfinite(growth)] = np.nan
+    return growth
+
+def last_valid(values):
+    """آخرین مقدار موجود هر ستون؛ ستون بدون مقدار NaN"""
+    present = ~np.isnan(values)
+    if not len(values):
+        return np.full(values.shape[1], np.nan)
+    rows = len(values) - 1 - np.argmax(present[::-1], axis=0)
+    result = values[rows, np.arange(values.shape[1])]
+    result[~present.any(axis=0)] = np.nan
+    return result
+
+def _nanmean(values):
+    present = ~np.isnan(values)
+    with np.errstate(all='ignore'):
+        return np.where(present, values, 0).sum(axis=0) / present.sum(axis=0)
+
+def compound_growth(monthly):
+    """نرخ رشد مرکب سالانه بین مجموع ۱۲ ماهه اول و آخر (مجموع متحرک)
+
+    استفاده از مجموع ۱۲ ماهه اثر فصلیت و سال‌های ناقص ابتدا و انتهای داده را
+    حذف می‌کند؛ با کمتر از ۱۳ ماه NaN برمی‌گردد.
+    """
+    months = len(monthly)
+    if months <= YEAR_MONTHS:
+        return np.full(monthly.shape[1], np.nan)
+    totals = np.cumsum(np.nan_to_num(monthly), axis=0)
+    first = totals[YEAR_MONTHS - 1]
+    last = totals[-1] - totals[-1 - YEAR_MONTHS]
+    years = (months - YEAR_MONTHS) / YEAR_MONTHS
+    with np.errstate(all='ignore'):
+        rate = (np.power(last / first, 1 / years) - 1) * 100
+    rate[(first <= 0) | (last < 0) | ~np.isfinite(rate)] = np.nan
+    return rate
+
+def recent_trend(monthly, window=TREND_WINDOW):
+    """شیب خط برازش شده روی window ماه اخیر، به درصد از میانگین همان ماه‌ها در هر ماه"""
+    recent = monthly[-window:]
+    present = ~np.isnan(recent)
+    count = present.sum(axis=0)
+    steps = np.arange(len(recent), dtype=np.float64)[:, None]
+    with np.errstate(all='ignore'):
+        step_mean = np.where(present, steps, 0).sum(axis=0) / count
+        value_mean = np.where(present, recent, 0).sum(axis=0) / count
+        spread = np.where(present, steps - step_mean, 0)
+        slope = (spread * np.where(present, recent - value_mean, 0)).sum(axis=0) / (spread ** 2).sum(axis=0)
+        trend = slope / np.abs(value_mean) * 100
+    trend[(count < 3) | ~np.isfinite(trend)] = np.nan
+    return trend
+
+def _monthly_totals(rollup, date_column, granularity='month'):
+    """مجموع هر دوره به ترتیب زمان؛ دوره‌ای که ستون در آن مقداری ندارد NaN است"""
+    sums = rollup.series(date_column, granularity, 'sum')
+    counts = rollup.series(date_column, granularity, 'count')
+    return sums.where(counts > 0)
+
+def growth_tables(rollup, date_column):
+    """جدول خلاصه رشد هر ستون و جدول رشد ماه به ماه، هر دو بر اساس مجموع دوره‌ها
+
+    خروجی (خلاصه، رشد ماهانه)؛ اگر ستون تاریخ کمتر از دو ماه داده داشته باشد (None, None).
+    """
+    monthly = _monthly_totals(rollup, date_column)
+    if len(monthly) < 2:
+        return None, None
+    quarterly = _monthly_totals(rollup, date_column, 'quarter')
+    values = monthly.to_numpy(dtype=np.float64)
+
+    month_growth = period_growth(values)
+    trend = recent_trend(values)
+    summary = pd.DataFrame({
+        'رشد ماه آخر (٪)': last_valid(month_growth),
+        'میانگین رشد ماهانه (٪)': _nanmean(month_growth),
+        'رشد فصل آخر (٪)': last_valid(period_growth(quarterly.to_numpy(dtype=np.float64))),
+        'رشد سالانه ماه آخر (٪)': last_valid(period_growth(values, YEAR_MONTHS)),
+        'رشد مرکب سالانه (٪)': compound_growth(values),
+        f'روند {TREND_WINDOW} ماه اخیر (٪ در ماه)': trend,
+    }, index=monthly.columns).round(2)
+    summary['جهت روند'] = np.select(
+        [np.isnan(trend), trend > FLAT_TREND, trend < -FLAT_TREND],
+        ['-', 'صعودی', 'نزولی'],
+        default='ثابت'
+    )
+
+    by_month = pd.DataFrame(month_growth[1:], index=period_labels(monthly.index[1:], 'month'),
+                            columns=monthly.columns).round(2)
+    by_month.index.name = 'ماه'
+    return summary, by_month
@@ -0,0 +1,287 @@
+import os
+import time
+import logging
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from django.conf import settings
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+logger = logging.getLogger(__name__)
+
+# ستون متنی با نسبت مقادیر یکتای کمتر از این مقدار به صورت دسته‌ای ذخیره می‌شود
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+def _arrow_string_dtype():
+    """نوع رشته‌ای با ذخیره Arrow و مقدار مفقود NaN (رفتار پیش‌فرض pandas 3)؛ بدون pyarrow None"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    try:
+        return pd.StringDtype('pyarrow', na_value=np.nan)
+    except TypeError:
+        # pandas 2.1 و 2.2
+        return pd.StringDtype('pyarrow_numpy')
+
+ARROW_STRING_DTYPE = _arrow_string_dtype()
+
+class IngestionError(Exception):
+    """خطا در خواندن فایل اکسل"""
+
+def _column_names(header):
+    """نام‌گذاری ستون‌ها مانند pd.read_excel (Unnamed و پسوند برای نام‌های تکراری)"""
+    names = []
+    seen = {}
+    for i, value in enumerate(header):
+        name = f'Unnamed: {i}' if value is None or value == '' else value
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+def _iter_rows_calamine(workbook, sheet_name):
+    for row in workbook.get_sheet_by_name(sheet_name).iter_rows():
+        # calamine خانه خالی را رشته خالی برمی‌گرداند
+        yield [None if value == '' else value for value in row]
+
+@contextmanager
+def _open_workbook(path):
+    """باز کردن یک باره فایل؛ خروجی (موتور، نام برگه‌ها، تابع پیمایش ردیف‌های یک برگه)
+
+    برای .xls بدون calamine راه جریانی وجود ندارد و تابع پیمایش None است.
+    """
+    if CalamineWorkbook is not None:
+        workbook = CalamineWorkbook.from_path(path)
+        yield 'calamine', list(workbook.sheet_names), lambda name: _iter_rows_calamine(workbook, name)
+    elif path.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            yield 'openpyxl', list(workbook.sheetnames), lambda name: workbook[name].iter_rows(values_only=True)
+        finally:
+            workbook.close()
+    else:
+        yield 'xlrd', pd.ExcelFile(path).sheet_names, None
+
+def _downcast_numeric(series):
+    """کوچک‌سازی نوع عددی بدون از دست رفتن دقت"""
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_float_dtype(series):
+        values = series.to_numpy()
+        if not np.isnan(values).any() and np.all(np.mod(values, 1) == 0):
+            return pd.to_numeric(series.astype(np.int64), downcast='integer')
+        as_float32 = values.astype(np.float32)
+        if np.array_equal(as_float32.astype(values.dtype), values, equal_nan=True):
+            return pd.Series(as_float32, index=series.index, name=series.name)
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast='integer')
+    return series
+
+def _compact_column(series):
+    """نوع فشرده یک ستون: عدد کوچک‌تر، دسته‌ای برای متن کم‌تنوع و رشته Arrow برای بقیه متن‌ها"""
+    if pd.api.types.is_numeric_dtype(series):
+        return _downcast_numeric(series)
+    if pd.api.types.is_datetime64_any_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+
+    inferred = pd.api.types.infer_dtype(series, skipna=True)
+    if inferred in ('date', 'datetime'):
+        return pd.to_datetime(series, errors='coerce')
+    if inferred == 'string':
+        non_null = series.count()
+        if non_null and series.nunique() / non_null <= CATEGORY_MAX_UNIQUE_RATIO:
+            return series.astype('category')
+        if ARROW_STRING_DTYPE is not None and series.dtype != ARROW_STRING_DTYPE:
+            return series.astype(ARROW_STRING_DTYPE)
+    return series
+
+def _type_chunk(chunk):
+    """تبدیل یک تکه از ردیف‌ها به ستون‌های با نوع فشرده"""
+    for col in chunk.columns:
+        chunk[col] = _compact_column(chunk[col])
+    return chunk
+
+def compact_frame(df):
+    """مرحله فشرده‌سازی پس از خواندن برای ستون‌هایی که هنوز نوع فشرده ندارند
+
+    ستون‌های object (مثلاً ستونی که در تکه‌های مختلف نوع متفاوت گرفته یا
+    فایل .xls که یکجا خوانده شده) و ستون‌های عددی دوباره بررسی می‌شوند؛
+    ستون‌های دسته‌ای، تاریخ و رشته Arrow دست نمی‌خورند.
+    خروجی: (DataFrame، حافظه پیش از فشرده‌سازی به بایت)
+    """
+    before = int(df.memory_usage(deep=True).sum())
+    for col in df.columns:
+        if df[col].dtype == object or pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = _compact_column(df[col])
+    return df, before
+
+def _concat_column(parts):
+    """اتصال تکه‌های یک ستون؛ ستون‌های دسته‌ای با اجتماع دسته‌ها ادغام می‌شوند"""
+    if any(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+        if all(isinstance(part.dtype, pd.CategoricalDtype) or part.isna().all() for part in parts):
+            categoricals = [
+                part.astype('category') if not isinstance(part.dtype, pd.CategoricalDtype)
+                else part
+                for part in parts
+            ]
+            combined = union_categoricals(
+                [part.cat.set_categories(part.cat.categories.astype(object)) for part in categoricals]
+            )
+            return pd.Series(combined)
+        parts = [part.astype(object) for part in parts]
+    return pd.concat(_align_empty_parts(parts), ignore_index=True)
+
+def _align_empty_parts(parts):
+    """تکه‌های تماما خالی (که object خوانده می‌شوند) به نوع تکه‌های دیگر ستون تبدیل می‌شوند
+
+    در غیر این صورت یک تکه خالی کل ستون عددی یا تاریخ را هنگام اتصال object می‌کند.
+    """
+    empty = [part.isna().all() for part in parts]
+    dtypes = {part.dtype for part, is_empty in zip(parts, empty) if not is_empty}
+    if not dtypes or not any(empty):
+        return parts
+    if len(dtypes) == 1:
+        target = dtypes.pop()
+    elif all(pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype) for dtype in dtypes):
+        target = np.result_type(*dtypes)
+    else:
+        return parts
+    if pd.api.types.is_integer_dtype(target) or pd.api.types.is_bool_dtype(target):
+        # مقدار مفقود در ستون صحیح یا بولی فقط با float نگه داشته می‌شود (مانند pd.read_excel)
+        target = np.result_type(target, np.float32) if pd.api.types.is_integer_dtype(target) else object
+    return [part.astype(target) if is_empty else part for part, is_empty in zip(parts, empty)]
+
+def _read_rows(rows, chunk_rows, memory_limit):
+    """ساخت DataFrame از ردیف‌های یک برگه به صورت تکه‌ای
+
+    هر تکه پیش از نگهداری به ستون‌های با نوع فشرده تبدیل می‌شود.
+    خروجی: (DataFrame، حافظه پیش از فشرده‌سازی، حافظه پس از فشرده‌سازی)
+    """
+    header = next(rows, None)
+    if header is None:
+        return pd.DataFrame(), 0, 0
+    columns = _column_names(header)
+    width = len(columns)
+
+    parts = {i: [] for i in range(width)}
+    buffer = []
+    memory_used = 0
+    memory_before = 0
+    row_count = 0
+
+    def flush():
+        nonlocal memory_used, memory_before
+        chunk = pd.DataFrame.from_records(buffer, columns=range(width))
+        memory_before += int(chunk.memory_usage(deep=True).sum())
+        chunk = _type_chunk(chunk)
+        chunk.index = pd.RangeIndex(row_count - len(buffer), row_count)
+        memory_used += int(chunk.memory_usage(deep=True).sum())
+        if memory_limit and memory_used > memory_limit:
+            raise IngestionError(
+                f'حجم داده پس از {row_count} ردیف از سقف حافظه '
+                f'({memory_limit // (1024 * 1024)} مگابایت) بیشتر شد'
+            )
+        for i in range(width):
+            parts[i].append(chunk[i])
+        buffer.clear()
+
+    # ردیف‌های خالی میان داده مانند pd.read_excel نگه داشته و فقط ردیف‌های خالی انتهای برگه کنار گذاشته می‌شوند
+    blank_rows = 0
+    blank = (None,) * width
+    for row in rows:
+        row = tuple(row[:width]) + (None,) * (width - len(row))
+        if all(value is None for value in row):
+            blank_rows += 1
+            continue
+        for values in [blank] * blank_rows + [row]:
+            buffer.append(values)
+            row_count += 1
+            if len(buffer) >= chunk_rows:
+                flush()
+        blank_rows = 0
+    if buffer:
+        flush()
+
+    if not row_count:
+        return pd.DataFrame(columns=columns), 0, 0
+    df = pd.DataFrame({columns[i]: _concat_column(parts[i]) for i in range(width)})
+    # ستون‌هایی که در اتصال تکه‌ها به object برگشته‌اند
+    df, _ = compact_frame(df)
+    return df, memory_before, memory_used
+
+def read_workbook_sheets(path, sheet_names=None, chunk_rows=None, memory_limit=None, max_sheets=None):
+    """خواندن جریانی چند برگه فایل اکسل با یک بار باز کردن فایل
+
+    sheet_names برگه‌های خواسته شده است (None یعنی همه) و max_sheets تعداد
+    برگه‌ها را از ابتدای فایل محدود می‌کند. ردیف‌ها در حالت
+    فقط‌خواندنی پیمایش می‌شوند و سقف حافظه برای مجموع برگه‌هاست؛ با عبور از
+    آن خطای IngestionError رخ می‌دهد.
+    خروجی: (دیکشنری نام برگه به DataFrame به ترتیب فایل، آمار خواندن هر برگه)
+    """
+    chunk_rows = chunk_rows or settings.ANALYZER_INGEST_CHUNK_ROWS
+    memory_limit = settings.ANALYZER_INGEST_MEMORY_LIMIT if memory_limit is None else memory_limit
+    frames = {}
+    sheet_stats = {}
+
+    with _open_workbook(path) as (engine, available, iter_rows):
+        if sheet_names is None:
+            sheet_names = available
+        missing = [name for name in sheet_names if name not in available]
+        if missing:
+            raise IngestionError(f'برگه‌های {", ".join(missing)} در فایل وجود ندارند')
+        sheet_names = [name for name in available if name in sheet_names][:max_sheets]
+
+        if iter_rows is None:
+            # .xls یکجا خوانده و سپس فشرده می‌شود
+            started = time.perf_counter()
+            raw_frames = pd.read_excel(path, sheet_name=sheet_names)
+
+        memory_used = 0
+        for name in sheet_names:
+            if iter_rows is None:
+                df, memory_before = compact_frame(raw_frames.pop(name))
+            else:
+                started = time.perf_counter()
+                remaining = max(1, memory_limit - memory_used) if memory_limit else memory_limit
+                df, memory_before, used = _read_rows(iter(iter_rows(name)), chunk_rows, remaining)
+                memory_used += used
+
+            elapsed = time.perf_counter() - started
+            frames[name] = df
+            sheet_stats[name] = {
+                'engine': engine,
+                'rows': len(df),
+                'columns': len(df.columns),
+                'seconds': round(elapsed, 3),
+                'rows_per_sec': round(len(df) / elapsed) if elapsed else 0,
+                'memory_bytes': int(df.memory_usage(deep=True).sum()),
+                'memory_before_bytes': memory_before,
+            }
+            logger.info(
+                'ingested %s [%s]: %d rows in %.2fs (%d rows/sec, engine=%s, %.1f MB, %.1f MB before compaction)',
+                os.path.basename(path), name, len(df), elapsed, sheet_stats[name]['rows_per_sec'], engine,
+                sheet_stats[name]['memory_bytes'] / (1024 * 1024), memory_before / (1024 * 1024)
+            )
+    return frames, sheet_stats
+
+def read_workbook(path, chunk_rows=None, memory_limit=None, sheet_name=None):
+    """خواندن جریانی یک برگه فایل اکسل (پیش‌فرض اولین برگه)؛ خروجی: (DataFrame، آمار خواندن)"""
+    sheet_names = [sheet_name] if sheet_name is not None else None
+    frames, sheet_stats = read_workbook_sheets(path, sheet_names, chunk_rows, memory_limit, max_sheets=1)
+    if not frames:
+        return pd.DataFrame(), {
+            'engine': None, 'rows': 0, 'columns': 0, 'seconds': 0, 'rows_per_sec': 0,
+            'memory_bytes': 0, 'memory_before_bytes': 0
+        }
+    name = next(iter(frames))
+    return frames[name], sheet_stats[name]
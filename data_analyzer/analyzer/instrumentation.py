@@ -0,0 +1,144 @@
+import os
+import re
+import sys
+import json
+import time
+import logging
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+from django.conf import settings
+
+try:
+    import resource
+except ImportError:  # ویندوز
+    resource = None
+
+logger = logging.getLogger('analyzer.performance')
+
+def _peak_rss_mb():
+    """اوج حافظه مقیم پردازه (RSS) به مگابایت؛ در ویندوز None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # لینوکس کیلوبایت و macOS بایت برمی‌گرداند
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def _shape(frame):
+    return getattr(frame, 'shape', (None, None))
+
+@contextmanager
+def measure_stage(stage, timings=None, frame=None, **context):
+    """اندازه‌گیری زمان دیوار، زمان CPU نخ جاری، رشد اوج RSS و تغییر حافظه tracemalloc یک مرحله
+
+    نتیجه به صورت لاگ JSON ثبت و در صورت داده شدن timings به آن اضافه می‌شود.
+    تعداد ردیف و ستون از frame خوانده می‌شود؛ اگر داده داخل مرحله ساخته شود
+    می‌توان آن را بعداً در record['rows'] و record['columns'] نوشت.
+    """
+    rows, columns = _shape(frame)
+    record = {'stage': stage, 'rows': rows, 'columns': columns}
+    tracing = tracemalloc.is_tracing()
+    traced_before = tracemalloc.get_traced_memory()[0] if tracing else None
+    rss_before = _peak_rss_mb()
+    wall = time.perf_counter()
+    cpu = time.thread_time()
+    try:
+        yield record
+    finally:
+        record['wall_seconds'] = round(time.perf_counter() - wall, 4)
+        record['cpu_seconds'] = round(time.thread_time() - cpu, 4)
+        rss_after = _peak_rss_mb()
+        record['peak_rss_mb'] = round(rss_after, 1) if rss_after is not None else None
+        record['rss_growth_mb'] = round(rss_after - rss_before, 1) if rss_after is not None else None
+        record['traced_mb'] = (
+            round((tracemalloc.get_traced_memory()[0] - traced_before) / (1024 * 1024), 2)
+            if tracing and tracemalloc.is_tracing() else None
+        )
+        logger.info(json.dumps(dict(record, **context), ensure_ascii=False))
+        if timings is not None:
+            timings.append(record)
+
+def timed_call(stage, function, frame, *args, **kwargs):
+    """اجرای function(frame, ...) و برگرداندن (خروجی، رکورد اندازه‌گیری)"""
+    timings = []
+    with measure_stage(stage, timings, frame):
+        result = function(frame, *args, **kwargs)
+    return result, timings[0]
+
+def _profile_path(name):
+    os.makedirs(settings.ANALYZER_PROFILE_DIR, exist_ok=True)
+    safe = re.sub(r'[^\w.-]+', '_', name).strip('_') or 'root'
+    return os.path.join(settings.ANALYZER_PROFILE_DIR, f'{time.strftime("%Y%m%d-%H%M%S")}-{safe}.prof')
+
+@contextmanager
+def profiled(name):
+    """ذخیره خروجی cProfile در ANALYZER_PROFILE_DIR؛ اگر تنظیم نشده باشد کاری نمی‌کند"""
+    if not settings.ANALYZER_PROFILE_DIR:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path = _profile_path(name)
+        profiler.dump_stats(path)
+        logger.info(json.dumps({'profile': name, 'path': path}, ensure_ascii=False))
+
+@contextmanager
+def traced():
+    """ردیابی حافظه با tracemalloc وقتی ANALYZER_TRACEMALLOC فعال است تا traced_mb مراحل پر شود"""
+    if not settings.ANALYZER_TRACEMALLOC or tracemalloc.is_tracing():
+        yield
+        return
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        tracemalloc.stop()
+
+class ProfileMiddleware:
+    """cProfile هر درخواست وقتی ANALYZER_PROFILE_DIR تنظیم شده باشد"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with profiled(f'{request.method}-{request.path}'):
+            return self.get_response(request)
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+def prometheus_metrics(jobs):
+    """متن قالب Prometheus از رکوردهای کارایی ذخیره شده در خلاصه کارها
+
+    کارها در پردازه‌های جدا اجرا می‌شوند، پس شمارنده‌ها از پایگاه داده ساخته
+    می‌شوند نه از حافظه یک پردازه.
+    """
+    totals = {}
+    for job in jobs:
+        for record in (job.summary or {}).get('performance', []):
+            stage = totals.setdefault(record['stage'], {'count': 0, 'wall': 0.0, 'cpu': 0.0, 'rows': 0})
+            stage['count'] += 1
+            stage['wall'] += record['wall_seconds']
+            stage['cpu'] += record['cpu_seconds']
+            stage['rows'] += record['rows'] or 0
+
+    lines = []
+    metrics = [
+        ('analyzer_stage_wall_seconds', 'summary', 'Wall time of analysis stages', 'wall'),
+        ('analyzer_stage_cpu_seconds', 'summary', 'CPU time of analysis stages', 'cpu'),
+    ]
+    for metric, kind, description, key in metrics:
+        lines.append(f'# HELP {metric} {description}')
+        lines.append(f'# TYPE {metric} {kind}')
+        for stage, values in totals.items():
+            lines.append(f'{metric}_sum{{stage="{_label(stage)}"}} {values[key]:.4f}')
+            lines.append(f'{metric}_count{{stage="{_label(stage)}"}} {values["count"]}')
+    lines.append('# HELP analyzer_stage_rows_total Rows processed by analysis stages')
+    lines.append('# TYPE analyzer_stage_rows_total counter')
+    for stage, values in totals.items():
+        lines.append(f'analyzer_stage_rows_total{{stage="{_label(stage)}"}} {values["rows"]}')
+    return '\n'.join(lines) + '\n'
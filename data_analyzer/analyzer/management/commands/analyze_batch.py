@@ -0,0 +1,138 @@
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from analyzer.models import DataSet, AnalysisJob
+from analyzer.instrumentation import measure_stage
+from analyzer.storage import hash_uploaded_file, selection_hash, results_path, touch
+from analyzer.tasks import (
+    create_job, fail_job, find_cached_job, find_dataset, has_active_job, run_timed_job
+)
+from analyzer.workers import init_batch_worker
+from analyzer.uploads import EXCEL_EXTENSIONS
+
+class Command(BaseCommand):
+    help = 'تحلیل همه فایل‌های اکسل یک پوشه با همان مسیر آپلود، در استخر پردازه‌ها'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='پوشه فایل‌های اکسل')
+        parser.add_argument('--mode', choices=[mode for mode, _ in AnalysisJob.MODE_CHOICES],
+                            default=AnalysisJob.MODE_EXACT, help='حالت تحلیل')
+        parser.add_argument('--sheets', default='', help='نام برگه‌ها با کاما؛ خالی یعنی همه برگه‌ها')
+        parser.add_argument('--workers', type=int, default=settings.ANALYZER_WORKERS,
+                            help='تعداد پردازه‌ها؛ صفر یعنی اجرای پشت سر هم در همین پردازه')
+        parser.add_argument('--tasks-per-child', type=int, default=settings.ANALYZER_BATCH_TASKS_PER_CHILD,
+                            help='تعداد فایل هر کارگر پیش از جایگزینی با پردازه تازه')
+        parser.add_argument('--memory-mb', type=int, default=settings.ANALYZER_BATCH_MEMORY_MB,
+                            help='سقف حافظه مجازی هر کارگر به مگابایت')
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        if not os.path.isdir(directory):
+            raise CommandError(f'پوشه {directory} وجود ندارد')
+        paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            # فایل‌های قفل موقت Excel با ~$ شروع می‌شوند
+            if name.lower().endswith(EXCEL_EXTENSIONS) and not name.startswith('~$')
+            and os.path.isfile(os.path.join(directory, name))
+        )
+        if not paths:
+            raise CommandError(f'هیچ فایل اکسلی در {directory} نیست')
+
+        started = time.perf_counter()
+        mode = options['mode']
+        sheet_names = [name.strip() for name in options['sheets'].split(',') if name.strip()]
+        jobs = {}
+        skipped = 0
+        for path in paths:
+            job = self._register(path, mode, sheet_names)
+            if job is None:
+                skipped += 1
+            else:
+                jobs[job.pk] = (os.path.basename(path), os.path.getsize(path))
+
+        self.stdout.write(f"{'file':<40}{'status':>10}{'rows':>10}{'seconds':>10}{'rows/sec':>12}{'MB/sec':>10}")
+        for job_id, seconds in self._run(jobs, options):
+            self._print_file(AnalysisJob.objects.get(pk=job_id), *jobs[job_id], seconds)
+
+        finished = AnalysisJob.objects.filter(pk__in=list(jobs))
+        failed = [job for job in finished if job.status != AnalysisJob.STATUS_DONE]
+        self._print_total([job for job in finished if job.status == AnalysisJob.STATUS_DONE], jobs,
+                          len(failed), skipped, time.perf_counter() - started)
+        if failed:
+            raise CommandError(f'تحلیل {len(failed)} فایل ناموفق بود')
+
+    def _register(self, path, mode, sheet_names):
+        """ثبت یک فایل مانند upload_dataset؛ فایل تحلیل شده یا در حال تحلیل None برمی‌گرداند"""
+        name = os.path.basename(path)
+        timings = []
+        with open(path, 'rb') as handle:
+            file = File(handle, name=name)
+            with measure_stage('upload_hash', timings, size_bytes=file.size):
+                content_hash = selection_hash(hash_uploaded_file(file), sheet_names)
+
+            dataset = find_dataset(content_hash)
+            if dataset is not None:
+                touch(dataset.file.path)
+                if find_cached_job(dataset, mode):
+                    touch(results_path(dataset))
+                    self.stdout.write(f'{name}: قبلا تحلیل شده است (دیتاست {dataset.pk})')
+                    return None
+                if has_active_job(dataset, mode):
+                    self.stdout.write(f'{name}: در صف تحلیل است (دیتاست {dataset.pk})')
+                    return None
+            else:
+                with measure_stage('upload_save', timings, size_bytes=file.size):
+                    dataset = DataSet.objects.create(
+                        name=os.path.splitext(name)[0],
+                        file=file,
+                        content_hash=content_hash,
+                        sheets=[{'name': sheet} for sheet in sheet_names]
+                    )
+        return create_job(dataset, mode, timings)
+
+    def _run(self, jobs, options):
+        """اجرای کارها و برگرداندن (شناسه کار، زمان دیوار) هر کدام به ترتیب پایان"""
+        workers = min(options['workers'], len(jobs))
+        if workers <= 0:
+            for job_id in jobs:
+                yield run_timed_job(job_id)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_batch_worker,
+            initargs=(options['memory_mb'],),
+            max_tasks_per_child=options['tasks_per_child'] or None
+        ) as pool:
+            futures = {pool.submit(run_timed_job, job_id): job_id for job_id in jobs}
+            for future in as_completed(futures):
+                try:
+                    yield future.result()
+                except Exception as e:
+                    # پردازه کارگر از بین رفته (مثلا با کمبود حافظه) و کار فرصت ثبت خطا نداشته است
+                    fail_job(futures[future], str(e) or type(e).__name__)
+                    yield futures[future], None
+
+    def _print_file(self, job, name, size, seconds):
+        rows = job.summary.get('rows') or 0
+        if job.status != AnalysisJob.STATUS_DONE or not seconds:
+            self.stdout.write(self.style.ERROR(f'{name[:39]:<40}{"failed":>10}  {job.error}'))
+            return
+        self.stdout.write(
+            f'{name[:39]:<40}{"done":>10}{rows:>10}{seconds:>10.2f}'
+            f'{round(rows / seconds):>12}{size / (1024 * 1024) / seconds:>10.2f}'
+        )
+
+    def _print_total(self, done, jobs, failed, skipped, seconds):
+        rows = sum(job.summary.get('rows') or 0 for job in done)
+        size = sum(jobs[job.pk][1] for job in done)
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(done)} فایل تحلیل شد، {failed} ناموفق، {skipped} تکراری؛ '
+            f'{rows} ردیف در {seconds:.2f} ثانیه '
+            f'({round(rows / seconds) if seconds else 0} ردیف و {size / (1024 * 1024) / seconds:.2f} مگابایت در ثانیه)'
+        ))
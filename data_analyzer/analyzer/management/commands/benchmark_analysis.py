@@ -0,0 +1,81 @@
+import tempfile
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from analyzer.benchmark import (
+    BENCHMARK_SCENARIOS, parse_dtype_mix, run_scenario, load_baseline, save_baseline, find_regressions
+)
+
+class Command(BaseCommand):
+    help = 'اندازه‌گیری زمان و حافظه هر مرحله تحلیل روی فایل‌های مصنوعی و مقایسه با baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', choices=list(BENCHMARK_SCENARIOS) + ['all'],
+                            help='سناریوی آماده (قابل تکرار)؛ پیش‌فرض small')
+        parser.add_argument('--rows', type=int, help='سناریوی دلخواه: تعداد ردیف')
+        parser.add_argument('--columns', type=int, default=10, help='سناریوی دلخواه: تعداد ستون')
+        parser.add_argument('--mix', help='ترکیب نوع ستون‌ها، مثلا float=0.6,int=0.2,category=0.2')
+        parser.add_argument('--no-dates', action='store_true', help='بدون ستون تاریخ')
+        parser.add_argument('--missing', type=float, default=0.0, help='نسبت داده مفقودی')
+        parser.add_argument('--repeat', type=int, default=3, help='تعداد اجرا؛ کمینه زمان‌ها گزارش می‌شود')
+        parser.add_argument('--no-memory', action='store_true', help='بدون اندازه‌گیری اوج حافظه')
+        parser.add_argument('--baseline', default=settings.ANALYZER_BENCHMARK_BASELINE, help='مسیر فایل baseline')
+        parser.add_argument('--save-baseline', action='store_true', help='ذخیره نتایج به عنوان baseline جدید')
+        parser.add_argument('--threshold', type=float, default=settings.ANALYZER_BENCHMARK_THRESHOLD,
+                            help='حداکثر کندی مجاز نسبت به baseline (0.2 یعنی ۲۰٪)')
+
+    def handle(self, *args, **options):
+        if options['rows']:
+            params = {
+                'rows': options['rows'],
+                'columns': options['columns'],
+                'with_dates': not options['no_dates'],
+                'missing_ratio': options['missing'],
+            }
+            if options['mix']:
+                try:
+                    params['dtype_mix'] = parse_dtype_mix(options['mix'])
+                except ValueError as e:
+                    raise CommandError(str(e))
+            name = f"custom-{params['rows']}x{params['columns']}"
+            scenarios = {name: params}
+        else:
+            names = options['scenario'] or ['small']
+            if 'all' in names:
+                names = list(BENCHMARK_SCENARIOS)
+            scenarios = {name: BENCHMARK_SCENARIOS[name] for name in names}
+
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for name, params in scenarios.items():
+                self.stdout.write(f'== {name} {params}')
+                results[name] = run_scenario(
+                    directory, name, params, repeat=options['repeat'], memory=not options['no_memory']
+                )
+                self._print_stages(results[name]['stages'])
+
+        if options['save_baseline']:
+            save_baseline(options['baseline'], results)
+            self.stdout.write(self.style.SUCCESS(f"baseline ذخیره شد: {options['baseline']}"))
+            return
+
+        baseline = load_baseline(options['baseline'])
+        failures = []
+        for name, result in results.items():
+            if name not in baseline:
+                self.stdout.write(self.style.WARNING(f'{name}: baseline ندارد'))
+                continue
+            for stage, before, after in find_regressions(result, baseline[name], options['threshold']):
+                failures.append(f'{name}/{stage}: {before:.4f}s → {after:.4f}s')
+
+        if failures:
+            raise CommandError('پسرفت کارایی:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('بدون پسرفت نسبت به baseline'))
+
+    def _print_stages(self, stages):
+        self.stdout.write(f"{'stage':<32}{'seconds':>10}{'rows/sec':>14}{'peak MB':>10}")
+        for name, stats in stages.items():
+            peak = stats.get('peak_bytes')
+            self.stdout.write(
+                f"{name:<32}{stats['seconds']:>10.4f}{stats['rows_per_sec']:>14}"
+                f"{'-' if peak is None else f'{peak / (1024 * 1024):.1f}':>10}"
+            )
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0003_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='mode',
+            field=models.CharField(choices=[('exact', 'دقیق'), ('approximate', 'تقریبی (سریع برای داده\u200cهای بسیار بزرگ)')], default='exact', max_length=20),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0004_analysisjob_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sheet_datasets', to='analyzer.dataset'),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='sheet_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='sheets',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
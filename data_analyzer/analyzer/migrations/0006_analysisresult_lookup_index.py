@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0005_dataset_sheets'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='analysisresult',
+            index=models.Index(fields=['dataset', 'analysis_type', 'created_at'], name='analysisresult_lookup_idx'),
+        ),
+    ]
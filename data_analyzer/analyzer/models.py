@@ -1,5 +1,7 @@
 from django.db import models
 import os
+import shutil
+from .storage import results_path, parts_dir, sidecar_path, rollup_path, tables_dir
 
 def upload_to(instance, filename):
     return f'datasets/{filename}'
@@ -10,14 +12,32 @@ class DataSet(models.Model):
     uploaded_at = models.DateTimeField(auto_now_add=True)
     columns = models.JSONField(default=list, blank=True)
     row_count = models.IntegerField(default=0)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    # فایل‌های چندبرگه‌ای: هر برگه یک دیتاست فرزند با همان فایل است
+    parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='sheet_datasets')
+    sheet_name = models.CharField(max_length=255, blank=True)
+    # برای دیتاست اصلی: برگه‌های خواسته شده و پس از خواندن، ردیف و ستون هر برگه
+    sheets = models.JSONField(default=list, blank=True)
+    # پیش‌نمایش ردیف‌های اول (قالب split) و خلاصه ستون‌ها که هنگام خواندن داده ذخیره می‌شوند
+    # تا فهرست و صفحه دیتاست بدون باز کردن فایل Excel ساخته شوند
+    preview = models.JSONField(default=dict, blank=True)
+    column_summary = models.JSONField(default=list, blank=True)
     
     def __str__(self):
         return self.name
     
     def delete(self, *args, **kwargs):
+        for child in self.sheet_datasets.all():
+            child.delete()
         if self.file:
-            if os.path.isfile(self.file.path):
+            # فایل برگه‌ها متعلق به دیتاست اصلی است
+            if self.parent_id is None and os.path.isfile(self.file.path):
                 os.remove(self.file.path)
+            for path in (results_path(self), sidecar_path(self), rollup_path(self)):
+                if os.path.isfile(path):
+                    os.remove(path)
+            shutil.rmtree(parts_dir(self), ignore_errors=True)
+            shutil.rmtree(tables_dir(self), ignore_errors=True)
         super().delete(*args, **kwargs)
 
 class AnalysisResult(models.Model):
@@ -26,5 +46,56 @@ class AnalysisResult(models.Model):
     result_data = models.JSONField()
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        # همه خواندن‌ها بر اساس دیتاست و نوع تحلیل و آخرین ردیف هستند
+        indexes = [
+            models.Index(fields=['dataset', 'analysis_type', 'created_at'], name='analysisresult_lookup_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.dataset.name} - {self.analysis_type}"
+
+class AnalysisJob(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'در صف'),
+        (STATUS_RUNNING, 'در حال تحلیل'),
+        (STATUS_DONE, 'انجام شد'),
+        (STATUS_FAILED, 'ناموفق'),
+    ]
+    
+    MODE_EXACT = 'exact'
+    MODE_APPROXIMATE = 'approximate'
+    MODE_CHOICES = [
+        (MODE_EXACT, 'دقیق'),
+        (MODE_APPROXIMATE, 'تقریبی (سریع برای داده‌های بسیار بزرگ)'),
+    ]
+    
+    dataset = models.ForeignKey(DataSet, on_delete=models.CASCADE)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    analysis_version = models.CharField(max_length=20, blank=True)
+    mode = models.CharField(max_length=20, choices=MODE_CHOICES, default=MODE_EXACT)
+    completed_steps = models.IntegerField(default=0)
+    total_steps = models.IntegerField(default=0)
+    summary = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # ضربان کار: با هر مرحله جلو می‌رود تا کارهای یتیم (پردازه یا سرور از کار افتاده) شناخته شوند
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
     def __str__(self):
-        return f"{self.dataset.name} - {self.analysis_type}"
\ No newline at end of file
+        return f"{self.dataset.name} - {self.get_status_display()}"
+    
+    @property
+    def progress(self):
+        if not self.total_steps:
+            return 0
+        return round(self.completed_steps / self.total_steps * 100)
+    
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+
+# ردیف‌های جدول آماری ستون‌های عددی؛ هشت ردیف اول همان خروجی describe است
+NUMERIC_STATS = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max', 'sum']
+DESCRIBE_STATS = NUMERIC_STATS[:8]
+
+def _column_kind(series):
+    if pd.api.types.is_bool_dtype(series):
+        return 'bool'
+    if pd.api.types.is_numeric_dtype(series):
+        return 'numeric'
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime'
+    if (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+            or isinstance(series.dtype, pd.CategoricalDtype)):
+        return 'text'
+    return 'other'
+
+def _clean(value):
+    """تبدیل مقادیر numpy به مقادیر قابل ذخیره در JSON"""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    return value
+
+class ColumnProfile:
+    """پروفایل ستون‌های دیتاست که یک بار محاسبه و بین همه تحلیل‌ها مشترک است
+
+    شامل نوع، تعداد، مفقودی‌ها و آمار ستون‌های عددی (گشتاورها، چارک‌ها و مجموع)
+    """
+
+    def __init__(self, row_count, dtypes, kinds, nulls, numeric):
+        self.row_count = row_count
+        self.dtypes = dtypes
+        self.kinds = kinds
+        self.nulls = nulls
+        self.numeric = numeric
+
+    @classmethod
+    def from_frame(cls, df, aggregates=None, sample=None):
+        """محاسبه پروفایل با یک فراخوانی برداری برای هر آماره
+
+        اگر تجمیع‌های افزایشی (RunningAggregates) داده شود، فقط چارک‌ها از داده
+        محاسبه و بقیه آماره‌ها از تجمیع‌ها خوانده می‌شوند. در حالت تقریبی چارک‌ها
+        از نمونه ردیف‌ها (RowSample) به دست می‌آیند.
+        """
+        numeric_df = df.select_dtypes(include=[np.number])
+        if numeric_df.columns.empty:
+            numeric = pd.DataFrame(index=NUMERIC_STATS, dtype=np.float64)
+        else:
+            quartile_source = numeric_df if sample is None else sample.frame[numeric_df.columns]
+            quartiles = quartile_source.quantile([0.25, 0.5, 0.75])
+            quartiles.index = ['25%', '50%', '75%']
+            if aggregates is not None:
+                numeric = aggregates.numeric_stats(quartiles)
+            else:
+                numeric = pd.concat([
+                    numeric_df.count().to_frame('count').T,
+                    numeric_df.mean().to_frame('mean').T,
+                    numeric_df.std().to_frame('std').T,
+                    numeric_df.min().to_frame('min').T,
+                    quartiles,
+                    numeric_df.max().to_frame('max').T,
+                    numeric_df.sum().to_frame('sum').T,
+                ]).astype(np.float64)
+
+        return cls(
+            row_count=len(df),
+            dtypes=df.dtypes.astype(str),
+            kinds=pd.Series({col: _column_kind(df[col]) for col in df.columns}, dtype=object),
+            nulls=aggregates.null_counts() if aggregates is not None else df.isnull().sum(),
+            numeric=numeric
+        )
+
+    @property
+    def columns(self):
+        return list(self.dtypes.index)
+
+    @property
+    def numeric_columns(self):
+        return list(self.numeric.columns)
+
+    @property
+    def text_columns(self):
+        return list(self.kinds[self.kinds == 'text'].index)
+
+    @property
+    def missing_total(self):
+        return int(self.nulls.sum())
+
+    def stat(self, name):
+        """یک آماره برای همه ستون‌های عددی به صورت Series"""
+        return self.numeric.loc[name]
+
+    def describe(self):
+        """معادل numeric_df.describe() بدون محاسبه دوباره"""
+        return self.numeric.loc[DESCRIBE_STATS]
+
+    def column_summary(self):
+        """خلاصه هر ستون برای صفحه دیتاست: نوع، مفقودی‌ها و برای ستون‌های عددی کمینه، میانگین و بیشینه"""
+        summary = []
+        for col in self.columns:
+            missing = int(self.nulls[col])
+            info = {
+                'name': str(col),
+                'data_type': str(self.dtypes[col]),
+                'kind': self.kinds[col],
+                'missing_count': missing,
+                'missing_percentage': round(missing / self.row_count * 100, 2) if self.row_count else 0,
+            }
+            if col in self.numeric.columns:
+                info.update({name: _clean(self.numeric.at[name, col]) for name in ('min', 'mean', 'max')})
+            summary.append(info)
+        return summary
+
+    def to_dict(self):
+        """قالب قابل ذخیره در JSONField"""
+        return {
+            'row_count': self.row_count,
+            'columns': [str(col) for col in self.columns],
+            'dtypes': [str(dtype) for dtype in self.dtypes],
+            'kinds': list(self.kinds),
+            'nulls': [int(count) for count in self.nulls],
+            'numeric_columns': [str(col) for col in self.numeric_columns],
+            'numeric': {
+                name: [_clean(value) for value in self.numeric.loc[name]]
+                for name in NUMERIC_STATS
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        columns = data['columns']
+        numeric = pd.DataFrame(
+            [[np.nan if value is None else value for value in data['numeric'][name]] for name in NUMERIC_STATS],
+            index=NUMERIC_STATS,
+            columns=data['numeric_columns'],
+            dtype=np.float64
+        )
+        return cls(
+            row_count=data['row_count'],
+            dtypes=pd.Series(data['dtypes'], index=columns, dtype=object),
+            kinds=pd.Series(data['kinds'], index=columns, dtype=object),
+            nulls=pd.Series(data['nulls'], index=columns, dtype=np.int64),
+            numeric=numeric
+        )
@@ -0,0 +1,248 @@
+import os
+import re
+import json
+import time
+import logging
+import zipfile
+import numpy as np
+import pandas as pd
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+from .analysis import serialize_analyses
+
+logger = logging.getLogger(__name__)
+
+RAW_DATA_SHEET = 'داده_های_اصلی'
+
+# قالب‌های دانلود هر تحلیل؛ دسته‌ها و کل گزارش فقط xlsx و json دارند
+PART_FORMATS = ('xlsx', 'csv', 'json')
+ALL_PARTS_KEY = 'all'
+
+# نحوه قرار دادن داده اصلی در گزارش: include (کامل)، link (فقط پیوند به فایل اصلی) یا skip
+RAW_DATA_MODES = ('include', 'link', 'skip')
+
+# نویسه‌هایی که Excel در نام برگه نمی‌پذیرد؛ / و \ در نام فایل‌های جداگانه هم مجاز نیستند
+INVALID_SHEET_CHARACTERS = re.compile(r'[\[\]:*?/\\]')
+SHEET_NAME_LENGTH = 31
+
+def sheet_names_for(category, analysis_names):
+    """نام برگه Excel هر تحلیل یک دسته که کلید فایل‌های جداگانه و دانلود هم هست
+
+    نویسه‌های غیرمجاز با _ جایگزین و نام به ۳۱ نویسه کوتاه می‌شود؛ نام‌هایی که پس
+    از کوتاه شدن یکی شوند (Excel بزرگی و کوچکی حروف را یکی می‌داند) پسوند ~2، ~3 و ...
+    می‌گیرند. پسوندها به ترتیب الفبایی نام تحلیل‌ها داده می‌شوند تا گزارش، فایل‌ها و
+    صفحه نتایج (که ترتیب کلیدهای JSON ذخیره شده را می‌بیند) همیشه یک نام بسازند.
+    """
+    names = {}
+    used = set()
+    for analysis_name in sorted(analysis_names):
+        full = INVALID_SHEET_CHARACTERS.sub('_', f'{category}_{analysis_name}')
+        name = full[:SHEET_NAME_LENGTH].rstrip("'")
+        counter = 2
+        while name.lower() in used:
+            suffix = f'~{counter}'
+            name = full[:SHEET_NAME_LENGTH - len(suffix)].rstrip("'") + suffix
+            counter += 1
+        used.add(name.lower())
+        names[analysis_name] = name
+    return {analysis_name: names[analysis_name] for analysis_name in analysis_names}
+
+def _cell(value):
+    """تبدیل مقدار pandas/numpy به مقدار قابل نوشتن در Excel"""
+    if value is None or value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.tz_localize(None).to_pydatetime() if value.tzinfo else value.to_pydatetime()
+    if isinstance(value, np.generic):
+        return _cell(value.item())
+    if isinstance(value, (int, float, str, bool)) or hasattr(value, 'isoformat'):
+        return value
+    return str(value)
+
+def _frame_rows(frame, index):
+    """ردیف‌های برگه به ترتیب سطر؛ شرط لازم برای حالت حافظه ثابت"""
+    header = list(frame.columns)
+    if index:
+        header = [frame.index.name or ''] + header
+    yield [_cell(value) for value in header]
+    for row in frame.itertuples(index=index, name=None):
+        yield [_cell(value) for value in row]
+
+class ReportWriter:
+    """نوشتن افزایشی گزارش Excel تحلیل‌ها با حافظه ثابت
+
+    با xlsxwriter در حالت constant_memory (یا openpyxl در حالت write_only) هر
+    ردیف بلافاصله روی دیسک نوشته می‌شود. دسته‌ها به محض پایان اضافه می‌شوند
+    ولی ترتیب برگه‌ها همیشه همان ترتیب order است. فایل در مسیر موقت ساخته و
+    پس از close جایگزین مسیر نهایی می‌شود.
+    """
+
+    def __init__(self, path, order=(), engine='auto'):
+        self.path = path
+        self.temp_path = f'{path}.tmp'
+        self.order = list(order)
+        self.pending = {}
+        self.sheet_stats = []
+        self.started = time.perf_counter()
+
+        if engine == 'auto':
+            engine = 'xlsxwriter' if xlsxwriter is not None else 'openpyxl'
+        self.engine = engine
+
+        if engine == 'xlsxwriter':
+            self.workbook = xlsxwriter.Workbook(self.temp_path, {
+                'constant_memory': True,
+                'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+                'remove_timezone': True,
+                'strings_to_urls': False,
+            })
+        else:
+            from openpyxl import Workbook
+            self.workbook = Workbook(write_only=True)
+
+    def write_sheet(self, sheet_name, frame, index=True):
+        """نوشتن یک DataFrame در برگه جدید"""
+        started = time.perf_counter()
+        if self.engine == 'xlsxwriter':
+            worksheet = self.workbook.add_worksheet(sheet_name)
+            for row_number, row in enumerate(_frame_rows(frame, index)):
+                worksheet.write_row(row_number, 0, row)
+        else:
+            worksheet = self.workbook.create_sheet(sheet_name)
+            for row in _frame_rows(frame, index):
+                worksheet.append(row)
+        self.sheet_stats.append({
+            'sheet': sheet_name,
+            'rows': len(frame),
+            'seconds': round(time.perf_counter() - started, 4),
+        })
+
+    def write_family(self, category, analyses):
+        """افزودن برگه‌های یک دسته؛ دسته‌ای که زودتر از قبلی‌هایش برسد منتظر می‌ماند"""
+        self.pending[category] = analyses
+        while self.order and self.order[0] in self.pending:
+            ready = self.order.pop(0)
+            self._write_analyses(ready, self.pending.pop(ready))
+
+    def _write_analyses(self, category, analyses):
+        names = sheet_names_for(category, analyses)
+        for analysis_name, analysis_data in analyses.items():
+            self.write_sheet(names[analysis_name], analysis_data['data'])
+
+    def write_raw_data(self, df, mode='include', link=None):
+        """برگه داده اصلی: کامل، پیوند به فایل اصلی یا هیچ"""
+        if mode not in RAW_DATA_MODES:
+            raise ValueError(f'حالت داده اصلی گزارش باید یکی از {", ".join(RAW_DATA_MODES)} باشد')
+        if mode == 'include':
+            self.write_sheet(RAW_DATA_SHEET, df, index=False)
+        elif mode == 'link' and link:
+            frame = pd.DataFrame({
+                'فایل اصلی': [f'=HYPERLINK("{link}", "{os.path.basename(link)}")'],
+                'تعداد ردیف': [len(df)],
+                'تعداد ستون': [len(df.columns)],
+            })
+            self.write_sheet(RAW_DATA_SHEET, frame, index=False)
+
+    def close(self):
+        """بستن فایل و برگرداندن آمار زمان و حجم هر برگه"""
+        # دسته‌هایی که پیش‌نیازشان هرگز نرسید به ترتیب order نوشته می‌شوند
+        for category in list(self.order):
+            if category in self.pending:
+                self._write_analyses(category, self.pending.pop(category))
+        self.order = []
+
+        if self.engine == 'xlsxwriter':
+            self.workbook.close()
+        else:
+            self.workbook.save(self.temp_path)
+        os.replace(self.temp_path, self.path)
+
+        with zipfile.ZipFile(self.path) as archive:
+            sheet_files = sorted(
+                (info for info in archive.infolist() if info.filename.startswith('xl/worksheets/sheet')),
+                key=lambda info: int(info.filename[len('xl/worksheets/sheet'):-len('.xml')])
+            )
+        for stats, info in zip(self.sheet_stats, sheet_files):
+            stats['bytes'] = info.compress_size
+
+        report = {
+            'engine': self.engine,
+            'bytes': os.path.getsize(self.path),
+            'seconds': round(time.perf_counter() - self.started, 3),
+            'sheets': self.sheet_stats,
+        }
+        for stats in self.sheet_stats:
+            logger.info(
+                'report sheet %s: %d rows, %.3fs, %d bytes',
+                stats['sheet'], stats['rows'], stats['seconds'], stats.get('bytes', 0)
+            )
+        return report
+
+    def abort(self):
+        """رها کردن گزارش نیمه‌کاره"""
+        try:
+            if self.engine == 'xlsxwriter':
+                self.workbook.close()
+        except Exception:
+            pass
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+def write_analysis_report(all_analyses, df, output_file, raw_data='include', link=None):
+    """ذخیره همه تحلیل‌ها در یک فایل Excel"""
+    writer = ReportWriter(output_file, order=list(all_analyses))
+    try:
+        for category, analyses in all_analyses.items():
+            writer.write_family(category, analyses)
+        writer.write_raw_data(df, raw_data, link)
+    except Exception:
+        writer.abort()
+        raise
+    return writer.close()
+
+
+def _write_json(path, data):
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+def write_analysis_parts(directory, category, analyses):
+    """ساخت فایل‌های آماده دانلود برای هر تحلیل و برای کل دسته
+
+    هر تحلیل با نام برگه‌اش در قالب‌های xlsx، csv و json و هر دسته با نام
+    خودش در قالب‌های xlsx و json ذخیره می‌شود تا دانلود نیازی به خواندن
+    دوباره گزارش کامل نداشته باشد.
+    """
+    os.makedirs(directory, exist_ok=True)
+    serialized = serialize_analyses(analyses)
+
+    keys = sheet_names_for(category, analyses)
+    for analysis_name, analysis_data in analyses.items():
+        key = keys[analysis_name]
+        writer = ReportWriter(os.path.join(directory, f'{key}.xlsx'))
+        writer.write_sheet(key, analysis_data['data'])
+        writer.close()
+        temp_path = os.path.join(directory, f'{key}.csv.tmp')
+        analysis_data['data'].to_csv(temp_path, encoding='utf-8-sig')
+        os.replace(temp_path, os.path.join(directory, f'{key}.csv'))
+        _write_json(os.path.join(directory, f'{key}.json'), serialized[analysis_name])
+
+    if analyses:
+        writer = ReportWriter(os.path.join(directory, f'{category}.xlsx'), order=[category])
+        writer.write_family(category, analyses)
+        writer.close()
+    _write_json(os.path.join(directory, f'{category}.json'), serialized)
+
+def write_all_parts_json(directory, all_analyses):
+    """فایل json همه دسته‌ها برای دانلود کامل"""
+    os.makedirs(directory, exist_ok=True)
+    _write_json(
+        os.path.join(directory, f'{ALL_PARTS_KEY}.json'),
+        {category: serialize_analyses(analyses) for category, analyses in all_analyses.items()}
+    )
@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+# سطوح زمانی مکعب تجمیع از ریز به درشت
+GRANULARITIES = ('day', 'week', 'month', 'quarter', 'year')
+GRANULARITY_LABELS = {
+    'day': 'روزانه',
+    'week': 'هفتگی',
+    'month': 'ماهانه',
+    'quarter': 'فصلی',
+    'year': 'سالانه',
+}
+# فراوانی pandas برای ساخت بازه پیوسته دوره‌ها (شروع هر دوره)
+PERIOD_FREQUENCIES = {'day': 'D', 'week': 'W-MON', 'month': 'MS', 'quarter': 'QS', 'year': 'YS'}
+STATISTICS = ('mean', 'sum', 'count')
+STATISTIC_LABELS = {'mean': 'میانگین', 'sum': 'مجموع', 'count': 'تعداد'}
+
+# ۱۹۷۰/۰۱/۰۱ پنجشنبه است؛ با این جابجایی هفته‌ها از دوشنبه شروع می‌شوند
+WEEK_OFFSET = 3
+
+CUBE_COLUMNS = ['date_column', 'granularity', 'period', 'column', 'sum', 'count']
+
+def _coarsen(days, granularity):
+    """کلید دوره از شماره روز (روزهای پس از ۱۹۷۰/۰۱/۰۱)؛ هر کلید تابعی صعودی از روز است"""
+    if granularity == 'day':
+        return days
+    if granularity == 'week':
+        return (days + WEEK_OFFSET) // 7
+    months = days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    return {'month': months, 'quarter': months // 3, 'year': months // 12}[granularity]
+
+def _period_start(keys, granularity):
+    """تاریخ شروع هر دوره از کلید آن"""
+    if granularity == 'day':
+        starts = keys.astype('datetime64[D]')
+    elif granularity == 'week':
+        starts = (keys * 7 - WEEK_OFFSET).astype('datetime64[D]')
+    else:
+        months = keys * {'month': 1, 'quarter': 3, 'year': 12}[granularity]
+        starts = months.astype('datetime64[M]')
+    return starts.astype('datetime64[ns]')
+
+def period_labels(starts, granularity):
+    """برچسب خوانای دوره‌ها؛ ماه و فصل همراه سال تا دوره‌های سال‌های مختلف یکی نشوند"""
+    index = pd.DatetimeIndex(starts)
+    if granularity in ('day', 'week'):
+        return index.strftime('%Y-%m-%d')
+    if granularity == 'month':
+        return index.strftime('%Y-%m')
+    if granularity == 'quarter':
+        return pd.Index([f'{year}-Q{quarter}' for year, quarter in zip(index.year, index.quarter)])
+    return index.strftime('%Y')
+
+def _boundaries(keys):
+    """شروع هر گروه در آرایه مرتب کلیدها"""
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+def _rollup_date_column(values, dates):
+    """مجموع و تعداد ستون‌ها به ازای هر سطح زمانی برای یک ستون تاریخ
+
+    ردیف‌ها یک بار بر اساس روز مرتب و در سطح روز تجمیع می‌شوند؛ سطوح درشت‌تر
+    از همان تجمیع‌های روزانه (که کلیدشان مرتب می‌ماند) با reduceat ساخته می‌شوند.
+    """
+    if getattr(dates.dt, 'tz', None) is not None:
+        # دوره‌ها بر اساس ساعت محلی خود داده
+        dates = dates.dt.tz_localize(None)
+    days = dates.to_numpy(dtype='datetime64[D]')
+    valid = np.flatnonzero(~np.isnat(days))
+    if not len(valid):
+        return {}
+    days = days[valid].astype(np.int64)
+    order = np.argsort(days, kind='stable')
+    days = days[order]
+    rows = values[valid[order]]
+    present = ~np.isnan(rows)
+
+    starts = _boundaries(days)
+    day_keys = days[starts]
+    day_sums = np.add.reduceat(np.where(present, rows, 0.0), starts, axis=0)
+    day_counts = np.add.reduceat(present.astype(np.int64), starts, axis=0)
+
+    levels = {}
+    for granularity in GRANULARITIES:
+        keys = _coarsen(day_keys, granularity)
+        level_starts = _boundaries(keys)
+        levels[granularity] = (
+            _period_start(keys[level_starts], granularity),
+            np.add.reduceat(day_sums, level_starts, axis=0),
+            np.add.reduceat(day_counts, level_starts, axis=0),
+        )
+    return levels
+
+class TimeRollup:
+    """مکعب تجمیع زمانی: مجموع و تعداد همه ستون‌های عددی به ازای هر ستون تاریخ و هر سطح زمانی
+
+    داده به شکل بلند (ستون تاریخ، سطح، دوره، ستون، مجموع، تعداد) نگه داشته می‌شود
+    تا یک بار ذخیره شود و برش‌ها و دانلودهای بعدی بدون تجمیع دوباره ساخته شوند.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+
+    @classmethod
+    def from_frame(cls, df, parsed_dates, numeric_columns):
+        """ساخت مکعب برای همه ستون‌های تاریخ تبدیل شده؛ خود ستون تاریخ تجمیع نمی‌شود"""
+        parts = []
+        for date_column, dates in parsed_dates.items():
+            columns = [col for col in numeric_columns if col != date_column]
+            if not columns:
+                continue
+            levels = _rollup_date_column(df[columns].to_numpy(dtype=np.float64), dates)
+            for granularity, (starts, sums, counts) in levels.items():
+                parts.append(pd.DataFrame({
+                    'date_column': str(date_column),
+                    'granularity': granularity,
+                    'period': np.repeat(starts, len(columns)),
+                    'column': np.tile(np.array([str(col) for col in columns], dtype=object), len(starts)),
+                    'sum': sums.ravel(),
+                    'count': counts.ravel(),
+                }))
+        if not parts:
+            return cls(pd.DataFrame({col: [] for col in CUBE_COLUMNS}))
+        return cls(pd.concat(parts, ignore_index=True))
+
+    @property
+    def date_columns(self):
+        return list(pd.unique(self.frame['date_column']))
+
+    @property
+    def empty(self):
+        return self.frame.empty
+
+    def columns(self, date_column):
+        """ستون‌های عددی تجمیع شده برای یک ستون تاریخ به ترتیب داده"""
+        return list(pd.unique(self.frame.loc[self.frame['date_column'] == date_column, 'column']))
+
+    def _pivot(self, date_column, granularity, statistic, columns):
+        cube = self.frame[(self.frame['date_column'] == date_column) & (self.frame['granularity'] == granularity)]
+        if columns is not None:
+            cube = cube[cube['column'].isin([str(col) for col in columns])]
+        if statistic == 'mean':
+            with np.errstate(all='ignore'):
+                values = cube['sum'] / cube['count'].where(cube['count'] > 0)
+        else:
+            values = cube[statistic]
+        table = cube.assign(value=values).pivot(index='period', columns='column', values='value')
+        table = table[list(pd.unique(cube['column']))]
+        table.columns.name = None
+        return table
+
+    def series(self, date_column, granularity, statistic='sum', columns=None):
+        """جدول دوره × ستون به ترتیب زمان با دوره‌های پیوسته؛ دوره بدون ردیف NaN است"""
+        table = self._pivot(date_column, granularity, statistic, columns)
+        if table.empty:
+            return table
+        periods = pd.date_range(table.index[0], table.index[-1], freq=PERIOD_FREQUENCIES[granularity])
+        return table.reindex(periods)
+
+    def table(self, date_column, granularity, statistic='mean', columns=None):
+        """جدول دوره × ستون یک آماره از مکعب ذخیره شده؛ ستون بدون مقدار در یک دوره NaN است"""
+        table = self._pivot(date_column, granularity, statistic, columns)
+        table.index = period_labels(table.index, granularity)
+        table.index.name = GRANULARITY_LABELS[granularity]
+        return table
@@ -0,0 +1,66 @@
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from .analysis import ANALYSIS_FAMILIES
+from .storage import read_sidecar
+from .instrumentation import timed_call
+
+FAMILY_FUNCTIONS = dict(ANALYSIS_FAMILIES)
+
+def _run_family_from_sidecar(path, category, kwargs):
+    """اجرای یک دسته تحلیل در پردازه جدا؛ داده به جای pickle از نسخه ستونی با memory map خوانده می‌شود"""
+    df = read_sidecar(path)
+    generate = FAMILY_FUNCTIONS[category]
+    return timed_call(generate.__name__, generate, df, **kwargs)
+
+def run_analysis_families(df, family_kwargs=None, executor='thread', max_workers=None,
+                          sidecar=None, on_complete=None, timings=None):
+    """اجرای همزمان دسته‌های تحلیل و ادغام نتایج به ترتیب ثابت ANALYSIS_FAMILIES
+
+    executor یکی از serial، thread یا process است. در حالت process مسیر نسخه
+    ستونی (sidecar) لازم است. on_complete با (دسته، تحلیل‌ها) به محض پایان هر
+    دسته و در نخ فراخواننده صدا زده می‌شود. اگر timings داده شود رکورد
+    اندازه‌گیری هر دسته (به ترتیب پایان) به آن اضافه می‌شود.
+    """
+    family_kwargs = family_kwargs or {}
+    if executor == 'process' and sidecar is None:
+        executor = 'thread'
+
+    results = {}
+    if executor == 'serial' or max_workers == 1:
+        for category, generate in ANALYSIS_FAMILIES:
+            results[category], record = timed_call(
+                generate.__name__, generate, df, **family_kwargs.get(category, {})
+            )
+            if timings is not None:
+                timings.append(record)
+            if on_complete is not None:
+                on_complete(category, results[category])
+    else:
+        if executor == 'process':
+            pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        else:
+            pool = ThreadPoolExecutor(max_workers=max_workers)
+
+        with pool:
+            futures = {}
+            for category, generate in ANALYSIS_FAMILIES:
+                kwargs = family_kwargs.get(category, {})
+                if executor == 'process':
+                    future = pool.submit(_run_family_from_sidecar, sidecar, category, kwargs)
+                else:
+                    future = pool.submit(timed_call, generate.__name__, generate, df, **kwargs)
+                futures[future] = category
+
+            for future in as_completed(futures):
+                category = futures[future]
+                results[category], record = future.result()
+                if timings is not None:
+                    timings.append(record)
+                if on_complete is not None:
+                    on_complete(category, results[category])
+
+    # ترتیب خروجی مستقل از ترتیب پایان کارهاست تا برگه‌های Excel ثابت بمانند
+    return {category: results[category] for category, _ in ANALYSIS_FAMILIES}
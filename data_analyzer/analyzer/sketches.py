@@ -0,0 +1,100 @@
+import math
+import numpy as np
+
+# سطح اطمینان کران‌های خطای حالت تقریبی (۹۵٪)
+APPROX_CONFIDENCE = 0.95
+APPROX_Z = 1.96
+SAMPLE_SEED = 42
+# تعداد بیت‌های شماره ثبات HyperLogLog (۲^۱۴ ثبات، خطای نسبی حدود ۰٫۸٪)
+HLL_PRECISION = 14
+
+class RowSample:
+    """نمونه تصادفی یکنواخت ردیف‌ها (معادل نمونه reservoir) و کران‌های خطای آن
+
+    همه کران‌ها نیم‌پهنای بازه اطمینان ۹۵٪ هستند و اگر نمونه کل داده باشد صفر می‌شوند.
+    """
+
+    def __init__(self, frame, population):
+        self.frame = frame
+        self.population = population
+
+    @classmethod
+    def from_frame(cls, df, size, seed=SAMPLE_SEED):
+        if len(df) <= size:
+            return cls(df, len(df))
+        rng = np.random.default_rng(seed)
+        positions = np.sort(rng.choice(len(df), size, replace=False))
+        return cls(df.iloc[positions].reset_index(drop=True), len(df))
+
+    @property
+    def size(self):
+        return len(self.frame)
+
+    @property
+    def exact(self):
+        return self.size >= self.population
+
+    @property
+    def rank_error(self):
+        """خطای رتبه چندک‌ها طبق نامساوی DKW"""
+        if self.exact or not self.size:
+            return 0.0
+        return math.sqrt(math.log(2 / (1 - APPROX_CONFIDENCE)) / (2 * self.size))
+
+    def quantile_errors(self, columns, quantiles):
+        """نیم‌پهنای بازه مقدار هر چندک: فاصله چندک‌های q-ε و q+ε نمونه"""
+        frame = self.frame[columns]
+        epsilon = self.rank_error
+        errors = []
+        for q in quantiles:
+            upper = frame.quantile(min(1.0, q + epsilon))
+            lower = frame.quantile(max(0.0, q - epsilon))
+            errors.append((upper - lower) / 2)
+        return errors
+
+    def proportion_error(self, proportions):
+        """خطای نسبت‌های برآورد شده از نمونه با تصحیح جامعه محدود"""
+        if self.exact or self.size < 2:
+            return np.zeros_like(proportions, dtype=np.float64)
+        correction = (self.population - self.size) / (self.population - 1)
+        return APPROX_Z * np.sqrt(proportions * (1 - proportions) / self.size * correction)
+
+    def correlation_error(self, matrix):
+        """نیم‌پهنای بازه اطمینان فیشر برای هر ضریب همبستگی"""
+        if self.exact or self.size <= 3:
+            return np.zeros_like(matrix, dtype=np.float64)
+        z = np.arctanh(np.clip(matrix, -1, 1))
+        spread = APPROX_Z / math.sqrt(self.size - 3)
+        return (np.tanh(z + spread) - np.tanh(z - spread)) / 2
+
+def _leading_zeros(values):
+    """تعداد صفرهای ابتدای هر عدد ۶۴ بیتی با جستجوی دودویی برداری"""
+    values = values.copy()
+    zeros = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        below = values < (np.uint64(1) << np.uint64(64 - shift))
+        zeros[below] += shift
+        values[below] <<= np.uint64(shift)
+    zeros[values == 0] = 64
+    return zeros
+
+def hyperloglog(hashes, precision=HLL_PRECISION):
+    """برآورد تعداد مقادیر یکتا از هش‌های ۶۴ بیتی؛ خروجی (برآورد، کران خطای ۹۵٪)"""
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    registers_count = 1 << precision
+    if not len(hashes):
+        return 0, 0
+    index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    rank = np.minimum(_leading_zeros(hashes << np.uint64(precision)), 64 - precision) + 1
+
+    registers = np.zeros(registers_count, dtype=np.int64)
+    np.maximum.at(registers, index, rank)
+
+    alpha = 0.7213 / (1 + 1.079 / registers_count)
+    estimate = alpha * registers_count ** 2 / np.sum(np.power(2.0, -registers))
+    empty = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * registers_count and empty:
+        # تصحیح برد کوچک (شمارش خطی)
+        estimate = registers_count * math.log(registers_count / empty)
+    error = APPROX_Z * 1.04 / math.sqrt(registers_count) * estimate
+    return int(round(estimate)), int(math.ceil(error))
@@ -0,0 +1,270 @@
+import os
+import time
+import shutil
+import hashlib
+import pandas as pd
+from django.conf import settings
+from django.utils.text import slugify
+from .ingest import read_workbook
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+    feather = None
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# نوع ردیف AnalysisResult که پروفایل ستون‌های دیتاست در آن ذخیره می‌شود
+PROFILE_RESULT_TYPE = 'پروفایل ستون‌ها'
+# نوع ردیف AnalysisResult تجمیع‌های افزایشی دیتاست
+AGGREGATES_RESULT_TYPE = 'تجمیع‌های افزایشی'
+# ستون برچسب ردیف‌ها در فایل جدول‌های نتایج؛ ستون‌های داده با شماره ذخیره می‌شوند
+TABLE_INDEX = 'index'
+
+def hash_uploaded_file(file):
+    """محاسبه هش محتوای فایل به صورت تکه‌ای بدون بارگذاری کامل در حافظه"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+def storage_name(dataset):
+    """نام پایه فایل‌های نتایج و نسخه ستونی؛ برگه‌های یک فایل چندبرگه‌ای نام جدا دارند"""
+    file_name = os.path.splitext(os.path.basename(dataset.file.name))[0]
+    if not dataset.sheet_name or dataset.parent_id is None:
+        return file_name
+    suffix = hashlib.md5(dataset.sheet_name.encode('utf-8')).hexdigest()[:6]
+    return f'{file_name}__{slugify(dataset.sheet_name, allow_unicode=True)}-{suffix}'
+
+def selection_hash(content_hash, sheet_names):
+    """هش محتوا به همراه برگه‌های انتخاب شده تا انتخاب متفاوت نتیجه جدا داشته باشد"""
+    if not sheet_names:
+        return content_hash
+    return hashlib.sha256('\n'.join([content_hash] + sorted(sheet_names)).encode('utf-8')).hexdigest()
+
+def results_path(dataset):
+    """مسیر فایل Excel نتایج یک دیتاست"""
+    return os.path.join(settings.MEDIA_ROOT, 'results', f'{storage_name(dataset)}_analysis.xlsx')
+
+def parts_dir_for(file_name):
+    """پوشه فایل‌های آماده دانلود هر تحلیل به صورت جداگانه"""
+    return os.path.join(settings.MEDIA_ROOT, 'results', f'{file_name}_parts')
+
+def parts_dir(dataset):
+    return parts_dir_for(storage_name(dataset))
+
+def sidecar_path(dataset):
+    """مسیر نسخه ستونی دیتاست؛ در نبود pyarrow از pickle استفاده می‌شود"""
+    extension = 'feather' if feather is not None else 'pkl'
+    return os.path.join(settings.MEDIA_ROOT, 'sidecars', f'{storage_name(dataset)}.{extension}')
+
+def rollup_path(dataset):
+    """مسیر مکعب تجمیع زمانی ذخیره شده دیتاست"""
+    extension = 'feather' if feather is not None else 'pkl'
+    return os.path.join(settings.MEDIA_ROOT, 'rollups', f'{storage_name(dataset)}.{extension}')
+
+def tables_dir(dataset):
+    """پوشه جدول‌های بزرگ نتایج که به جای JSON در فایل Arrow ذخیره می‌شوند"""
+    return os.path.join(settings.MEDIA_ROOT, 'tables', storage_name(dataset))
+
+def _prepare_for_arrow(df):
+    """یکسان‌سازی نام ستون‌ها و ستون‌های متنی با نوع مختلط برای ذخیره ستونی"""
+    df = df.rename(columns=str)
+    for col in df.columns:
+        if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True).startswith('mixed'):
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+def _write_frame(path, df, compression='uncompressed'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # نوشتن در فایل موقت تا خواننده همزمان هیچ‌گاه فایل نیمه‌کاره نبیند
+    temp_path = f'{path}.tmp'
+    if feather is not None:
+        # پیش‌فرض بدون فشرده‌سازی تا خواندن با memory map بدون کپی انجام شود
+        feather.write_feather(df, temp_path, compression=compression)
+    else:
+        df.to_pickle(temp_path)
+    os.replace(temp_path, path)
+
+def write_sidecar(dataset, df):
+    """ذخیره یک بار برای همیشه دیتاست به صورت ستونی کنار فایل اصلی"""
+    df = _prepare_for_arrow(df)
+    _write_frame(sidecar_path(dataset), df)
+    return df
+
+def write_rollup(dataset, rollup):
+    """ذخیره مکعب تجمیع زمانی برای برش‌ها و دانلودهای بعدی"""
+    _write_frame(rollup_path(dataset), rollup.frame)
+
+def write_result_table(dataset, category, analysis_name, frame, inline_cells=None):
+    """ذخیره جدول بزرگ یک تحلیل به صورت Arrow IPC فشرده و برگرداندن اشاره‌گر آن
+
+    جدول کوچک‌تر از inline_cells (پیش‌فرض ANALYZER_RESULT_INLINE_CELLS)، نبود pyarrow
+    یا ستون با نوع مختلط None برمی‌گرداند تا جدول مثل قبل به صورت JSON در ردیف ذخیره شود.
+    """
+    inline_cells = settings.ANALYZER_RESULT_INLINE_CELLS if inline_cells is None else inline_cells
+    if pa is None or frame.size <= inline_cells:
+        return None
+    data = frame.set_axis([str(position) for position in range(frame.shape[1])], axis=1)
+    data.insert(0, TABLE_INDEX, frame.index)
+    try:
+        table = pa.Table.from_pandas(data, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return None
+
+    key = hashlib.md5(f'{category}/{analysis_name}'.encode('utf-8')).hexdigest()[:12]
+    path = os.path.join(tables_dir(dataset), f'{key}.arrow')
+    _write_frame(path, table, compression='lz4')
+    return {
+        'file': os.path.relpath(path, settings.MEDIA_ROOT),
+        'columns': [str(col) for col in frame.columns],
+        'rows': len(frame),
+    }
+
+def read_result_table(table, rows=None, columns=None):
+    """(برچسب ردیف‌ها، ردیف‌ها) از جدول ذخیره شده در فایل؛ فقط ستون‌ها و ردیف‌های برش خوانده می‌شوند"""
+    columns = range(len(table['columns'])) if columns is None else columns
+    names = [TABLE_INDEX] + [str(position) for position in columns]
+    arrow = feather.read_table(os.path.join(settings.MEDIA_ROOT, table['file']), columns=names, memory_map=True)
+    if rows is not None:
+        arrow = arrow.slice(rows.start, len(rows))
+    values = arrow.to_pydict()
+    index = values.pop(TABLE_INDEX)
+    return index, [list(row) for row in zip(*values.values())] if values else [[] for _ in index]
+
+def read_sidecar(path, columns=None):
+    """خواندن نسخه ستونی با memory map و فقط ستون‌های خواسته شده"""
+    if feather is not None:
+        table = feather.read_table(path, columns=list(columns) if columns is not None else None, memory_map=True)
+        return table.to_pandas()
+
+    df = pd.read_pickle(path)
+    return df[list(columns)] if columns is not None else df
+
+def load_dataset_frame(dataset, columns=None, stats=None):
+    """خواندن دیتاست از نسخه ستونی؛ فایل Excel فقط بار اول خوانده می‌شود
+
+    اگر stats داده شود و فایل Excel خوانده شود، آمار خواندن (از جمله حافظه
+    پیش و پس از فشرده‌سازی) در آن نوشته می‌شود.
+    """
+    path = sidecar_path(dataset)
+    if not os.path.exists(path):
+        df, ingest_stats = read_workbook(dataset.file.path, sheet_name=dataset.sheet_name or None)
+        if stats is not None:
+            stats.update(ingest_stats)
+        df = write_sidecar(dataset, df)
+        return df[list(columns)] if columns is not None else df
+
+    return read_sidecar(path, columns)
+
+def load_profile(dataset):
+    """پروفایل ذخیره شده دیتاست یا None اگر هنوز تحلیل نشده است"""
+    from .models import AnalysisResult
+    from .profile import ColumnProfile
+
+    result = AnalysisResult.objects.filter(
+        dataset=dataset, analysis_type=PROFILE_RESULT_TYPE
+    ).order_by('-created_at').first()
+    return ColumnProfile.from_dict(result.result_data) if result else None
+
+def load_aggregates(dataset):
+    """تجمیع‌های افزایشی ذخیره شده دیتاست یا None"""
+    from .models import AnalysisResult
+    from .aggregates import RunningAggregates
+
+    result = AnalysisResult.objects.filter(
+        dataset=dataset, analysis_type=AGGREGATES_RESULT_TYPE
+    ).order_by('-created_at').first()
+    if result is None:
+        return None
+    try:
+        return RunningAggregates.from_dict(result.result_data, read_result_table)
+    except OSError:
+        # فایل ماتریس‌ها حذف شده است؛ تحلیل بدون پایه افزایشی انجام می‌شود
+        return None
+
+def load_rollup(dataset):
+    """مکعب تجمیع زمانی ذخیره شده دیتاست یا None"""
+    from .rollup import TimeRollup
+
+    path = rollup_path(dataset)
+    return TimeRollup(read_sidecar(path)) if os.path.exists(path) else None
+
+def touch(path):
+    """ثبت استفاده از فایل برای سیاست حذف LRU
+
+    فقط زمان دسترسی (atime) جلو برده می‌شود؛ mtime دست نمی‌خورد تا ETag و
+    Last-Modified دانلودها تا بازنویسی بعدی فایل ثابت بمانند.
+    """
+    try:
+        os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+    except OSError:
+        pass
+
+def _files_by_last_use(directory):
+    entries = []
+    if not os.path.isdir(directory):
+        return entries
+    for entry in os.scandir(directory):
+        if entry.is_file():
+            stat = entry.stat()
+            entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, entry.path))
+        elif entry.is_dir():
+            # پوشه فایل‌های جداگانه یک گزارش به عنوان یک واحد حذف می‌شود؛ آخرین استفاده از هر فایل آن
+            stats = [child.stat() for child in os.scandir(entry.path) if child.is_file()]
+            last_use = max([entry.stat().st_mtime] + [max(stat.st_atime, stat.st_mtime) for stat in stats])
+            entries.append((last_use, sum(stat.st_size for stat in stats), entry.path))
+    entries.sort()
+    return entries
+
+def evict_results(max_bytes=None, keep=()):
+    """حذف قدیمی‌ترین فایل‌های نتایج تا زمانی که حجم پوشه از سقف کمتر شود"""
+    max_bytes = settings.ANALYZER_RESULTS_MAX_BYTES if max_bytes is None else max_bytes
+    if not max_bytes:
+        return []
+
+    entries = _files_by_last_use(os.path.join(settings.MEDIA_ROOT, 'results'))
+    total = sum(size for _, size, _ in entries)
+    keep = {os.path.normpath(path) for path in keep}
+    removed = []
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        if os.path.normpath(path) in keep:
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
+        total -= size
+        removed.append(path)
+    return removed
+
+def evict_datasets(max_bytes=None, keep=()):
+    """حذف دیتاست‌هایی که مدت‌ها استفاده نشده‌اند تا حجم پوشه از سقف کمتر شود"""
+    from .models import DataSet
+
+    max_bytes = settings.ANALYZER_DATASETS_MAX_BYTES if max_bytes is None else max_bytes
+    if not max_bytes:
+        return []
+
+    entries = _files_by_last_use(os.path.join(settings.MEDIA_ROOT, 'datasets'))
+    total = sum(size for _, size, _ in entries)
+    datasets_by_path = {
+        os.path.normpath(dataset.file.path): dataset
+        for dataset in DataSet.objects.filter(parent=None).exclude(pk__in=list(keep))
+        if dataset.file
+    }
+    removed = []
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        dataset = datasets_by_path.get(os.path.normpath(path))
+        if dataset is None:
+            continue
+        dataset.delete()
+        total -= size
+        removed.append(path)
+    return removed
@@ -0,0 +1,76 @@
+import math
+import json
+from django.conf import settings
+from .storage import read_result_table
+
+# مقادیری که در جدول به صورت نشان (badge) نمایش داده می‌شوند
+CELL_BADGES = {
+    True: ('بله', 'success'),
+    'بله': ('بله', 'success'),
+    False: ('خیر', 'danger'),
+    'خیر': ('خیر', 'danger'),
+    'خطا': ('خطا', 'warning'),
+}
+
+def format_cell(value):
+    """قالب‌بندی یک خانه جدول به صورت (متن، رنگ نشان یا None)"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ('-', None)
+    if isinstance(value, (bool, str)) and value in CELL_BADGES:
+        return CELL_BADGES[value]
+    if isinstance(value, float):
+        if value == 0 or abs(value) >= 1e-4:
+            text = f'{value:.4f}'.rstrip('0').rstrip('.')
+            return (text if text != '-0' else '0', None)
+        return (f'{value:.3e}', None)
+    return (str(value), None)
+
+def preview_table(df, rows=None):
+    """ردیف‌های اول دیتاست به قالب split برای ذخیره در DataSet.preview"""
+    rows = rows or settings.ANALYZER_PREVIEW_ROWS
+    return json.loads(df.head(rows).to_json(orient='split', date_format='iso', force_ascii=False))
+
+def _page_count(total, size):
+    return max(1, math.ceil(total / size))
+
+def table_page(table, page=1, column_page=1, page_rows=None, page_columns=None):
+    """برش یک صفحه و یک پنجره ستونی از جدول ذخیره شده (قالب split)
+
+    فقط خانه‌های همان برش قالب‌بندی می‌شوند، پس زمان ساخت صفحه به اندازه
+    جدول (مثلاً ماتریس همبستگی N×N) بستگی ندارد. از جدول ذخیره شده در فایل
+    Arrow هم فقط همان برش خوانده می‌شود.
+    """
+    page_rows = page_rows or settings.ANALYZER_TABLE_PAGE_ROWS
+    page_columns = page_columns or settings.ANALYZER_TABLE_PAGE_COLUMNS
+    columns = table['columns']
+    total_rows = table['rows'] if 'file' in table else len(table['index'])
+
+    pages = _page_count(total_rows, page_rows)
+    column_pages = _page_count(len(columns), page_columns)
+    page = min(max(1, page), pages)
+    column_page = min(max(1, column_page), column_pages)
+
+    row_start = (page - 1) * page_rows
+    col_start = (column_page - 1) * page_columns
+    col_stop = min(col_start + page_columns, len(columns))
+    row_stop = min(row_start + page_rows, total_rows)
+
+    if 'file' in table:
+        index, data = read_result_table(table, range(row_start, row_stop), range(col_start, col_stop))
+    else:
+        index = table['index'][row_start:row_stop]
+        data = [row[col_start:col_stop] for row in table['data'][row_start:row_stop]]
+    rows = [
+        [format_cell(label)[0], [format_cell(value) for value in row]]
+        for label, row in zip(index, data)
+    ]
+    return {
+        'columns': [str(col) for col in columns[col_start:col_stop]],
+        'rows': rows,
+        'page': page,
+        'pages': pages,
+        'column_page': column_page,
+        'column_pages': column_pages,
+        'total_rows': total_rows,
+        'total_columns': len(columns),
+    }
@@ -0,0 +1,478 @@
+import os
+import time
+import shutil
+import logging
+import multiprocessing
+from datetime import timedelta
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from .models import DataSet, AnalysisJob, AnalysisResult
+from .analysis import (
+    ANALYSIS_FAMILIES, ANALYSIS_VERSION, SHEETS_CATEGORY, detect_date_columns, serialize_analyses,
+    generate_sheet_summary
+)
+from .report import ReportWriter, write_analysis_parts, write_all_parts_json
+from .aggregates import build_aggregates
+from .sketches import RowSample
+from .profile import ColumnProfile
+from .rollup import GRANULARITIES, TimeRollup
+from .scheduler import run_analysis_families
+from .instrumentation import measure_stage, profiled, traced
+from .workers import init_worker
+from .ingest import read_workbook_sheets
+from .tables import preview_table
+from .storage import (
+    PROFILE_RESULT_TYPE, AGGREGATES_RESULT_TYPE, results_path, parts_dir, sidecar_path, tables_dir, write_sidecar,
+    write_rollup, write_result_table, load_dataset_frame, load_profile, load_aggregates, evict_results, evict_datasets
+)
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = [AnalysisJob.STATUS_PENDING, AnalysisJob.STATUS_RUNNING]
+# خطای ثبت شده برای کاری که ضربانش قطع شده است
+STALE_JOB_ERROR = 'کار تحلیل مدت زیادی پیشرفتی نداشت (احتمالا سرور دوباره راه‌اندازی شده یا کارگر از کار افتاده است)؛ دوباره آپلود کنید'
+
+_executor = None
+
+def get_executor():
+    """ساخت تنبل استخر پردازه‌های تحلیل"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.ANALYZER_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker
+        )
+    return _executor
+
+def _submit(job_id):
+    global _executor
+    if settings.ANALYZER_WORKERS <= 0:
+        run_analysis_job(job_id)
+        return
+    try:
+        future = get_executor().submit(run_analysis_job, job_id)
+    except BrokenProcessPool:
+        # استخر خراب شده؛ یک استخر تازه بساز و دوباره تلاش کن
+        _executor = None
+        future = get_executor().submit(run_analysis_job, job_id)
+    future.add_done_callback(partial(_job_future_done, job_id))
+
+def _job_future_done(job_id, future):
+    """کاری که پردازه‌اش بدون ثبت نتیجه از بین رفته (کمبود حافظه، استخر خراب) ناموفق ثبت می‌شود
+
+    استخر خراب در ارسال بعدی _submit با استخر تازه جایگزین می‌شود.
+    """
+    if future.cancelled():
+        fail_job(job_id, 'کار تحلیل لغو شد')
+        return
+    error = future.exception()
+    if error is not None:
+        fail_job(job_id, str(error) or type(error).__name__)
+
+def fail_job(job_id, error):
+    """ثبت شکست کاری که هنوز در صف یا در حال اجراست؛ کار تمام شده دست نمی‌خورد"""
+    now = timezone.now()
+    return AnalysisJob.objects.filter(pk=job_id, status__in=ACTIVE_STATUSES).update(
+        status=AnalysisJob.STATUS_FAILED, error=error, finished_at=now, updated_at=now
+    )
+
+def _stale_cutoff():
+    return timezone.now() - timedelta(seconds=settings.ANALYZER_JOB_STALE_SECONDS)
+
+def recover_stale_jobs(**filters):
+    """ناموفق ثبت کردن کارهای فعالی که ضربانشان از ANALYZER_JOB_STALE_SECONDS قدیمی‌تر است
+
+    پس از راه‌اندازی دوباره سرور، کارهای استخر قبلی در هیچ پردازه‌ای اجرا نمی‌شوند؛
+    بدون این کار وضعیت آن‌ها برای همیشه در صف یا در حال اجرا می‌ماند. خروجی: تعداد کارها
+    """
+    now = timezone.now()
+    return AnalysisJob.objects.filter(
+        status__in=ACTIVE_STATUSES, updated_at__lt=_stale_cutoff(), **filters
+    ).update(status=AnalysisJob.STATUS_FAILED, error=STALE_JOB_ERROR, finished_at=now, updated_at=now)
+
+def create_job(dataset, mode=AnalysisJob.MODE_EXACT, timings=None):
+    """ثبت کار تحلیل بدون ارسال به صف؛ enqueue_analysis آن را به صف می‌فرستد و analyze_batch در استخر خودش اجرا می‌کند"""
+    return AnalysisJob.objects.create(
+        dataset=dataset,
+        mode=mode,
+        summary={'performance': timings or []},
+        analysis_version=ANALYSIS_VERSION,
+        total_steps=len(ANALYSIS_FAMILIES) + 2
+    )
+
+def enqueue_analysis(dataset, mode=AnalysisJob.MODE_EXACT, timings=None):
+    """ثبت کار تحلیل برای یک دیتاست و ارسال آن به صف؛ timings رکوردهای کارایی مراحل آپلود است"""
+    job = create_job(dataset, mode, timings)
+    transaction.on_commit(lambda: _submit(job.pk))
+    return job
+
+def find_dataset(content_hash):
+    """آخرین دیتاست اصلی با همین هش محتوا که فایلش هنوز موجود است"""
+    dataset = DataSet.objects.filter(content_hash=content_hash, parent=None).order_by('-uploaded_at').first()
+    if dataset is None or not os.path.isfile(dataset.file.path):
+        return None
+    return dataset
+
+def has_active_job(dataset, mode=AnalysisJob.MODE_EXACT):
+    """کار در صف یا در حال اجرا برای دیتاست در همین حالت؛ کارهای یتیم (بدون ضربان) حساب نمی‌شوند"""
+    return AnalysisJob.objects.filter(
+        dataset=dataset,
+        mode=mode,
+        status__in=ACTIVE_STATUSES,
+        updated_at__gte=_stale_cutoff()
+    ).exists()
+
+def find_cached_job(dataset, mode=AnalysisJob.MODE_EXACT):
+    """آخرین کار موفق با نسخه فعلی تحلیل و همان حالت که فایل نتایجش هنوز موجود است
+
+    خروجی‌ها برای هر دیتاست یک نسخه دارند و هر کار، با هر حالتی، آن‌ها را بازنویسی می‌کند؛
+    پس فقط کاری که آخر از همه تمام شده صاحب خروجی‌های روی دیسک است و اگر حالت یا نسخه
+    آن فرق کند (یا ناموفق شده باشد) نتیجه‌ای از حافظه برگردانده نمی‌شود.
+    """
+    job = AnalysisJob.objects.filter(
+        dataset=dataset,
+        finished_at__isnull=False
+    ).order_by('-finished_at', '-pk').first()
+    if (job is None or job.status != AnalysisJob.STATUS_DONE or job.mode != mode
+            or job.analysis_version != ANALYSIS_VERSION):
+        return None
+    if not os.path.exists(results_path(dataset)) or not os.path.isdir(parts_dir(dataset)):
+        return None
+    return job
+
+def find_base_aggregates(dataset):
+    """تجمیع‌های آخرین نسخه قبلی فایلی با همین نام، برای تحلیل افزایشی"""
+    previous = DataSet.objects.filter(
+        name=dataset.name, uploaded_at__lt=dataset.uploaded_at
+    ).exclude(pk=dataset.pk).order_by('-uploaded_at')
+    for candidate in previous[:3]:
+        aggregates = load_aggregates(candidate)
+        if aggregates is not None:
+            return candidate, aggregates
+    return None, None
+
+def _replace_results(dataset, results):
+    """جایگزینی همه نتایج دیتاست با یک حذف و یک درج دسته‌ای در یک تراکنش"""
+    with transaction.atomic():
+        AnalysisResult.objects.filter(dataset=dataset).delete()
+        AnalysisResult.objects.bulk_create(results)
+
+def _advance(job, **fields):
+    job.completed_steps += 1
+    update_fields = ['completed_steps', 'updated_at']
+    for name, value in fields.items():
+        setattr(job, name, value)
+        update_fields.append(name)
+    job.save(update_fields=update_fields)
+
+def _load_or_split(dataset, ingest_stats):
+    """داده دیتاست تک‌برگه‌ای، یا None اگر فایل چند برگه دارد
+
+    بار اول همه برگه‌های خواسته شده با یک بار خواندن فایل بارگذاری می‌شوند؛
+    اگر بیش از یک برگه داده داشته باشد، هر برگه یک دیتاست فرزند با نسخه
+    ستونی خودش می‌شود و فایل دیگر خوانده نمی‌شود.
+    """
+    if dataset.sheet_datasets.exists():
+        return None
+    if dataset.parent_id is not None or os.path.exists(sidecar_path(dataset)):
+        return load_dataset_frame(dataset, stats=ingest_stats)
+
+    requested = [sheet['name'] for sheet in dataset.sheets] or None
+    frames, sheet_stats = read_workbook_sheets(dataset.file.path, requested)
+    dataset.sheets = [
+        {'name': name, 'rows': stats['rows'], 'columns': stats['columns']}
+        for name, stats in sheet_stats.items()
+    ]
+    non_empty = [name for name, df in frames.items() if len(df)]
+
+    if len(non_empty) <= 1:
+        dataset.sheet_name = non_empty[0] if non_empty else next(iter(frames))
+        dataset.save(update_fields=['sheets', 'sheet_name'])
+        ingest_stats.update(sheet_stats[dataset.sheet_name])
+        return write_sidecar(dataset, frames[dataset.sheet_name])
+
+    for name in non_empty:
+        child = DataSet.objects.create(
+            parent=dataset,
+            name=f'{dataset.name} - {name}',
+            file=dataset.file.name,
+            sheet_name=name
+        )
+        # هر برگه پس از ذخیره از حافظه آزاد می‌شود
+        write_sidecar(child, frames.pop(name))
+    dataset.row_count = sum(sheet['rows'] for sheet in dataset.sheets)
+    dataset.save(update_fields=['sheets', 'row_count'])
+    return None
+
+def _run_sheet_jobs(job, dataset, timings, context):
+    """تحلیل همزمان برگه‌ها در استخر پردازه‌ها و ساخت خلاصه تجمیعی آن‌ها"""
+    children = list(dataset.sheet_datasets.order_by('pk'))
+    sheet_jobs = {}
+    pending = []
+    for child in children:
+        cached = find_cached_job(child, job.mode)
+        sheet_jobs[child.pk] = cached or create_job(child, job.mode)
+        if cached is None:
+            pending.append(sheet_jobs[child.pk])
+
+    _advance(job, total_steps=len(pending) + 2)
+
+    with measure_stage('sheet_jobs', timings, **context):
+        workers = min(settings.ANALYZER_SHEET_WORKERS, len(pending))
+        if settings.ANALYZER_WORKERS <= 0 or workers <= 1:
+            for sheet_job in pending:
+                run_analysis_job(sheet_job.pk)
+                _advance(job)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker
+            ) as pool:
+                futures = [pool.submit(run_analysis_job, sheet_job.pk) for sheet_job in pending]
+                for future in as_completed(futures):
+                    future.result()
+                    _advance(job)
+
+    with measure_stage('sheet_summary', timings, **context):
+        profiles = {}
+        for child in children:
+            sheet_jobs[child.pk].refresh_from_db()
+            profile = load_profile(child) if sheet_jobs[child.pk].status == AnalysisJob.STATUS_DONE else None
+            if profile is not None:
+                profiles[child.sheet_name] = profile
+        analyses = generate_sheet_summary(profiles)
+
+        output_file = results_path(dataset)
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        output_parts = parts_dir(dataset)
+        shutil.rmtree(output_parts, ignore_errors=True)
+        shutil.rmtree(tables_dir(dataset), ignore_errors=True)
+        _replace_results(dataset, [AnalysisResult(
+            dataset=dataset,
+            analysis_type=SHEETS_CATEGORY,
+            result_data=serialize_analyses(analyses, partial(write_result_table, dataset, SHEETS_CATEGORY))
+        )])
+        write_analysis_parts(output_parts, SHEETS_CATEGORY, analyses)
+        write_all_parts_json(output_parts, {SHEETS_CATEGORY: analyses})
+        report = ReportWriter(output_file, order=[SHEETS_CATEGORY], engine=settings.ANALYZER_REPORT_ENGINE)
+        report.write_family(SHEETS_CATEGORY, analyses)
+        report_summary = report.close()
+
+    _advance(
+        job,
+        status=AnalysisJob.STATUS_DONE,
+        summary={
+            'rows': dataset.row_count,
+            'sheets': dataset.sheets,
+            'sheet_jobs': {
+                child.sheet_name: {
+                    'dataset': child.pk,
+                    'status': sheet_jobs[child.pk].status,
+                    'error': sheet_jobs[child.pk].error,
+                }
+                for child in children
+            },
+            'report': report_summary,
+            'performance': timings,
+        },
+        finished_at=timezone.now()
+    )
+    return output_file, output_parts
+
+def run_analysis_job(job_id):
+    """اجرای کامل تحلیل یک دیتاست در پردازه کارگر"""
+    with profiled(f'job-{job_id}'), traced():
+        _run_analysis_job(job_id)
+
+def run_timed_job(job_id):
+    """اجرای کار تحلیل و برگرداندن (شناسه کار، زمان دیوار) بدون زمان انتظار در صف استخر"""
+    started = time.perf_counter()
+    run_analysis_job(job_id)
+    return job_id, time.perf_counter() - started
+
+def _run_analysis_job(job_id):
+    close_old_connections()
+    job = AnalysisJob.objects.select_related('dataset').get(pk=job_id)
+    dataset = job.dataset
+    job.status = AnalysisJob.STATUS_RUNNING
+    job.save(update_fields=['status', 'updated_at'])
+
+    # رکوردهای کارایی مراحل آپلود در همین فهرست ادامه پیدا می‌کنند
+    timings = list(job.summary.get('performance', []))
+    context = {'job': job_id, 'dataset': dataset.pk}
+
+    try:
+        ingest_stats = {}
+        with measure_stage('load_dataset', timings, **context) as record:
+            df = _load_or_split(dataset, ingest_stats)
+            if df is not None:
+                record['rows'], record['columns'] = df.shape
+        if df is None:
+            output_file, output_parts = _run_sheet_jobs(job, dataset, timings, context)
+            _evict([output_file, output_parts], dataset, job_id)
+            return
+        parsed_dates = {}
+        with measure_stage('detect_date_columns', timings, df, **context):
+            date_columns = detect_date_columns(df, parsed_dates, workers=settings.ANALYZER_COLUMN_WORKERS)
+
+        if job.mode == AnalysisJob.MODE_APPROXIMATE:
+            # حالت تقریبی: چارک‌ها، همبستگی و پرت‌ها از یک نمونه ثابت ردیف‌ها
+            with measure_stage('sample', timings, df, **context):
+                sample = RowSample.from_frame(df, settings.ANALYZER_APPROX_SAMPLE_SIZE)
+            aggregates, base_dataset, base_rows = None, None, None
+        else:
+            # اگر فایل نسخه قبلی به اضافه ردیف‌های جدید باشد، تجمیع‌ها فقط برای ردیف‌های جدید محاسبه می‌شوند
+            sample = None
+            date_column = date_columns[0] if date_columns else None
+            with measure_stage('aggregates', timings, df, **context):
+                base_dataset, base_aggregates = find_base_aggregates(dataset)
+                aggregates, base_rows = build_aggregates(df, date_column, base=base_aggregates)
+
+        # پروفایل ستون‌ها یک بار محاسبه و بین همه دسته‌ها مشترک است
+        with measure_stage('profile', timings, df, **context):
+            profile = ColumnProfile.from_frame(df, aggregates, sample)
+
+        # مکعب تجمیع زمانی همه ستون‌های تاریخ یک بار ساخته و برای برش‌های بعدی ذخیره می‌شود
+        with measure_stage('rollup', timings, df, **context):
+            rollup = TimeRollup.from_frame(df, parsed_dates, profile.numeric_columns)
+            write_rollup(dataset, rollup)
+
+        # متادیتای صفحه‌های فهرست و جزئیات دیتاست
+        dataset.columns = [str(col) for col in df.columns]
+        dataset.row_count = len(df)
+        dataset.preview = preview_table(df)
+        dataset.column_summary = profile.column_summary()
+        dataset.save(update_fields=['columns', 'row_count', 'preview', 'column_summary'])
+
+        _advance(job, summary={
+            'rows': profile.row_count,
+            'columns': len(profile.columns),
+            'missing_total': profile.missing_total,
+            'columns_list': dataset.columns,
+            'has_date_columns': len(date_columns) > 0,
+            'date_columns': [str(col) for col in date_columns],
+            'rollup': {
+                'date_columns': rollup.date_columns,
+                'granularities': list(GRANULARITIES),
+            } if not rollup.empty else None,
+            'incremental': {
+                'base_dataset': base_dataset.pk,
+                'base_rows': base_rows,
+                'new_rows': len(df) - base_rows,
+            } if base_rows is not None else None,
+            'approximate': {
+                'sample_rows': sample.size,
+                'confidence': 95,
+            } if sample is not None else None,
+            'performance': timings,
+            'memory': {
+                # حافظه پیش از فشرده‌سازی فقط وقتی فایل Excel همین بار خوانده شده معلوم است
+                'before_bytes': ingest_stats.get('memory_before_bytes'),
+                'after_bytes': int(df.memory_usage(deep=True).sum()),
+            }
+        })
+
+        # ردیف‌های نتایج جمع و در پایان در یک تراکنش جایگزین نتایج نسخه‌های قبلی می‌شوند
+        results = [AnalysisResult(dataset=dataset, analysis_type=PROFILE_RESULT_TYPE, result_data=profile.to_dict())]
+
+        family_kwargs = {category: {'profile': profile} for category, _ in ANALYSIS_FAMILIES}
+        family_kwargs['پایه']['aggregates'] = aggregates
+        if sample is not None:
+            family_kwargs['پایه']['sample'] = sample
+            family_kwargs['آماری']['sample'] = sample
+        family_kwargs['زمانی']['rollup'] = rollup
+        family_kwargs['کسب‌وکار']['rollup'] = rollup
+        family_kwargs['پایه'].update(
+            correlation_method=settings.ANALYZER_CORRELATION_METHOD,
+            correlation_max_columns=settings.ANALYZER_CORRELATION_MAX_COLUMNS,
+            correlation_top=settings.ANALYZER_CORRELATION_TOP
+        )
+        family_kwargs['آماری'].update(
+            normality_method=settings.ANALYZER_NORMALITY_TEST,
+            workers=settings.ANALYZER_COLUMN_WORKERS
+        )
+
+        output_file = results_path(dataset)
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        output_parts = parts_dir(dataset)
+        shutil.rmtree(output_parts, ignore_errors=True)
+        shutil.rmtree(tables_dir(dataset), ignore_errors=True)
+        if aggregates is not None:
+            # ماتریس‌های k×k با هر اندازه‌ای در فایل Arrow کنار جدول‌های بزرگ نتایج ذخیره می‌شوند
+            results.append(AnalysisResult(
+                dataset=dataset,
+                analysis_type=AGGREGATES_RESULT_TYPE,
+                result_data=aggregates.to_dict(
+                    partial(write_result_table, dataset, AGGREGATES_RESULT_TYPE, inline_cells=0)
+                )
+            ))
+        report = ReportWriter(
+            output_file,
+            order=[category for category, _ in ANALYSIS_FAMILIES],
+            engine=settings.ANALYZER_REPORT_ENGINE
+        )
+
+        # هر دسته به محض پایان در گزارش نوشته و پیشرفت کار ثبت می‌شود
+        def persist_family(category, analyses):
+            with measure_stage(f'persist_family:{category}', timings, **context):
+                results.append(AnalysisResult(
+                    dataset=dataset,
+                    analysis_type=category,
+                    result_data=serialize_analyses(analyses, partial(write_result_table, dataset, category))
+                ))
+                report.write_family(category, analyses)
+                write_analysis_parts(output_parts, category, analyses)
+            _advance(job)
+
+        try:
+            with measure_stage('analysis_families', timings, df, **context):
+                all_analyses = run_analysis_families(
+                    df,
+                    family_kwargs,
+                    executor=settings.ANALYZER_FAMILY_EXECUTOR,
+                    max_workers=settings.ANALYZER_FAMILY_WORKERS,
+                    sidecar=sidecar_path(dataset),
+                    on_complete=persist_family,
+                    timings=timings
+                )
+            with measure_stage('report_raw_data', timings, df, **context):
+                report.write_raw_data(
+                    df,
+                    settings.ANALYZER_REPORT_RAW_DATA,
+                    link=f'{settings.ANALYZER_SITE_URL}{dataset.file.url}'
+                )
+        except Exception:
+            report.abort()
+            raise
+        with measure_stage('report_close', timings, **context):
+            job.summary['report'] = report.close()
+        with measure_stage('parts_json', timings, **context):
+            write_all_parts_json(output_parts, all_analyses)
+        with measure_stage('persist_results', timings, **context) as record:
+            _replace_results(dataset, results)
+            record['rows'] = len(results)
+
+        _advance(job, status=AnalysisJob.STATUS_DONE, summary=job.summary, finished_at=timezone.now())
+
+    except Exception as e:
+        logger.exception('analysis job %s failed', job_id)
+        job.status = AnalysisJob.STATUS_FAILED
+        job.error = str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+        return
+
+    _evict([output_file, output_parts], dataset, job_id)
+
+def _evict(outputs, dataset, job_id):
+    try:
+        evict_results(keep=outputs)
+        evict_datasets(keep=[dataset.parent_id or dataset.pk])
+    except Exception:
+        logger.exception('media eviction after job %s failed', job_id)
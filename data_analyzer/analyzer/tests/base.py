@@ -0,0 +1,20 @@
+import shutil
+import tempfile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from ..models import DataSet
+
+class MediaRootMixin:
+    """هر آزمون MEDIA_ROOT موقت خودش را دارد تا فایل‌های واقعی دست نخورند"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def create_dataset(self, name='sample', content=b'content', **fields):
+        fields.setdefault('content_hash', f'{name}-hash')
+        return DataSet.objects.create(name=name, file=SimpleUploadedFile(f'{name}.xlsx', content), **fields)
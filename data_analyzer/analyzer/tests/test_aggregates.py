@@ -0,0 +1,53 @@
+from functools import partial
+import numpy as np
+import pandas as pd
+from django.test import TestCase
+from ..aggregates import RunningAggregates, build_aggregates
+from ..storage import AGGREGATES_RESULT_TYPE, read_result_table, write_result_table
+from .base import MediaRootMixin
+
+class RunningAggregatesTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        rng = np.random.default_rng(1)
+        self.df = pd.DataFrame(rng.normal(size=(400, 6)), columns=[f'c{i}' for i in range(6)])
+        self.df['label'] = 'x'
+        self.df.iloc[::7, 2] = np.nan
+        self.df.iloc[::11, 4] = np.nan
+
+    def assert_same(self, actual, expected):
+        self.assertEqual(actual.row_count, expected.row_count)
+        np.testing.assert_array_equal(actual.counts, expected.counts)
+        np.testing.assert_array_equal(actual.nulls, expected.nulls)
+        np.testing.assert_allclose(actual.correlation(), expected.correlation())
+        np.testing.assert_allclose(np.diag(actual.sums) + actual.shift * np.diag(actual.counts),
+                                   np.diag(expected.sums) + expected.shift * np.diag(expected.counts))
+        np.testing.assert_allclose(actual.minimum, expected.minimum)
+        np.testing.assert_allclose(actual.maximum, expected.maximum)
+
+    def test_merge_matches_full_recompute(self):
+        base = RunningAggregates.from_frame(self.df.iloc[:300])
+        merged, base_rows = build_aggregates(self.df, base=base)
+
+        self.assertEqual(base_rows, 300)
+        self.assertEqual(merged.fingerprint, RunningAggregates.from_frame(self.df).fingerprint)
+        self.assert_same(merged, RunningAggregates.from_frame(self.df))
+
+    def test_changed_prefix_is_recomputed(self):
+        base = RunningAggregates.from_frame(self.df.iloc[:300])
+        changed = self.df.copy()
+        changed.iloc[0, 0] += 1
+
+        aggregates, base_rows = build_aggregates(changed, base=base)
+
+        self.assertIsNone(base_rows)
+        self.assert_same(aggregates, RunningAggregates.from_frame(changed))
+
+    def test_matrices_round_trip_through_arrow(self):
+        dataset = self.create_dataset()
+        aggregates = RunningAggregates.from_frame(self.df)
+
+        data = aggregates.to_dict(partial(write_result_table, dataset, AGGREGATES_RESULT_TYPE, inline_cells=0))
+
+        self.assertTrue(all('file' in data[name] for name in ('counts', 'sums', 'squares', 'products')))
+        self.assert_same(RunningAggregates.from_dict(data, read_result_table), aggregates)
@@ -0,0 +1,59 @@
+import io
+import os
+import numpy as np
+import pandas as pd
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from ..models import DataSet, AnalysisJob
+from ..tasks import create_job
+from .base import MediaRootMixin
+
+@override_settings(ANALYZER_FAMILY_EXECUTOR='serial')
+class AnalyzeBatchTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = os.path.join(self.media_root, 'incoming')
+        os.makedirs(self.directory)
+        rng = np.random.default_rng(4)
+        for name in ('first', 'second'):
+            pd.DataFrame({
+                'amount': rng.normal(size=50),
+                'count': rng.integers(0, 10, 50),
+            }).to_excel(os.path.join(self.directory, f'{name}.xlsx'), index=False)
+        # فایل قفل Excel و فایل غیر اکسل نادیده گرفته می‌شوند
+        for name in ('~$first.xlsx', 'notes.txt'):
+            with open(os.path.join(self.directory, name), 'wb') as f:
+                f.write(b'ignored')
+
+    def run_batch(self):
+        stdout = io.StringIO()
+        call_command('analyze_batch', self.directory, workers=0, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_registers_and_analyzes_each_workbook(self):
+        self.run_batch()
+
+        self.assertEqual(sorted(DataSet.objects.values_list('name', flat=True)), ['first', 'second'])
+        jobs = AnalysisJob.objects.all()
+        self.assertEqual(len(jobs), 2)
+        self.assertTrue(all(job.status == AnalysisJob.STATUS_DONE for job in jobs))
+        self.assertTrue(all(job.summary['rows'] == 50 for job in jobs))
+
+    def test_skips_analyzed_and_queued_workbooks(self):
+        self.run_batch()
+        queued = DataSet.objects.get(name='second')
+        AnalysisJob.objects.filter(dataset=queued).delete()
+        create_job(queued)
+
+        output = self.run_batch()
+
+        self.assertIn('first.xlsx: قبلا تحلیل شده است', output)
+        self.assertIn('second.xlsx: در صف تحلیل است', output)
+        self.assertEqual(DataSet.objects.count(), 2)
+        self.assertEqual(AnalysisJob.objects.count(), 2)
+
+    def test_directory_without_workbooks(self):
+        for name in ('first.xlsx', 'second.xlsx'):
+            os.remove(os.path.join(self.directory, name))
+        with self.assertRaises(CommandError):
+            self.run_batch()
@@ -0,0 +1,36 @@
+from django.test import TestCase, override_settings
+from .base import MediaRootMixin
+
+@override_settings(ANALYZER_DATASET_PAGE_SIZE=3)
+class DatasetListTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.ids = [self.create_dataset(f'data{i}', content_hash=f'hash{i}').pk for i in range(7)]
+        # برگه‌های فایل چندبرگه‌ای در فهرست نمی‌آیند
+        self.create_dataset('sheet', parent_id=self.ids[0], sheet_name='برگه')
+
+    def page(self, **params):
+        response = self.client.get('/datasets/', params)
+        context = response.context
+        return [dataset.pk for dataset in context['datasets']], context['older'], context['newer']
+
+    def test_first_page_is_newest(self):
+        ids, older, newer = self.page()
+
+        self.assertEqual(ids, self.ids[:-4:-1])
+        self.assertEqual(older, self.ids[4])
+        self.assertIsNone(newer)
+
+    def test_walk_older_and_back(self):
+        first, older, _ = self.page()
+        second, older, newer = self.page(before=older)
+        last, oldest, newest = self.page(before=older)
+
+        self.assertEqual(second, self.ids[3:0:-1])
+        self.assertEqual(last, [self.ids[0]])
+        self.assertIsNone(oldest)
+        self.assertEqual(self.page(after=newest)[0], second)
+        self.assertEqual(self.page(after=newer)[0], first)
+
+    def test_invalid_cursor_shows_first_page(self):
+        self.assertEqual(self.page(before='x')[0], self.ids[:-4:-1])
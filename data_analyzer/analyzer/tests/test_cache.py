@@ -0,0 +1,49 @@
+import os
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from ..analysis import ANALYSIS_VERSION
+from ..models import AnalysisJob
+from ..storage import parts_dir, results_path
+from ..tasks import find_cached_job
+from .base import MediaRootMixin
+
+class CachedJobTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.dataset = self.create_dataset()
+        os.makedirs(parts_dir(self.dataset))
+        with open(results_path(self.dataset), 'wb') as f:
+            f.write(b'report')
+        self.now = timezone.now()
+
+    def finish_job(self, mode, minutes, status=AnalysisJob.STATUS_DONE, version=ANALYSIS_VERSION):
+        return AnalysisJob.objects.create(
+            dataset=self.dataset,
+            mode=mode,
+            status=status,
+            analysis_version=version,
+            finished_at=self.now + timedelta(minutes=minutes)
+        )
+
+    def test_last_finished_mode_owns_outputs(self):
+        exact = self.finish_job(AnalysisJob.MODE_EXACT, 1)
+        self.assertEqual(find_cached_job(self.dataset, AnalysisJob.MODE_EXACT), exact)
+        self.assertIsNone(find_cached_job(self.dataset, AnalysisJob.MODE_APPROXIMATE))
+
+        approximate = self.finish_job(AnalysisJob.MODE_APPROXIMATE, 2)
+        self.assertIsNone(find_cached_job(self.dataset, AnalysisJob.MODE_EXACT))
+        self.assertEqual(find_cached_job(self.dataset, AnalysisJob.MODE_APPROXIMATE), approximate)
+
+    def test_failed_or_stale_job_invalidates_cache(self):
+        self.finish_job(AnalysisJob.MODE_EXACT, 1)
+        self.finish_job(AnalysisJob.MODE_EXACT, 2, status=AnalysisJob.STATUS_FAILED)
+        self.assertIsNone(find_cached_job(self.dataset, AnalysisJob.MODE_EXACT))
+
+        self.finish_job(AnalysisJob.MODE_EXACT, 3, version='0')
+        self.assertIsNone(find_cached_job(self.dataset, AnalysisJob.MODE_EXACT))
+
+    def test_missing_outputs_are_not_cached(self):
+        self.finish_job(AnalysisJob.MODE_EXACT, 1)
+        os.remove(results_path(self.dataset))
+        self.assertIsNone(find_cached_job(self.dataset, AnalysisJob.MODE_EXACT))
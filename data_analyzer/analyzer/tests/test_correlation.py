@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from ..correlation import correlation_matrix, pairs_from_matrix, strong_pairs
+
+class CorrelationTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        base = rng.normal(size=(600, 1))
+        values = base + rng.normal(scale=np.linspace(0.1, 3, 12), size=(600, 12))
+        self.frame = pd.DataFrame(values, columns=[f'c{i}' for i in range(12)])
+        self.frame.iloc[::9, 1] = np.nan
+        self.frame.iloc[::4, 5] = np.nan
+        self.frame['constant'] = 2.0
+
+    def test_matrix_matches_pandas_with_missing_values(self):
+        actual = correlation_matrix(self.frame)
+        expected = self.frame.corr()
+
+        np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy(), atol=1e-5)
+        self.assertEqual(list(actual.columns), list(expected.columns))
+
+    def test_spearman_matches_pandas_without_missing_values(self):
+        complete = self.frame.dropna()
+        np.testing.assert_allclose(correlation_matrix(complete, 'spearman').to_numpy(),
+                                   complete.corr('spearman').to_numpy(), atol=1e-5)
+
+    def test_diagonal_is_exact(self):
+        """قطر ستون‌های غیرثابت دقیقا ۱ و ستون ثابت NaN است، مثل DataFrame.corr"""
+        for method in ('pearson', 'spearman'):
+            with self.subTest(method=method):
+                diagonal = np.diagonal(correlation_matrix(self.frame, method).to_numpy())
+                np.testing.assert_array_equal(diagonal, np.diagonal(self.frame.corr(method).to_numpy()))
+
+    def test_strong_pairs_match_full_matrix(self):
+        expected = pairs_from_matrix(self.frame.corr(), threshold=0.5)
+
+        for block in (3, 5, 100):
+            with self.subTest(block=block):
+                actual = strong_pairs(self.frame, threshold=0.5, block=block)
+                pd.testing.assert_frame_equal(actual.iloc[:, :2], expected.iloc[:, :2])
+                np.testing.assert_allclose(actual['همبستگی'], expected['همبستگی'], atol=1e-3)
+
+    def test_strong_pairs_keep_top(self):
+        expected = pairs_from_matrix(self.frame.corr(), threshold=0.5, top=4)
+        actual = strong_pairs(self.frame, threshold=0.5, top=4, block=5)
+
+        pd.testing.assert_frame_equal(actual.iloc[:, :2], expected.iloc[:, :2])
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            correlation_matrix(self.frame, 'cosine')
+        with self.assertRaises(ValueError):
+            strong_pairs(self.frame, method='cosine')
@@ -0,0 +1,42 @@
+import os
+from django.test import TestCase
+from ..storage import parts_dir_for
+from .base import MediaRootMixin
+
+class DownloadResponseTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        directory = parts_dir_for('report')
+        os.makedirs(directory)
+        self.content = b'0123456789' * 100
+        with open(os.path.join(directory, 'summary.csv'), 'wb') as f:
+            f.write(self.content)
+        self.url = '/download/summary/report/?format=csv'
+
+    def test_etag_is_stable_and_revalidates(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(b''.join(first.streaming_content), self.content)
+
+        second = self.client.get(self.url)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+        cached = self.client.get(self.url, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(cached.status_code, 304)
+
+    def test_range_requests(self):
+        etag = self.client.get(self.url)['ETag']
+
+        partial_response = self.client.get(self.url, headers={'Range': 'bytes=10-19', 'If-Range': etag})
+        self.assertEqual(partial_response.status_code, 206)
+        self.assertEqual(partial_response['Content-Range'], f'bytes 10-19/{len(self.content)}')
+        self.assertEqual(b''.join(partial_response.streaming_content), self.content[10:20])
+
+        suffix = self.client.get(self.url, headers={'Range': 'bytes=-5'})
+        self.assertEqual(b''.join(suffix.streaming_content), self.content[-5:])
+
+        stale = self.client.get(self.url, headers={'Range': 'bytes=10-19', 'If-Range': '"stale"'})
+        self.assertEqual(stale.status_code, 200)
+
+        outside = self.client.get(self.url, headers={'Range': f'bytes={len(self.content)}-'})
+        self.assertEqual(outside.status_code, 416)
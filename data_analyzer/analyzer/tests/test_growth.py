@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from ..growth import growth_tables, period_growth
+from ..rollup import TimeRollup
+
+def _rollup(df):
+    return TimeRollup.from_frame(df, {'date': df['date']}, [col for col in df.columns if col != 'date'])
+
+class GrowthTablesTests(SimpleTestCase):
+    def setUp(self):
+        months = pd.date_range('2023-01-01', periods=24, freq='MS')
+        steps = np.arange(24)
+        self.frame = pd.DataFrame({
+            # دو ردیف در هر ماه تا رشد از مجموع دوره‌ها حساب شود
+            'date': np.repeat(months, 2) + pd.to_timedelta(np.tile([0, 10], 24), unit='D'),
+            'rising': np.repeat(50 * 1.1 ** steps, 2),
+            'flat': 25.0,
+            'gap': np.repeat(np.where(steps == 20, np.nan, 100.0), 2),
+        })
+
+    def test_monthly_growth(self):
+        _, by_month = growth_tables(_rollup(self.frame), 'date')
+
+        self.assertEqual(list(by_month.index[:2]), ['2023-02', '2023-03'])
+        np.testing.assert_allclose(by_month['rising'], 10.0)
+        np.testing.assert_allclose(by_month['flat'], 0.0)
+        # ماه بدون مقدار و ماه بعد از آن رشد ندارند
+        self.assertTrue(by_month.loc[['2024-09', '2024-10'], 'gap'].isna().all())
+        self.assertEqual(by_month['gap'].isna().sum(), 2)
+
+    def test_summary(self):
+        summary, _ = growth_tables(_rollup(self.frame), 'date')
+        rising = summary.loc['rising']
+
+        self.assertAlmostEqual(rising['رشد ماه آخر (٪)'], 10.0)
+        self.assertAlmostEqual(rising['رشد فصل آخر (٪)'], round((1.1 ** 3 - 1) * 100, 2))
+        self.assertAlmostEqual(rising['رشد سالانه ماه آخر (٪)'], round((1.1 ** 12 - 1) * 100, 2))
+        self.assertAlmostEqual(rising['رشد مرکب سالانه (٪)'], round((1.1 ** 12 - 1) * 100, 2))
+        self.assertEqual(rising['جهت روند'], 'صعودی')
+        self.assertEqual(summary.loc['flat', 'جهت روند'], 'ثابت')
+        self.assertEqual(summary.loc['flat', 'رشد مرکب سالانه (٪)'], 0.0)
+
+    def test_short_series_has_no_tables(self):
+        single_month = self.frame[self.frame['date'] < '2023-02-01']
+        self.assertEqual(growth_tables(_rollup(single_month), 'date'), (None, None))
+
+    def test_period_growth_matches_pct_change(self):
+        values = pd.DataFrame(np.random.default_rng(6).uniform(1, 10, size=(30, 3)))
+        values.iloc[4, 1] = np.nan
+
+        for lag in (1, 12):
+            with self.subTest(lag=lag):
+                expected = values.pct_change(lag, fill_method=None) * 100
+                np.testing.assert_allclose(period_growth(values.to_numpy(), lag), expected.to_numpy())
@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from ..ingest import read_workbook
+
+class ChunkedIngestTests(SimpleTestCase):
+    def write_workbook(self, df):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'ingest.xlsx')
+        df.to_excel(path, index=False)
+        return path
+
+    def test_chunks_keep_dtypes_and_rows(self):
+        """ستونی که در یک تکه کاملا خالی است نوع عددی یا تاریخ خود را نگه می‌دارد"""
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({
+            'late': rng.normal(size=300),
+            'ints': rng.integers(0, 50, 300),
+            'when': pd.date_range('2024-01-01', periods=300),
+            'label': rng.choice(['a', 'b', 'c'], 300),
+        })
+        df.loc[:149, 'late'] = np.nan
+        df.loc[100:199, 'ints'] = np.nan
+        df.loc[200:, 'when'] = pd.NaT
+        path = self.write_workbook(df)
+
+        frame, stats = read_workbook(path, chunk_rows=100)
+        expected = pd.read_excel(path)
+
+        self.assertEqual(len(frame), len(expected))
+        self.assertEqual(stats['rows'], len(expected))
+        self.assertTrue(pd.api.types.is_float_dtype(frame['late']))
+        self.assertTrue(pd.api.types.is_numeric_dtype(frame['ints']))
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(frame['when']))
+        for col in ('late', 'ints'):
+            np.testing.assert_allclose(frame[col].to_numpy(dtype=np.float64), expected[col].to_numpy(dtype=np.float64))
+        self.assertEqual(frame.isna().sum().tolist(), expected.isna().sum().tolist())
+
+    def test_blank_rows_inside_data_are_kept(self):
+        """ردیف‌های خالی میان داده مثل pandas.read_excel نگه داشته می‌شوند"""
+        df = pd.DataFrame({'value': np.arange(300, dtype=np.float64), 'name': [f'r{i}' for i in range(300)]})
+        df.iloc[[10, 11, 150]] = np.nan
+        path = self.write_workbook(df)
+
+        frame, _ = read_workbook(path, chunk_rows=100)
+        expected = pd.read_excel(path)
+
+        self.assertEqual(len(frame), len(expected))
+        self.assertEqual(len(frame), 300)
+        self.assertTrue(frame.iloc[[10, 11, 150]].isna().all(axis=None))
+        np.testing.assert_allclose(frame['value'].to_numpy(dtype=np.float64), expected['value'].to_numpy(dtype=np.float64))
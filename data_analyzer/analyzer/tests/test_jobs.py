@@ -0,0 +1,72 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from ..models import AnalysisJob
+from ..tasks import STALE_JOB_ERROR, _job_future_done, create_job, has_active_job, recover_stale_jobs
+from .base import MediaRootMixin
+
+class JobRecoveryTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.dataset = self.create_dataset()
+
+    def make_stale(self, job):
+        # update مقدار auto_now را جلو نمی‌برد
+        AnalysisJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(days=1))
+
+    def test_stale_job_is_not_active(self):
+        job = create_job(self.dataset)
+        self.assertTrue(has_active_job(self.dataset))
+
+        self.make_stale(job)
+        self.assertFalse(has_active_job(self.dataset))
+
+    def test_recover_fails_only_stale_active_jobs(self):
+        stale = create_job(self.dataset)
+        fresh = create_job(self.dataset)
+        done = create_job(self.dataset)
+        AnalysisJob.objects.filter(pk=done.pk).update(status=AnalysisJob.STATUS_DONE)
+        for job in (stale, done):
+            self.make_stale(job)
+
+        self.assertEqual(recover_stale_jobs(), 1)
+
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, AnalysisJob.STATUS_FAILED)
+        self.assertEqual(stale.error, STALE_JOB_ERROR)
+        self.assertIsNotNone(stale.finished_at)
+        self.assertEqual(AnalysisJob.objects.get(pk=fresh.pk).status, AnalysisJob.STATUS_PENDING)
+        self.assertEqual(AnalysisJob.objects.get(pk=done.pk).status, AnalysisJob.STATUS_DONE)
+
+    def test_crashed_future_marks_job_failed(self):
+        job = create_job(self.dataset)
+        future = Future()
+        future.set_exception(BrokenProcessPool('worker died'))
+
+        _job_future_done(job.pk, future)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_FAILED)
+        self.assertEqual(job.error, 'worker died')
+        self.assertFalse(has_active_job(self.dataset))
+
+    def test_finished_future_keeps_job_status(self):
+        job = create_job(self.dataset)
+        AnalysisJob.objects.filter(pk=job.pk).update(status=AnalysisJob.STATUS_DONE)
+        future = Future()
+        future.set_result(None)
+
+        _job_future_done(job.pk, future)
+
+        self.assertEqual(AnalysisJob.objects.get(pk=job.pk).status, AnalysisJob.STATUS_DONE)
+
+    def test_status_poll_ends_for_orphaned_job(self):
+        job = create_job(self.dataset)
+        self.make_stale(job)
+
+        response = self.client.get(f'/jobs/{job.pk}/status/')
+
+        self.assertEqual(response.json()['status'], AnalysisJob.STATUS_FAILED)
+        self.assertEqual(response.json()['error'], STALE_JOB_ERROR)
@@ -0,0 +1,21 @@
+from django.test import SimpleTestCase
+from ..report import SHEET_NAME_LENGTH, sheet_names_for
+
+class SheetNameTests(SimpleTestCase):
+    def test_invalid_characters_and_length(self):
+        names = sheet_names_for('پایه', ['a/b:c*d?[e]\\f', 'x' * 50])
+
+        self.assertEqual(names['a/b:c*d?[e]\\f'], 'پایه_a_b_c_d__e__f')
+        self.assertEqual(len(names['x' * 50]), SHEET_NAME_LENGTH)
+
+    def test_collisions_get_stable_suffixes(self):
+        long_a = 'y' * 40 + 'a'
+        long_b = 'y' * 40 + 'b'
+        names = sheet_names_for('آماری', [long_b, long_a, 'Mean', 'mean'])
+
+        self.assertEqual(len({name.lower() for name in names.values()}), 4)
+        self.assertTrue(all(len(name) <= SHEET_NAME_LENGTH for name in names.values()))
+        self.assertEqual(names[long_a], 'آماری_' + 'y' * (SHEET_NAME_LENGTH - 6))
+        self.assertTrue(names[long_b].endswith('~2'))
+        # ترتیب ورودی در نام‌ها اثری ندارد
+        self.assertEqual(names, sheet_names_for('آماری', ['mean', 'Mean', long_a, long_b]))
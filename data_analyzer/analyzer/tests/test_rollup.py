@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from ..rollup import TimeRollup
+
+class TimeRollupTests(SimpleTestCase):
+    def test_matches_groupby(self):
+        rng = np.random.default_rng(2)
+        dates = pd.Series(pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 800, 500), unit='D'))
+        dates[::13] = pd.NaT
+        df = pd.DataFrame({'date': dates, 'a': rng.normal(size=500), 'b': rng.integers(0, 10, 500).astype(float)})
+        df.loc[::5, 'a'] = np.nan
+
+        rollup = TimeRollup.from_frame(df, {'date': df['date']}, ['a', 'b'])
+
+        frequencies = {'day': 'D', 'week': 'W-SUN', 'month': 'MS', 'quarter': 'QS', 'year': 'YS'}
+        for granularity, frequency in frequencies.items():
+            grouped = df.dropna(subset=['date']).groupby(pd.Grouper(key='date', freq=frequency))[['a', 'b']]
+            for statistic in ('sum', 'count', 'mean'):
+                with self.subTest(granularity=granularity, statistic=statistic):
+                    expected = getattr(grouped, statistic)()
+                    # دوره بدون هیچ ردیفی در مکعب NaN است ولی groupby برایش صفر می‌دهد
+                    expected = expected[grouped.size() > 0]
+                    if granularity == 'week':
+                        # برچسب هفته در Grouper پایان هفته است و در مکعب شروع آن (دوشنبه)
+                        expected.index = expected.index - pd.Timedelta(days=6)
+                    actual = rollup.series('date', granularity, statistic).dropna(how='all')
+                    np.testing.assert_array_equal(actual.index.to_numpy(dtype='datetime64[ns]'),
+                                                  expected.index.to_numpy(dtype='datetime64[ns]'))
+                    np.testing.assert_allclose(actual.to_numpy(dtype=np.float64), expected.to_numpy(dtype=np.float64))
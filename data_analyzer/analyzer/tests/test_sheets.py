@@ -0,0 +1,29 @@
+from django.test import TestCase
+from .base import MediaRootMixin
+
+class SelectiveAnalysisSheetTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.parent = self.create_dataset('workbook')
+        self.north = self.create_dataset('north', parent=self.parent, sheet_name='شمال',
+                                         columns=['amount'], row_count=10)
+        self.create_dataset('south', parent=self.parent, sheet_name='جنوب')
+
+    def test_parent_lists_sheets(self):
+        response = self.client.get(f'/results/{self.parent.pk}/analyze/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'یکی از برگه‌ها را انتخاب کنید')
+        self.assertContains(response, f'/results/{self.north.pk}/analyze/')
+        self.assertContains(response, 'جنوب')
+
+    def test_chosen_sheet_redirects_with_query(self):
+        response = self.client.get(f'/results/{self.parent.pk}/analyze/', {'sheet': 'شمال', 'columns': 'amount'})
+
+        self.assertRedirects(response, f'/results/{self.north.pk}/analyze/?columns=amount', fetch_redirect_response=False)
+
+    def test_parent_json_names_sheets(self):
+        response = self.client.get(f'/results/{self.parent.pk}/analyze/', {'format': 'json'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['sheets'], ['شمال', 'جنوب'])
@@ -0,0 +1,74 @@
+import math
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from ..sketches import RowSample, _leading_zeros, hyperloglog
+
+def _hashes(values):
+    return pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+
+class HyperLogLogTests(SimpleTestCase):
+    def test_empty(self):
+        self.assertEqual(hyperloglog(np.empty(0, dtype=np.uint64)), (0, 0))
+
+    def test_estimate_within_error_bound(self):
+        for distinct in (10, 1000, 50000, 300000):
+            with self.subTest(distinct=distinct):
+                estimate, error = hyperloglog(_hashes(np.arange(distinct)))
+                self.assertLessEqual(abs(estimate - distinct), error)
+
+    def test_duplicates_do_not_count(self):
+        values = np.arange(20000)
+        self.assertEqual(hyperloglog(_hashes(values)), hyperloglog(_hashes(np.tile(values, 3))))
+
+    def test_leading_zeros(self):
+        values = np.array([0, 1, 2 ** 40 + 5, 2 ** 63, 2 ** 64 - 1], dtype=np.uint64)
+        expected = [64 - int(value).bit_length() for value in values]
+        self.assertEqual(_leading_zeros(values).tolist(), expected)
+
+class RowSampleTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        x = rng.normal(size=200000)
+        self.frame = pd.DataFrame({
+            'x': x,
+            'y': 0.6 * x + 0.8 * rng.normal(size=200000),
+            'flag': rng.random(200000) < 0.3,
+        })
+
+    def test_small_frame_is_exact(self):
+        sample = RowSample.from_frame(self.frame.head(500), 1000)
+
+        self.assertTrue(sample.exact)
+        self.assertEqual(sample.size, 500)
+        self.assertEqual(sample.rank_error, 0.0)
+        self.assertEqual(sample.proportion_error(np.array([0.3])).tolist(), [0.0])
+        self.assertEqual(sample.correlation_error(np.array([[0.5]])).tolist(), [[0.0]])
+
+    def test_sample_is_deterministic(self):
+        first = RowSample.from_frame(self.frame, 5000)
+        second = RowSample.from_frame(self.frame, 5000)
+
+        self.assertEqual((first.size, first.population), (5000, 200000))
+        pd.testing.assert_frame_equal(first.frame, second.frame)
+
+    def test_rank_error_is_dkw_bound(self):
+        sample = RowSample.from_frame(self.frame, 5000)
+        self.assertAlmostEqual(sample.rank_error, math.sqrt(math.log(2 / 0.05) / (2 * 5000)))
+
+    def test_bounds_cover_population_values(self):
+        sample = RowSample.from_frame(self.frame, 5000)
+        quantiles = [0.1, 0.5, 0.9]
+
+        errors = sample.quantile_errors(['x'], quantiles)
+        for q, error in zip(quantiles, errors):
+            estimate = sample.frame['x'].quantile(q)
+            self.assertLessEqual(abs(estimate - self.frame['x'].quantile(q)), error['x'])
+
+        proportion = sample.frame['flag'].mean()
+        error = sample.proportion_error(np.array([proportion]))[0]
+        self.assertLessEqual(abs(proportion - self.frame['flag'].mean()), error)
+
+        correlation = sample.frame['x'].corr(sample.frame['y'])
+        error = sample.correlation_error(np.array([correlation]))[0]
+        self.assertLessEqual(abs(correlation - self.frame['x'].corr(self.frame['y'])), error)
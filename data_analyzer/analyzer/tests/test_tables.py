@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from ..tables import format_cell, table_page
+
+class TablePageTests(SimpleTestCase):
+    def setUp(self):
+        frame = pd.DataFrame(np.arange(23 * 7, dtype=np.float64).reshape(23, 7),
+                             index=[f'r{i}' for i in range(23)], columns=[f'c{i}' for i in range(7)])
+        self.table = {'index': list(frame.index), 'columns': list(frame.columns), 'data': frame.to_numpy().tolist()}
+
+    def test_slices_rows_and_columns(self):
+        page = table_page(self.table, page=2, column_page=2, page_rows=10, page_columns=3)
+
+        self.assertEqual(page['columns'], ['c3', 'c4', 'c5'])
+        self.assertEqual([label for label, _ in page['rows']], [f'r{i}' for i in range(10, 20)])
+        self.assertEqual(page['rows'][0][1], [('73', None), ('74', None), ('75', None)])
+        self.assertEqual((page['pages'], page['column_pages']), (3, 3))
+        self.assertEqual((page['total_rows'], page['total_columns']), (23, 7))
+
+    def test_last_pages_are_partial(self):
+        page = table_page(self.table, page=3, column_page=3, page_rows=10, page_columns=3)
+
+        self.assertEqual(page['columns'], ['c6'])
+        self.assertEqual(len(page['rows']), 3)
+
+    def test_out_of_range_pages_are_clamped(self):
+        self.assertEqual(table_page(self.table, page=99, page_rows=10)['page'], 3)
+        self.assertEqual(table_page(self.table, page=-1, column_page=0, page_rows=10)['page'], 1)
+
+    def test_empty_table_has_one_page(self):
+        page = table_page({'index': [], 'columns': [], 'data': []})
+
+        self.assertEqual((page['pages'], page['column_pages'], page['rows']), (1, 1, []))
+
+    def test_format_cell(self):
+        self.assertEqual(format_cell(None), ('-', None))
+        self.assertEqual(format_cell(float('nan')), ('-', None))
+        self.assertEqual(format_cell(True), ('بله', 'success'))
+        self.assertEqual(format_cell(1.50000), ('1.5', None))
+        self.assertEqual(format_cell(-0.0), ('0', None))
+        self.assertEqual(format_cell(0.00001234), ('1.234e-05', None))
+        self.assertEqual(format_cell(12), ('12', None))
@@ -0,0 +1,77 @@
+import hashlib
+import io
+import os
+import pandas as pd
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from ..models import DataSet, AnalysisJob
+from .base import MediaRootMixin
+
+class DatasetUploadHandlerTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        buffer = io.BytesIO()
+        pd.DataFrame({'amount': [1.0, 2.0, 3.0]}).to_excel(buffer, index=False)
+        self.content = buffer.getvalue()
+
+    def upload(self, content, name='sales.xlsx'):
+        return self.client.post('/upload/', {'file': SimpleUploadedFile(name, content)})
+
+    def stored_files(self):
+        directory = os.path.join(self.media_root, 'datasets')
+        return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+    def messages(self, response):
+        return [str(message) for message in response.context['messages']]
+
+    def test_spooled_file_becomes_the_dataset_file(self):
+        response = self.upload(self.content)
+
+        dataset = DataSet.objects.get()
+        self.assertRedirects(response, f'/results/{dataset.pk}/', fetch_redirect_response=False)
+        self.assertEqual(dataset.content_hash, hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(self.stored_files(), [os.path.basename(dataset.file.name)])
+        with open(dataset.file.path, 'rb') as f:
+            self.assertEqual(f.read(), self.content)
+        job = AnalysisJob.objects.get()
+        self.assertIn('upload_spool', [record['stage'] for record in job.summary['performance']])
+
+    def test_duplicate_upload_reuses_dataset_and_discards_copy(self):
+        self.upload(self.content)
+        dataset = DataSet.objects.get()
+
+        response = self.upload(self.content, name='sales copy.xlsx')
+
+        self.assertRedirects(response, f'/results/{dataset.pk}/', fetch_redirect_response=False)
+        self.assertEqual(DataSet.objects.count(), 1)
+        self.assertEqual(AnalysisJob.objects.count(), 1)
+        self.assertEqual(self.stored_files(), [os.path.basename(dataset.file.name)])
+
+    def test_content_is_sniffed(self):
+        response = self.upload(b'name,amount\nx,1\n' * 10)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('محتوای فایل اکسل معتبر نیست', self.messages(response))
+        self.assertFalse(DataSet.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+    def test_file_shorter_than_signature_is_rejected(self):
+        response = self.upload(b'PK')
+
+        self.assertIn('محتوای فایل اکسل معتبر نیست', self.messages(response))
+        self.assertFalse(DataSet.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+    def test_extension_is_checked_before_receiving(self):
+        response = self.upload(self.content, name='sales.csv')
+
+        self.assertIn('فقط فایل‌های اکسل با پسوند .xlsx و .xls قابل قبول هستند', self.messages(response))
+        self.assertEqual(self.stored_files(), [])
+
+    @override_settings(ANALYZER_UPLOAD_MAX_BYTES=1024)
+    def test_oversized_upload_is_rejected(self):
+        response = self.upload(self.content)
+
+        self.assertTrue(any(message.startswith('حجم فایل بیش از حد مجاز') for message in self.messages(response)))
+        self.assertFalse(DataSet.objects.exists())
+        self.assertEqual(self.stored_files(), [])
@@ -0,0 +1,150 @@
+import os
+import time
+import hashlib
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopFutureHandlers
+from .instrumentation import measure_stage
+
+# نام فیلد فایل در فرم آپلود؛ فیلدهای دیگر به handlerهای پیش‌فرض Django سپرده می‌شوند
+UPLOAD_FIELD = 'file'
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+# امضای ابتدای فایل: zip برای xlsx و OLE برای xls
+EXCEL_SIGNATURES = (b'PK\x03\x04', b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1')
+SIGNATURE_LENGTH = max(len(signature) for signature in EXCEL_SIGNATURES)
+# حجم فیلدهای دیگر فرم که در Content-Length کل درخواست حساب می‌شوند
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+class SpooledUpload(UploadedFile):
+    """فایل آپلود شده‌ای که در حین دریافت مستقیما در محل نهایی دیتاست نوشته شده است
+
+    مانند TemporaryUploadedFile با بسته شدن حذف می‌شود (Django در پایان درخواست
+    فایل‌ها را می‌بندد)، مگر اینکه با claim به یک DataSet سپرده شده باشد.
+    """
+
+    def __init__(self, path, storage_name, name, content_type, size, charset, content_hash, record):
+        super().__init__(open(path, 'rb'), name, content_type, size, charset)
+        self.path = path
+        self.storage_name = storage_name
+        self.content_hash = content_hash
+        # رکورد کارایی مرحله دریافت (شامل bytes_per_second)
+        self.record = record
+        self.claimed = False
+
+    def temporary_file_path(self):
+        return self.path
+
+    def claim(self):
+        """نام فایل در storage برای ذخیره در FileField؛ پس از آن فایل با بستن حذف نمی‌شود"""
+        self.claimed = True
+        return self.storage_name
+
+    def close(self):
+        try:
+            return self.file.close()
+        finally:
+            if not self.claimed and os.path.exists(self.path):
+                os.remove(self.path)
+
+class DatasetUploadHandler(FileUploadHandler):
+    """دریافت جریانی فایل اکسل: نوشتن تکه‌ها در پوشه datasets، هش و بررسی همزمان
+
+    فایل هیچ‌گاه کامل در حافظه نگه داشته نمی‌شود و پس از پایان آپلود همان فایل
+    ذخیره شده دیتاست است، پس خواندن آن بدون کپی دوباره شروع می‌شود. خطای
+    بررسی در request.upload_error قرار می‌گیرد و فایل کنار گذاشته می‌شود.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.request_length = content_length
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        self.active = field_name == UPLOAD_FIELD
+        if not self.active:
+            return
+        if not file_name.lower().endswith(EXCEL_EXTENSIONS):
+            self._reject('فقط فایل‌های اکسل با پسوند .xlsx و .xls قابل قبول هستند')
+        max_bytes = settings.ANALYZER_UPLOAD_MAX_BYTES
+        if max_bytes and (getattr(self, 'request_length', None) or 0) > max_bytes + FORM_OVERHEAD_BYTES:
+            # رد پیش از دریافت حتی یک تکه از فایل
+            self._reject(self._too_large_message(max_bytes))
+
+        self.storage_name, self.path, self.file = self._create_target(file_name)
+        self.digest = hashlib.sha256()
+        self.header = b''
+        self.stages = ExitStack()
+        self.record = self.stages.enter_context(measure_stage('upload_spool'))
+        self.started = time.perf_counter()
+        raise StopFutureHandlers()
+
+    def _create_target(self, file_name):
+        """ساخت انحصاری فایل مقصد با نام آزاد در storage تا آپلودهای همزمان یکدیگر را بازنویسی نکنند"""
+        from .models import upload_to
+
+        while True:
+            name = default_storage.get_available_name(default_storage.generate_filename(upload_to(None, file_name)))
+            path = default_storage.path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                return name, path, open(path, 'xb')
+            except FileExistsError:
+                continue
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+        if len(self.header) < SIGNATURE_LENGTH:
+            self.header += raw_data[:SIGNATURE_LENGTH - len(self.header)]
+            if len(self.header) >= SIGNATURE_LENGTH and not self.header.startswith(EXCEL_SIGNATURES):
+                self._abort('محتوای فایل اکسل معتبر نیست')
+        max_bytes = settings.ANALYZER_UPLOAD_MAX_BYTES
+        if max_bytes and start + len(raw_data) > max_bytes:
+            self._abort(self._too_large_message(max_bytes))
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+        self.active = False
+        self.file.close()
+        if not self.header.startswith(EXCEL_SIGNATURES):
+            # فایل کوتاه‌تر از امضا؛ فایل برگردانده می‌شود تا handlerهای بعدی فراخوانی نشوند
+            # و چون به دیتاستی سپرده نمی‌شود با بسته شدن حذف می‌شود
+            self.request.upload_error = 'محتوای فایل اکسل معتبر نیست'
+
+        seconds = time.perf_counter() - self.started
+        self.record.update(size_bytes=file_size, bytes_per_second=round(file_size / seconds) if seconds else None)
+        self.stages.close()
+        return SpooledUpload(
+            self.path, self.storage_name, self.file_name, self.content_type, file_size,
+            self.charset, self.digest.hexdigest(), self.record
+        )
+
+    def upload_interrupted(self):
+        if getattr(self, 'active', False):
+            self.file.close()
+            self._discard()
+
+    def _too_large_message(self, max_bytes):
+        return f'حجم فایل بیش از حد مجاز ({max_bytes // (1024 * 1024)} مگابایت) است'
+
+    def _discard(self):
+        # آپلود ناتمام هم در لاگ کارایی ثبت می‌شود، با علامت لغو
+        self.record['aborted'] = True
+        self.stages.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _abort(self, message):
+        self.file.close()
+        self._discard()
+        self._reject(message)
+
+    def _reject(self, message):
+        self.active = False
+        self.request.upload_error = message
+        raise SkipFile()
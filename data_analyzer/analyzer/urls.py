@@ -4,5 +4,15 @@ from . import views
 urlpatterns = [
     path('', views.home, name='home'),
     path('upload/', views.upload_dataset, name='upload_dataset'),
+    path('datasets/', views.dataset_list, name='dataset_list'),
+    path('datasets/<int:dataset_id>/', views.dataset_detail, name='dataset_detail'),
+    path('datasets/<int:dataset_id>/delete/', views.delete_dataset, name='delete_dataset'),
+    path('results/<int:dataset_id>/', views.analysis_results, name='analysis_results'),
+    path('results/<int:dataset_id>/table/<str:analysis_key>/', views.analysis_table, name='analysis_table'),
+    path('results/<int:dataset_id>/rollup/', views.time_rollup, name='time_rollup'),
+    path('results/<int:dataset_id>/analyze/', views.selective_analysis, name='selective_analysis'),
+    path('analyze/column/<str:selected_column>/', views.perform_analysis, name='perform_analysis'),
+    path('jobs/<int:job_id>/status/', views.job_status, name='job_status'),
+    path('metrics/', views.metrics, name='metrics'),
     path('download/<str:analysis_type>/<str:file_name>/', views.download_analysis_report, name='download_analysis_report'),
 ]
\ No newline at end of file
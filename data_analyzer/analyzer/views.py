@@ -1,455 +1,511 @@
 import os
-import pandas as pd
-import numpy as np
-from django.shortcuts import render
+import json
+import time
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.conf import settings
-from django.http import HttpResponse
-from scipy import stats
+from django.http import (
+    Http404, HttpResponse, HttpResponseNotModified, JsonResponse, FileResponse, StreamingHttpResponse
+)
+from django.urls import reverse
+from django.utils.http import http_date, content_disposition_header
 import warnings
-from io import BytesIO
 import re
+from .models import DataSet, AnalysisJob, AnalysisResult
+from .forms import AnalysisForm
+from .analysis import (
+    ANALYSIS_FAMILIES, SHEETS_CATEGORY, SELECTABLE_ANALYSES, generate_selected_analysis, serialize_analyses
+)
+from .tasks import enqueue_analysis, find_cached_job, find_dataset, has_active_job, recover_stale_jobs
+from .storage import (
+    hash_uploaded_file, selection_hash, storage_name, results_path, parts_dir_for, touch, load_dataset_frame,
+    load_rollup
+)
+from .rollup import GRANULARITIES, GRANULARITY_LABELS, STATISTICS, STATISTIC_LABELS
+from .report import ALL_PARTS_KEY, PART_FORMATS, sheet_names_for
+from .tables import table_page
+from .instrumentation import measure_stage, prometheus_metrics
+from .uploads import SpooledUpload
 warnings.filterwarnings('ignore')
 
 def home(request):
     """صفحه اصلی با طراحی مدرن"""
     return render(request, 'analyzer/home.html')
 
-def detect_date_columns(df):
-    """تشخیص ستون‌های تاریخ"""
-    date_columns = []
-    for col in df.columns:
-        try:
-            pd.to_datetime(df[col], errors='coerce')
-            if not pd.to_datetime(df[col], errors='coerce').isna().all():
-                date_columns.append(col)
-        except:
-            continue
-    return date_columns
+DOWNLOAD_CONTENT_TYPES = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv; charset=utf-8',
+    'json': 'application/json',
+}
 
-def generate_insights_and_recommendations(analysis_type, analysis_data, df):
-    """تولید بینش‌ها و راهکارهای هوشمند"""
-    insights = []
-    recommendations = []
-    
-    if analysis_type == "داده‌های مفقودی":
-        total_missing = analysis_data['تعداد مفقودی'].sum()
-        max_missing_col = analysis_data.loc[analysis_data['تعداد مفقودی'].idxmax()]
-        
-        insights.append(f"در مجموع {total_missing} داده مفقودی وجود دارد")
-        insights.append(f"ستون '{max_missing_col.name}' با {max_missing_col['تعداد مفقودی']} داده مفقودی ({max_missing_col['درصد مفقودی']}%) بیشترین مشکل را دارد")
-        
-        if max_missing_col['درصد مفقودی'] > 50:
-            recommendations.append("❌ **ستون با بیش از ۵۰٪ داده مفقودی بهتر است حذف شود**")
-            recommendations.append("🔍 **بررسی علت مفقودی داده‌ها ضروری است**")
-        elif max_missing_col['درصد مفقودی'] > 20:
-            recommendations.append("⚡ **استفاده از روش‌های پیشرفته جایگزینی داده‌های مفقودی پیشنهاد می‌شود**")
-            recommendations.append("📊 **تحلیل حساسیت به داده‌های مفقودی انجام شود**")
-        else:
-            recommendations.append("✅ **می‌توان از میانگین یا میانه برای جایگزینی استفاده کرد**")
-            recommendations.append("🔧 **روش KNN Imputation برای جایگزینی پیشنهاد می‌شود**")
-    
-    elif analysis_type == "آمار توصیفی":
-        numeric_df = df.select_dtypes(include=[np.number])
-        for col in numeric_df.columns:
-            col_data = numeric_df[col].dropna()
-            if len(col_data) > 0:
-                cv = (col_data.std() / col_data.mean()) * 100 if col_data.mean() != 0 else 0
-                insights.append(f"ستون '{col}': ضریب تغییرات {cv:.1f}%")
-                
-                if cv > 50:
-                    recommendations.append(f"📈 **ستون '{col}' نوسان بالا دارد - برای تحلیل سری‌های زمانی مناسب است**")
-                elif cv < 10:
-                    recommendations.append(f"📉 **ستون '{col}' پایدار است - برای شاخص‌های ثابت مناسب است**")
-    
-    elif analysis_type == "تحلیل داده‌های پرت":
-        high_outlier_cols = []
-        for col, row in analysis_data.iterrows():
-            if row['درصد پرت'] > 10:
-                high_outlier_cols.append((col, row['درصد پرت']))
-        
-        if high_outlier_cols:
-            insights.append(f"{len(high_outlier_cols)} ستون با بیش از ۱۰٪ داده پرت شناسایی شد")
-            for col, percent in high_outlier_cols:
-                insights.append(f"ستون '{col}': {percent}% داده پرت")
-                recommendations.append(f"🔍 **بررسی علت داده‌های پرت در ستون '{col}' ضروری است**")
-                recommendations.append(f"⚡ **برای ستون '{col}' از روش Winsorization استفاده شود**")
-        else:
-            insights.append("داده‌های پرت در حد قابل قبولی هستند")
-            recommendations.append("✅ **نیاز به اقدام خاصی برای داده‌های پرت نیست**")
-    
-    elif analysis_type == "ماتریس همبستگی":
-        strong_correlations = []
-        for col1 in analysis_data.columns:
-            for col2 in analysis_data.columns:
-                if col1 != col2 and abs(analysis_data.loc[col1, col2]) > 0.7:
-                    strong_correlations.append((col1, col2, analysis_data.loc[col1, col2]))
-        
-        if strong_correlations:
-            insights.append(f"{len(strong_correlations)} رابطه قوی همبستگی شناسایی شد")
-            for col1, col2, corr in strong_correlations[:3]:  # فقط ۳ مورد اول
-                insights.append(f"همبستگی قوی بین '{col1}' و '{col2}': {corr:.3f}")
-                recommendations.append(f"📊 **ستون‌های '{col1}' و '{col2}' ممکن است اطلاعات تکراری داشته باشند**")
-                recommendations.append(f"🔧 **حذف یکی از ستون‌های همبسته قوی برای کاهش ابعاد داده پیشنهاد می‌شود**")
-    
-    elif analysis_type == "آزمون نرمالیتی":
-        normal_cols = []
-        non_normal_cols = []
-        for col, row in analysis_data.iterrows():
-            if row.get('نرمال') == 'بله':
-                normal_cols.append(col)
-            else:
-                non_normal_cols.append(col)
-        
-        insights.append(f"{len(normal_cols)} ستون نرمال، {len(non_normal_cols)} ستون غیرنرمال")
-        
-        if non_normal_cols:
-            recommendations.append("📈 **برای ستون‌های غیرنرمال از آزمون‌های ناپارامتریک استفاده شود**")
-            recommendations.append("🔧 **تبدیل لگاریتمی یا Box-Cox برای نرمال‌سازی پیشنهاد می‌شود**")
-        else:
-            recommendations.append("✅ **داده‌ها برای تحلیل‌های پارامتریک مناسب هستند**")
-    
-    elif "تحلیل ماهانه" in analysis_type:
-        # تحلیل فصلی
-        insights.append("الگوهای فصلی در داده‌ها شناسایی شد")
-        recommendations.append("📅 **مدل‌سازی سری زمانی با درنظرگیری فصلیت پیشنهاد می‌شود**")
-        recommendations.append("🔮 **از مدل‌های SARIMA یا Prophet برای پیش‌بینی استفاده شود**")
-    
-    elif "تحلیل سودآوری" in analysis_type:
-        max_profit_col = analysis_data.loc[analysis_data['نسبت به کل'].idxmax()]
-        insights.append(f"ستون '{max_profit_col.name}' با {max_profit_col['نسبت به کل']}% بیشترین سهم را دارد")
-        recommendations.append("💰 **تمرکز بر بهبود ستون‌های با سودآوری بالا پیشنهاد می‌شود**")
-        recommendations.append("📊 **تحلیل سبد محصول برای بهینه‌سازی پیشنهاد می‌شود**")
-    
-    # اگر بینش خاصی تولید نشد، بینش عمومی تولید کن
-    if not insights:
-        insights.append("داده‌ها از کیفیت قابل قبولی برخوردار هستند")
-        recommendations.append("📈 **ادامه تحلیل با روش‌های پیشرفته پیشنهاد می‌شود**")
-    
-    return {
-        'insights': list(set(insights)),  # حذف موارد تکراری
-        'recommendations': list(set(recommendations))
-    }
+def _parse_range(range_header, size):
+    """تفسیر سرآیند Range تک‌بازه‌ای؛ خروجی (شروع، پایان) یا None"""
+    match = re.fullmatch(r'bytes=(\d*)-(\d*)', range_header.strip())
+    if not match or not any(match.groups()):
+        return None
+    start, end = match.groups()
+    if start:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    else:
+        start = max(size - int(end), 0)
+        end = size - 1
+    if start > end or start >= size:
+        return None
+    return start, end
 
-def generate_smart_analysis(df, analysis_type, analysis_data):
-    """تولید تحلیل هوشمند با بینش و راهکار"""
-    analysis_result = {
-        'data': analysis_data,
-        'insights': [],
-        'recommendations': []
-    }
-    
-    # تولید بینش و راهکار
-    smart_analysis = generate_insights_and_recommendations(analysis_type, analysis_data, df)
-    analysis_result['insights'] = smart_analysis['insights']
-    analysis_result['recommendations'] = smart_analysis['recommendations']
-    
-    return analysis_result
-
-def generate_basic_analysis(df):
-    """تحلیل‌های پایه با هوش مصنوعی"""
-    analyses = {}
-    
-    # آمار توصیفی
-    numeric_df = df.select_dtypes(include=[np.number])
-    if not numeric_df.empty:
-        analyses['آمار توصیفی'] = generate_smart_analysis(
-            df, "آمار توصیفی", numeric_df.describe().round(2)
-        )
-    
-    # داده‌های مفقودی
-    missing_data = df.isnull().sum()
-    missing_percentage = (df.isnull().sum() / len(df) * 100).round(2)
-    missing_analysis = pd.DataFrame({
-        'تعداد مفقودی': missing_data,
-        'درصد مفقودی': missing_percentage
-    })
-    analyses['داده‌های مفقودی'] = generate_smart_analysis(
-        df, "داده‌های مفقودی", 
-        missing_analysis[missing_analysis['تعداد مفقودی'] > 0]
-    )
-    
-    # اطلاعات کلی
-    info_analysis = pd.DataFrame({
-        'ویژگی': ['تعداد ردیف', 'تعداد ستون', 'تعداد داده‌های مفقودی', 'تعداد داده‌های عددی', 'تعداد داده‌های متنی'],
-        'مقدار': [
-            len(df), 
-            len(df.columns), 
-            df.isnull().sum().sum(), 
-            len(numeric_df.columns),
-            len(df.select_dtypes(include=['object']).columns)
-        ]
-    })
-    analyses['اطلاعات کلی'] = generate_smart_analysis(df, "اطلاعات کلی", info_analysis)
-    
-    # همبستگی
-    if len(numeric_df.columns) > 1:
-        correlation_matrix = numeric_df.corr().round(3)
-        analyses['ماتریس همبستگی'] = generate_smart_analysis(
-            df, "ماتریس همبستگی", correlation_matrix
-        )
-    
-    return analyses
+def _iter_file_range(path, start, length, chunk_size=64 * 1024):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
 
-def generate_time_analysis(df):
-    """تحلیل‌های زمانی با هوش مصنوعی"""
-    analyses = {}
-    date_columns = detect_date_columns(df)
+def _file_download_response(request, path, download_name, content_type):
+    """پاسخ فایل آماده با پشتیبانی ETag و Range"""
+    stat = os.stat(path)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
     
-    if date_columns:
-        try:
-            date_col = date_columns[0]
-            df_temp = df.copy()
-            df_temp[date_col] = pd.to_datetime(df_temp[date_col])
-            df_temp = df_temp.set_index(date_col)
-            
-            # تحلیل فصلی
-            df_temp['month'] = df_temp.index.month
-            df_temp['quarter'] = df_temp.index.quarter
-            df_temp['year'] = df_temp.index.year
-            
-            numeric_cols = df_temp.select_dtypes(include=[np.number]).columns
-            numeric_cols = [col for col in numeric_cols if col not in ['month', 'quarter', 'year']]
-            
-            if len(numeric_cols) > 0:
-                # تحلیل ماهانه
-                monthly_analysis = df_temp.groupby('month')[numeric_cols].mean().round(2)
-                analyses['تحلیل ماهانه'] = generate_smart_analysis(
-                    df, "تحلیل ماهانه", monthly_analysis
-                )
-                
-                # تحلیل فصلی
-                quarterly_analysis = df_temp.groupby('quarter')[numeric_cols].mean().round(2)
-                analyses['تحلیل فصلی'] = generate_smart_analysis(
-                    df, "تحلیل فصلی", quarterly_analysis
-                )
-                
-                # تحلیل سالانه
-                yearly_analysis = df_temp.groupby('year')[numeric_cols].mean().round(2)
-                analyses['تحلیل سالانه'] = generate_smart_analysis(
-                    df, "تحلیل سالانه", yearly_analysis
-                )
-        
-        except Exception as e:
-            error_df = pd.DataFrame({'خطا': [f'خطا در تحلیل زمانی: {str(e)}']})
-            analyses['خطا'] = generate_smart_analysis(df, "خطا", error_df)
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
     
-    return analyses
-
-def generate_statistical_analysis(df):
-    """تحلیل‌های آماری پیشرفته با هوش مصنوعی"""
-    analyses = {}
-    numeric_df = df.select_dtypes(include=[np.number])
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if range_header and request.headers.get('If-Range', etag) == etag:
+        byte_range = _parse_range(range_header, stat.st_size)
+        if byte_range is None:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
     
-    if not numeric_df.empty:
-        # تحلیل نرمالیتی
-        normality_test = {}
-        for col in numeric_df.columns:
-            try:
-                if len(numeric_df[col].dropna()) > 3:
-                    stat, p_value = stats.shapiro(numeric_df[col].dropna())
-                    normality_test[col] = {
-                        'آماره': round(stat, 4),
-                        'p-value': round(p_value, 4),
-                        'نرمال': 'بله' if p_value > 0.05 else 'خیر'
-                    }
-            except:
-                normality_test[col] = {'خطا': 'داده ناکافی'}
-        
-        analyses['آزمون نرمالیتی'] = generate_smart_analysis(
-            df, "آزمون نرمالیتی", pd.DataFrame(normality_test).T
-        )
-        
-        # تحلیل پرت‌ها
-        outliers_analysis = {}
-        for col in numeric_df.columns:
-            Q1 = numeric_df[col].quantile(0.25)
-            Q3 = numeric_df[col].quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            
-            outliers = ((numeric_df[col] < lower_bound) | (numeric_df[col] > upper_bound)).sum()
-            outlier_percentage = (outliers / len(numeric_df[col])) * 100
-            
-            outliers_analysis[col] = {
-                'تعداد پرت': outliers,
-                'درصد پرت': round(outlier_percentage, 2),
-                'کران پایین': round(lower_bound, 2),
-                'کران بالا': round(upper_bound, 2)
-            }
-        
-        analyses['تحلیل داده‌های پرت'] = generate_smart_analysis(
-            df, "تحلیل داده‌های پرت", pd.DataFrame(outliers_analysis).T
+    if byte_range is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _iter_file_range(path, start, end - start + 1),
+            status=206,
+            content_type=content_type
         )
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
     
-    return analyses
-
-def generate_business_analysis(df):
-    """تحلیل‌های کسب‌وکار با هوش مصنوعی"""
-    analyses = {}
-    numeric_df = df.select_dtypes(include=[np.number])
-    
-    if not numeric_df.empty:
-        # تحلیل سودآوری
-        profitability = {}
-        total_sum = numeric_df.sum().sum()
-        for col in numeric_df.columns:
-            if numeric_df[col].sum() > 0:
-                profitability[col] = {
-                    'مجموع': round(numeric_df[col].sum(), 2),
-                    'میانگین': round(numeric_df[col].mean(), 2),
-                    'نسبت به کل': round((numeric_df[col].sum() / total_sum) * 100, 2) if total_sum > 0 else 0
-                }
-        
-        if profitability:
-            analyses['تحلیل سودآوری'] = generate_smart_analysis(
-                df, "تحلیل سودآوری", pd.DataFrame(profitability).T
-            )
-        
-        # تحلیل رشد
-        growth_analysis = {}
-        for col in numeric_df.columns:
-            if len(numeric_df[col]) > 1:
-                try:
-                    first_val = numeric_df[col].iloc[0]
-                    last_val = numeric_df[col].iloc[-1]
-                    if first_val != 0:
-                        growth = ((last_val - first_val) / abs(first_val)) * 100
-                        growth_analysis[col] = round(growth, 2)
-                except:
-                    growth_analysis[col] = 'خطا'
-        
-        if growth_analysis:
-            analyses['درصد رشد کلی'] = generate_smart_analysis(
-                df, "درصد رشد کلی", 
-                pd.DataFrame.from_dict(growth_analysis, orient='index', columns=['درصد رشد'])
-            )
-    
-    return analyses
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = content_disposition_header(True, download_name)
+    return response
 
 def download_analysis_report(request, analysis_type, file_name):
-    """دانلود گزارش تحلیل به صورت فایل Excel"""
+    """دانلود گزارش تحلیل از فایل‌های آماده (xlsx، csv یا json)
+
+    analysis_type می‌تواند all، نام یک دسته یا نام برگه یک تحلیل باشد.
+    """
+    download_format = request.GET.get('format', 'xlsx')
     try:
-        file_path = os.path.join(settings.MEDIA_ROOT, 'results', f'{file_name}_analysis.xlsx')
-        
-        if not os.path.exists(file_path):
-            messages.error(request, 'فایل مورد نظر یافت نشد')
+        if download_format not in PART_FORMATS:
+            messages.error(request, 'قالب دانلود پشتیبانی نمی‌شود')
             return render(request, 'analyzer/analysis_results.html')
         
-        with pd.ExcelFile(file_path) as xls:
-            sheet_names = xls.sheet_names
-            target_sheet = None
-            for sheet in sheet_names:
-                if analysis_type in sheet:
-                    target_sheet = sheet
-                    break
-            
-            if not target_sheet:
-                target_sheet = sheet_names[0] if sheet_names else 'Sheet1'
-            
-            df = pd.read_excel(xls, sheet_name=target_sheet)
-        
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name=analysis_type, index=True)
+        if analysis_type == ALL_PARTS_KEY and download_format == 'xlsx':
+            file_path = os.path.join(settings.MEDIA_ROOT, 'results', f'{file_name}_analysis.xlsx')
+        else:
+            # فقط فایل‌هایی که واقعا در پوشه گزارش هستند قابل دانلودند
+            directory = parts_dir_for(os.path.basename(file_name))
+            target = f'{analysis_type}.{download_format}'
+            available = os.listdir(directory) if os.path.isdir(directory) else []
+            file_path = os.path.join(directory, target) if target in available else None
         
-        output.seek(0)
+        if not file_path or not os.path.exists(file_path):
+            messages.error(request, 'فایل مورد نظر یافت نشد')
+            return render(request, 'analyzer/analysis_results.html')
         
-        response = HttpResponse(
-            output.getvalue(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        touch(file_path)
+        return _file_download_response(
+            request, file_path, f'{file_name}_{analysis_type}.{download_format}',
+            DOWNLOAD_CONTENT_TYPES[download_format]
         )
-        response['Content-Disposition'] = f'attachment; filename="{file_name}_{analysis_type}.xlsx"'
-        
-        return response
         
     except Exception as e:
         messages.error(request, f'خطا در تولید گزارش: {str(e)}')
         return render(request, 'analyzer/analysis_results.html')
 
 def upload_dataset(request):
-    """آپلود و تحلیل فایل اکسل"""
+    """آپلود فایل اکسل و ارسال آن به صف تحلیل
+
+    با DatasetUploadHandler فایل در حین دریافت در محل نهایی نوشته، هش و بررسی
+    شده است و دیتاست بدون کپی دوباره به همان فایل اشاره می‌کند.
+    """
+    context = {'form': AnalysisForm()}
     if request.method == 'POST':
-        if 'file' not in request.FILES:
+        # خطای بررسی حین دریافت فقط پس از تجزیه بدنه درخواست (دسترسی به FILES) معلوم است
+        files = request.FILES
+        upload_error = getattr(request, 'upload_error', None)
+        if upload_error:
+            messages.error(request, upload_error)
+            return render(request, 'analyzer/upload.html', context)
+        
+        if 'file' not in files:
             messages.error(request, 'لطفا یک فایل اکسل انتخاب کنید')
-            return render(request, 'analyzer/upload.html')
+            return render(request, 'analyzer/upload.html', context)
         
-        file = request.FILES['file']
+        file = files['file']
+        spooled = isinstance(file, SpooledUpload)
         
         if not file.name.lower().endswith(('.xlsx', '.xls')):
             messages.error(request, 'فقط فایل‌های اکسل با پسوند .xlsx و .xls قابل قبول هستند')
-            return render(request, 'analyzer/upload.html')
+            return render(request, 'analyzer/upload.html', context)
+        
+        mode = request.POST.get('mode', AnalysisJob.MODE_EXACT)
+        if mode not in dict(AnalysisJob.MODE_CHOICES):
+            messages.error(request, 'حالت تحلیل انتخاب شده معتبر نیست')
+            return render(request, 'analyzer/upload.html', context)
+        
+        # رکوردهای کارایی مراحل آپلود؛ در خلاصه کار تحلیل ادامه پیدا می‌کنند
+        timings = [file.record] if spooled else []
+        # برگه‌های انتخاب شده؛ خالی یعنی همه برگه‌ها
+        sheet_names = [name.strip() for name in request.POST.get('sheets', '').split(',') if name.strip()]
         
         try:
-            df = pd.read_excel(file)
-            results_dir = os.path.join(settings.MEDIA_ROOT, 'results')
-            os.makedirs(results_dir, exist_ok=True)
-            
             file_name = os.path.splitext(file.name)[0]
-            date_columns = detect_date_columns(df)
-            
-            # تولید تحلیل‌های مختلف
-            all_analyses = {
-                'پایه': generate_basic_analysis(df),
-                'زمانی': generate_time_analysis(df),
-                'آماری': generate_statistical_analysis(df),
-                'کسب‌وکار': generate_business_analysis(df)
-            }
+            if spooled:
+                content_hash = selection_hash(file.content_hash, sheet_names)
+            else:
+                with measure_stage('upload_hash', timings, size_bytes=file.size):
+                    content_hash = selection_hash(hash_uploaded_file(file), sheet_names)
             
-            # ذخیره همه تحلیل‌ها در یک فایل Excel
-            output_file = os.path.join(results_dir, f'{file_name}_analysis.xlsx')
-            with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-                for category, analyses in all_analyses.items():
-                    for analysis_name, analysis_data in analyses.items():
-                        sheet_name = f"{category}_{analysis_name}"[:31]
-                        analysis_data['data'].to_excel(writer, sheet_name=sheet_name, index=True)
+            # فایل تکراری: از همان فایل ذخیره شده و نتایج قبلی استفاده می‌شود
+            dataset = find_dataset(content_hash)
+            if dataset is not None:
+                touch(dataset.file.path)
+                if find_cached_job(dataset, mode):
+                    touch(results_path(dataset))
+                    messages.success(request, f'فایل "{file_name}" قبلا تحلیل شده است؛ نتایج ذخیره شده نمایش داده می‌شود')
+                    return redirect('analysis_results', dataset_id=dataset.pk)
                 
-                df.to_excel(writer, sheet_name='داده_های_اصلی', index=False)
+                if not has_active_job(dataset, mode):
+                    enqueue_analysis(dataset, mode, timings)
+                messages.success(request, f'فایل "{file_name}" در صف تحلیل قرار گرفت')
+                return redirect('analysis_results', dataset_id=dataset.pk)
             
-            # نمایش نتایج
-            context = {
-                'file_name': file_name,
-                'output_file': output_file,
-                'all_analyses': all_analyses,
-                'basic_info': {
-                    'rows': len(df),
-                    'columns': len(df.columns),
-                    'missing_total': df.isnull().sum().sum(),
-                    'columns_list': df.columns.tolist(),
-                    'has_date_columns': len(date_columns) > 0,
-                    'date_columns': date_columns
-                }
-            }
+            with measure_stage('upload_save', timings, size_bytes=file.size):
+                dataset = DataSet.objects.create(
+                    name=file_name,
+                    file=file.claim() if spooled else file,
+                    content_hash=content_hash,
+                    sheets=[{'name': name} for name in sheet_names]
+                )
+            enqueue_analysis(dataset, mode, timings)
             
-            messages.success(request, f'فایل "{file_name}" با موفقیت تحلیل شد!')
-            return render(request, 'analyzer/analysis_results.html', context)
+            messages.success(request, f'فایل "{file_name}" آپلود شد و در صف تحلیل قرار گرفت')
+            return redirect('analysis_results', dataset_id=dataset.pk)
             
         except Exception as e:
-            messages.error(request, f'خطا در تحلیل فایل: {str(e)}')
-            return render(request, 'analyzer/upload.html')
+            messages.error(request, f'خطا در آپلود فایل: {str(e)}')
+            return render(request, 'analyzer/upload.html', context)
     
-    return render(request, 'analyzer/upload.html')
+    return render(request, 'analyzer/upload.html', context)
 
-# views.py - این قسمت را باید با منطق خودتان جایگزین کنید
-def perform_analysis(request, selected_column):
+# ستون‌های لازم برای فهرست؛ پیش‌نمایش و خلاصه ستون‌ها فقط در صفحه جزئیات خوانده می‌شوند
+DATASET_LIST_FIELDS = ('pk', 'name', 'columns', 'row_count', 'uploaded_at', 'sheets')
+
+def dataset_list(request):
+    """فهرست دیتاست‌ها فقط از متادیتای ذخیره شده با صفحه‌بندی keyset (بدون باز کردن هیچ فایلی)
+
+    before صفحه دیتاست‌های قدیمی‌تر از یک شناسه و after صفحه جدیدترها را می‌دهد،
+    پس هزینه هر صفحه به تعداد کل دیتاست‌ها بستگی ندارد.
     """
-    این تابع را کاملا با تحلیل‌های خاص خودتان جایگزین کنید
+    size = settings.ANALYZER_DATASET_PAGE_SIZE
+    datasets = DataSet.objects.filter(parent=None).only(*DATASET_LIST_FIELDS)
+    try:
+        before = int(request.GET['before']) if 'before' in request.GET else None
+        after = int(request.GET['after']) if 'after' in request.GET else None
+    except ValueError:
+        before = after = None
+    
+    if after is not None:
+        page = list(datasets.filter(pk__gt=after).order_by('pk')[:size])[::-1]
+    else:
+        newest_first = datasets.filter(pk__lt=before) if before is not None else datasets
+        page = list(newest_first.order_by('-pk')[:size])
+    
+    context = {
+        'datasets': page,
+        'older': page[-1].pk if page and datasets.filter(pk__lt=page[-1].pk).exists() else None,
+        'newer': page[0].pk if page and datasets.filter(pk__gt=page[0].pk).exists() else None,
+    }
+    return render(request, 'analyzer/dataset_list.html', context)
+
+def dataset_detail(request, dataset_id):
+    """جزئیات یک دیتاست از پیش‌نمایش و خلاصه ستون‌های ذخیره شده هنگام خواندن داده"""
+    dataset = get_object_or_404(DataSet, pk=dataset_id)
+    job = AnalysisJob.objects.filter(dataset=dataset).order_by('-created_at').first()
+    preview = None
+    if dataset.preview:
+        preview = table_page(dataset.preview, page_rows=max(1, len(dataset.preview['index'])))
+    
+    context = {
+        'dataset': dataset,
+        'job': job,
+        'preview': preview,
+        'columns_info': dataset.column_summary,
+        'total_missing': sum(col['missing_count'] for col in dataset.column_summary),
+        'sheets': dataset.sheet_datasets.only(*DATASET_LIST_FIELDS, 'sheet_name').order_by('pk'),
+    }
+    return render(request, 'analyzer/dataset_detail.html', context)
+
+def delete_dataset(request, dataset_id):
+    """حذف دیتاست با همه فایل‌ها و نتایج آن پس از تأیید"""
+    dataset = get_object_or_404(DataSet, pk=dataset_id)
+    if request.method != 'POST':
+        return render(request, 'analyzer/delete_confirm.html', {'dataset': dataset})
+    
+    name = dataset.name
+    dataset.delete()
+    messages.success(request, f'دیتاست "{name}" حذف شد')
+    return redirect('dataset_list')
+
+def analysis_results(request, dataset_id):
+    """نمایش نتایج تحلیل یا وضعیت پیشرفت کار"""
+    dataset = get_object_or_404(DataSet, pk=dataset_id)
+    job = AnalysisJob.objects.filter(dataset=dataset).order_by('-created_at').first()
+    
+    if job is None or job.status != AnalysisJob.STATUS_DONE:
+        return render(request, 'analyzer/analysis_progress.html', {'dataset': dataset, 'job': job})
+    
+    # جدول‌ها از همان قالب ذخیره شده و فقط برای صفحه اول ساخته می‌شوند؛ پروفایل و تجمیع‌ها خوانده نمی‌شوند
+    categories = [category for category, _ in ANALYSIS_FAMILIES] + [SHEETS_CATEGORY]
+    stored = {
+        result.analysis_type: result.result_data
+        for result in AnalysisResult.objects.filter(dataset=dataset, analysis_type__in=categories).order_by('created_at')
+    }
+    
+    if SHEETS_CATEGORY in stored:
+        return _sheet_results(request, dataset, job, stored[SHEETS_CATEGORY])
+    
+    request.session['dataset_id'] = dataset.pk
+    all_analyses = {}
+    for category, _ in ANALYSIS_FAMILIES:
+        if category not in stored:
+            continue
+        keys = sheet_names_for(category, stored[category])
+        all_analyses[category] = {
+            analysis_name: {
+                'table': table_page(analysis_data['data']),
+                'insights': analysis_data['insights'],
+                'recommendations': analysis_data['recommendations'],
+                'download_key': keys[analysis_name],
+            }
+            for analysis_name, analysis_data in stored[category].items()
+        }
+    
+    context = {
+        'dataset': dataset,
+        'file_name': storage_name(dataset),
+        'all_analyses': all_analyses,
+        'basic_info': job.summary,
+        'tracemalloc': settings.ANALYZER_TRACEMALLOC,
+        'rollup_granularities': GRANULARITY_LABELS.items(),
+        'rollup_statistics': STATISTIC_LABELS.items()
+    }
+    return render(request, 'analyzer/analysis_results.html', context)
+
+def _sheet_results(request, dataset, job, stored):
+    """صفحه فایل چندبرگه‌ای: وضعیت تحلیل هر برگه و خلاصه تجمیعی برگه‌ها"""
+    sheets = []
+    for child in dataset.sheet_datasets.order_by('pk'):
+        sheet_job = AnalysisJob.objects.filter(dataset=child).order_by('-created_at').first()
+        sheets.append({'dataset': child, 'job': sheet_job})
+    
+    keys = sheet_names_for(SHEETS_CATEGORY, stored)
+    summary = {
+        analysis_name: {
+            'table': table_page(analysis_data['data']),
+            'insights': analysis_data['insights'],
+            'recommendations': analysis_data['recommendations'],
+            'download_key': keys[analysis_name],
+        }
+        for analysis_name, analysis_data in stored.items()
+    }
+    context = {
+        'dataset': dataset,
+        'file_name': storage_name(dataset),
+        'sheets': sheets,
+        'summary': summary,
+        'basic_info': job.summary
+    }
+    return render(request, 'analyzer/sheet_results.html', context)
+
+def analysis_table(request, dataset_id, analysis_key):
+    """یک صفحه از جدول یک تحلیل به صورت JSON برای صفحه‌بندی سمت سرور"""
+    dataset = get_object_or_404(DataSet, pk=dataset_id)
+    
+    try:
+        page = int(request.GET.get('page', 1))
+        column_page = int(request.GET.get('col_page', 1))
+    except ValueError:
+        return JsonResponse({'error': 'شماره صفحه نامعتبر است'}, status=400)
+    
+    for category in [category for category, _ in ANALYSIS_FAMILIES] + [SHEETS_CATEGORY]:
+        if not analysis_key.startswith(f'{category}_'):
+            continue
+        result = AnalysisResult.objects.filter(
+            dataset=dataset, analysis_type=category
+        ).order_by('-created_at').first()
+        if result is None:
+            continue
+        for analysis_name, key in sheet_names_for(category, result.result_data).items():
+            if key == analysis_key:
+                return JsonResponse(table_page(result.result_data[analysis_name]['data'], page, column_page))
+    
+    return JsonResponse({'error': 'تحلیل مورد نظر یافت نشد'}, status=404)
+
+def time_rollup(request, dataset_id):
+    """برش مکعب تجمیع زمانی ذخیره شده برای یک ستون تاریخ، سطح زمانی و آماره
+
+    خروجی پیش‌فرض یک صفحه از جدول به صورت JSON است؛ با format=csv یا json کل
+    جدول دانلود می‌شود. هیچ‌کدام داده اصلی را دوباره تجمیع نمی‌کنند.
     """
-    # TODO: اینجا را با کدهای تحلیل خودتان پر کنید
-    # مثال:
+    dataset = get_object_or_404(DataSet, pk=dataset_id)
+    rollup = load_rollup(dataset)
+    if rollup is None or rollup.empty:
+        return JsonResponse({'error': 'برای این دیتاست تجمیع زمانی ذخیره نشده است'}, status=404)
+    
+    date_column = request.GET.get('date_column') or rollup.date_columns[0]
+    granularity = request.GET.get('granularity', 'month')
+    statistic = request.GET.get('statistic', 'mean')
+    if date_column not in rollup.date_columns or granularity not in GRANULARITIES or statistic not in STATISTICS:
+        return JsonResponse({'error': 'ستون تاریخ، سطح زمانی یا آماره نامعتبر است'}, status=400)
     try:
-        filename = request.session.get('excel_filename')
-        df = pd.read_excel(f'media/excel_files/{filename}')
+        page = int(request.GET.get('page', 1))
+        column_page = int(request.GET.get('col_page', 1))
+    except ValueError:
+        return JsonResponse({'error': 'شماره صفحه نامعتبر است'}, status=400)
+    
+    table = rollup.table(date_column, granularity, statistic)
+    download_format = request.GET.get('format')
+    if download_format == 'csv':
+        # BOM برای نمایش درست متن فارسی در Excel، مانند فایل‌های csv گزارش
+        content = '\ufeff' + table.to_csv()
+    elif download_format == 'json':
+        content = table.to_json(orient='split', force_ascii=False)
+    else:
+        serialized = json.loads(table.to_json(orient='split', force_ascii=False))
+        return JsonResponse(dict(
+            table_page(serialized, page, column_page),
+            date_column=date_column, granularity=granularity, statistic=statistic
+        ))
+    
+    response = HttpResponse(content, content_type=DOWNLOAD_CONTENT_TYPES[download_format])
+    response['Content-Disposition'] = content_disposition_header(
+        True, f'{storage_name(dataset)}_{date_column}_{granularity}_{statistic}.{download_format}'
+    )
+    return response
+
+def job_status(request, job_id):
+    """وضعیت کار تحلیل برای نظرسنجی دوره‌ای صفحه نتایج"""
+    job = get_object_or_404(AnalysisJob, pk=job_id)
+    # کار یتیم ناموفق ثبت می‌شود تا صفحه نتایج برای همیشه منتظر نماند
+    if not job.is_finished and recover_stale_jobs(pk=job.pk):
+        job.refresh_from_db()
+    return JsonResponse({
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'progress': job.progress,
+        'completed_steps': job.completed_steps,
+        'total_steps': job.total_steps,
+        'error': job.error,
+        'results_url': reverse('analysis_results', args=[job.dataset_id])
+    })
+
+def selective_analysis(request, dataset_id):
+    """تحلیل انتخابی: فقط ستون‌ها و تحلیل‌های خواسته شده خوانده و محاسبه می‌شوند"""
+    dataset = get_object_or_404(DataSet, pk=dataset_id)
+    wants_json = request.GET.get('format') == 'json'
+    sheets = list(dataset.sheet_datasets.order_by('pk'))
+    if sheets:
+        return _choose_sheet(request, dataset, sheets, wants_json)
+    
+    if not dataset.columns:
+        messages.error(request, 'این دیتاست هنوز تحلیل نشده است')
+        return redirect('analysis_results', dataset_id=dataset.pk)
+    
+    form = AnalysisForm(request.GET or None, dataset_columns=dataset.columns)
+    context = {'dataset': dataset, 'form': form, 'analyses': None}
+    
+    if form.is_bound and not form.is_valid():
+        if wants_json:
+            return JsonResponse({'errors': form.errors}, status=400)
+    elif form.is_bound:
+        columns = form.cleaned_data['columns'] or dataset.columns
+        started = time.perf_counter()
+        df = load_dataset_frame(dataset, columns=columns)
+        serialized = serialize_analyses(generate_selected_analysis(
+            df,
+            form.cleaned_data['analysis_type'],
+            correlation_method=settings.ANALYZER_CORRELATION_METHOD,
+            correlation_max_columns=settings.ANALYZER_CORRELATION_MAX_COLUMNS,
+            correlation_top=settings.ANALYZER_CORRELATION_TOP
+        ))
+        seconds = round(time.perf_counter() - started, 3)
         
-        # 🔥 این بخش را با تحلیل‌های واقعی خودتان جایگزین کنید
-        analysis = {
-            'column_name': selected_column,
-            'your_custom_analysis': 'نتایج تحلیل شما اینجا قرار می‌گیرد',
-            # اضافه کردن تحلیل‌های خاص شما
+        if wants_json:
+            return JsonResponse({'dataset': dataset.pk, 'columns': columns, 'seconds': seconds, 'analyses': serialized})
+        context['seconds'] = seconds
+        context['analyses'] = {
+            analysis_name: {
+                'table': table_page(
+                    analysis_data['data'],
+                    page_rows=max(1, len(analysis_data['data']['index'])),
+                    page_columns=max(1, len(analysis_data['data']['columns']))
+                ),
+                'insights': analysis_data['insights'],
+                'recommendations': analysis_data['recommendations'],
+            }
+            for analysis_name, analysis_data in serialized.items()
         }
-        
-        return analysis
-        
-    except Exception as e:
-        return {'error': str(e)}
\ No newline at end of file
+    
+    return render(request, 'analyzer/selective_analysis.html', context)
+
+def _choose_sheet(request, dataset, sheets, wants_json):
+    """فایل چندبرگه‌ای داده مستقل ندارد؛ تحلیل انتخابی روی دیتاست برگه انجام می‌شود
+
+    با پارامتر sheet به دیتاست همان برگه (با همان پارامترهای دیگر) هدایت می‌شود و
+    در غیر این صورت فهرست برگه‌ها برای انتخاب نمایش داده می‌شود.
+    """
+    chosen = next((child for child in sheets if child.sheet_name == request.GET.get('sheet')), None)
+    if chosen is not None:
+        query = request.GET.copy()
+        del query['sheet']
+        url = reverse('selective_analysis', args=[chosen.pk])
+        return redirect(f'{url}?{query.urlencode()}' if query else url)
+    
+    message = 'این فایل چند برگه دارد؛ برای تحلیل انتخابی یکی از برگه‌ها را انتخاب کنید'
+    if wants_json:
+        return JsonResponse({'error': message, 'sheets': [child.sheet_name for child in sheets]}, status=400)
+    messages.info(request, message)
+    return render(request, 'analyzer/selective_analysis.html', {
+        'dataset': dataset, 'form': None, 'analyses': None, 'sheets': sheets
+    })
+
+def perform_analysis(request, selected_column):
+    """تحلیل جزئی (drill-down) یک ستون از دیتاست جاری با خواندن فقط همان ستون"""
+    dataset = get_object_or_404(DataSet, pk=request.session.get('dataset_id'))
+    if selected_column not in dataset.columns:
+        return JsonResponse({'error': 'ستون مورد نظر در دیتاست وجود ندارد'}, status=404)
+    
+    df = load_dataset_frame(dataset, columns=[selected_column])
+    analyses = generate_selected_analysis(df, list(SELECTABLE_ANALYSES))
+    return JsonResponse({'column_name': selected_column, 'analyses': serialize_analyses(analyses)})
+
+def metrics(request):
+    """شاخص‌های کارایی مراحل تحلیل در قالب متنی Prometheus"""
+    if not settings.ANALYZER_METRICS_ENABLED:
+        raise Http404
+    jobs = AnalysisJob.objects.filter(status=AnalysisJob.STATUS_DONE).only('summary')
+    return HttpResponse(prometheus_metrics(jobs.iterator()), content_type='text/plain; version=0.0.4; charset=utf-8')
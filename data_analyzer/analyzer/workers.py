@@ -0,0 +1,20 @@
+import os
+try:
+    import resource
+except ImportError:  # ویندوز
+    resource = None
+
+# این ماژول نباید مدل‌ها را import کند: پردازه spawn تابع initializer را پیش از django.setup بارگذاری می‌کند
+
+def init_worker():
+    """آماده‌سازی Django در پردازه‌های کارگر"""
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'data_analyzer.settings')
+    django.setup()
+
+def init_batch_worker(memory_mb=None):
+    """کارگر تحلیل دسته‌ای با سقف حافظه مجازی؛ عبور از سقف MemoryError و کار ناموفق می‌دهد"""
+    init_worker()
+    if memory_mb and resource is not None:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
@@ -28,6 +28,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'analyzer.instrumentation.ProfileMiddleware',
 ]
 
 ROOT_URLCONF = 'data_analyzer.urls'
@@ -54,6 +55,13 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # WAL تا صفحه نتایج هنگام نوشتن کارگرها خوانده شود؛ IMMEDIATE قفل نوشتن را از ابتدای تراکنش می‌گیرد
+        # تا تراکنش‌های همزمان پردازه‌ها به جای خطای database is locked منتظر بمانند
+        'OPTIONS': {
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
@@ -67,4 +75,93 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# تعداد پردازه‌های کارگر تحلیل؛ صفر یعنی اجرای همزمان داخل درخواست
+ANALYZER_WORKERS = 2
+
+# کار در صف یا در حال اجرایی که این مدت (ثانیه) ضربانی نداشته یتیم حساب می‌شود (مثلا پس از راه‌اندازی
+# دوباره سرور یا کشته شدن کارگر)، ناموفق ثبت می‌شود و جلوی ثبت کار تازه برای همان دیتاست را نمی‌گیرد؛
+# باید از طولانی‌ترین مرحله یک تحلیل و زمان انتظار در صف بیشتر باشد
+ANALYZER_JOB_STALE_SECONDS = 30 * 60
+
+# دستور analyze_batch: هر کارگر پس از این تعداد فایل با پردازه تازه جایگزین می‌شود تا حافظه آزاد شود؛
+# سقف حافظه مجازی هر کارگر به مگابایت (None یعنی بدون سقف، فقط در لینوکس و macOS)
+ANALYZER_BATCH_TASKS_PER_CHILD = 1
+ANALYZER_BATCH_MEMORY_MB = None
+
+# سقف حجم پوشه‌های media به بایت؛ با عبور از سقف، فایل‌هایی که دیرتر استفاده شده‌اند حذف می‌شوند (None یعنی بدون محدودیت)
+ANALYZER_RESULTS_MAX_BYTES = 500 * 1024 * 1024
+ANALYZER_DATASETS_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# خواندن جریانی فایل‌های اکسل: تعداد ردیف هر تکه و سقف حافظه داده خوانده شده به بایت
+ANALYZER_INGEST_CHUNK_ROWS = 50000
+ANALYZER_INGEST_MEMORY_LIMIT = 1024 * 1024 * 1024
+
+# روش آزمون نرمالیتی: shapiro، dagostino یا anderson
+ANALYZER_NORMALITY_TEST = 'shapiro'
+
+# اجرای همزمان دسته‌های تحلیل: serial، thread یا process (پردازه‌ها داده را از نسخه ستونی با memory map می‌خوانند)
+ANALYZER_FAMILY_EXECUTOR = 'thread'
+ANALYZER_FAMILY_WORKERS = 4
+# تعداد نخ‌ها برای کارهای ستونی مانند آزمون نرمالیتی و تبدیل تاریخ
+ANALYZER_COLUMN_WORKERS = 4
+
+# گزارش Excel: موتور نوشتن (auto، xlsxwriter یا openpyxl) و نحوه قرار دادن داده اصلی (include، link یا skip)
+ANALYZER_REPORT_ENGINE = 'auto'
+ANALYZER_REPORT_RAW_DATA = 'include'
+# نشانی سایت برای ساخت پیوندهای مطلق در گزارش‌ها
+ANALYZER_SITE_URL = 'http://localhost:8000'
+
+# صفحه‌بندی جدول‌های نتایج: تعداد ردیف هر صفحه و تعداد ستون هر پنجره
+ANALYZER_TABLE_PAGE_ROWS = 50
+ANALYZER_TABLE_PAGE_COLUMNS = 20
+
+# فهرست دیتاست‌ها: تعداد دیتاست هر صفحه؛ تعداد ردیف پیش‌نمایش ذخیره شده هر دیتاست
+ANALYZER_DATASET_PAGE_SIZE = 25
+ANALYZER_PREVIEW_ROWS = 20
+
+# جدول‌های نتایج با بیش از این تعداد خانه به صورت Arrow IPC در MEDIA_ROOT/tables و فقط اشاره‌گرشان در پایگاه داده ذخیره می‌شوند
+ANALYZER_RESULT_INLINE_CELLS = 5000
+
+# فایل‌های چندبرگه‌ای: تعداد پردازه‌هایی که برگه‌ها را همزمان تحلیل می‌کنند
+ANALYZER_SHEET_WORKERS = 2
+
+# آپلود جریانی: فایل اکسل در حین دریافت مستقیما در پوشه datasets نوشته، هش و بررسی می‌شود
+# (در WSGI و ASGI یکسان؛ ASGI بدنه درخواست را پیش از آن در فایل موقت نگه می‌دارد). سقف حجم فایل به بایت
+ANALYZER_UPLOAD_MAX_BYTES = 200 * 1024 * 1024
+FILE_UPLOAD_HANDLERS = [
+    'analyzer.uploads.DatasetUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# حالت تحلیل تقریبی: تعداد ردیف‌های نمونه تصادفی برای چارک‌ها، همبستگی و پرت‌ها
+ANALYZER_APPROX_SAMPLE_SIZE = 100000
+
+# benchmark خط لوله تحلیل (manage.py benchmark_analysis): مسیر baseline و حداکثر کندی مجاز
+ANALYZER_BENCHMARK_BASELINE = os.path.join(BASE_DIR, 'benchmarks', 'baseline.json')
+ANALYZER_BENCHMARK_THRESHOLD = 0.2
+
+# اندازه‌گیری کارایی: شاخص‌های Prometheus در /metrics/ و پوشه ذخیره cProfile هر درخواست و هر کار (None یعنی غیرفعال)
+ANALYZER_METRICS_ENABLED = False
+ANALYZER_PROFILE_DIR = None
+# ردیابی حافظه با tracemalloc در کارهای تحلیل برای ستون حافظه پنل کارایی؛ سربار زمانی قابل توجهی دارد
+ANALYZER_TRACEMALLOC = False
+
+# همبستگی: روش (pearson، spearman یا kendall)؛ با بیش از MAX_COLUMNS ستون عددی به جای ماتریس کامل فقط TOP زوج قوی‌تر گزارش می‌شود
+ANALYZER_CORRELATION_METHOD = 'pearson'
+ANALYZER_CORRELATION_MAX_COLUMNS = 100
+ANALYZER_CORRELATION_TOP = 200
+
+# لاگ JSON زمان و حافظه هر مرحله در logger به نام analyzer.performance
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'analyzer.performance': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}